@@ -0,0 +1,36 @@
+"""apply course grade unique constraint
+
+Revision ID: 2be14d46529f
+Revises: f12591b0b7b5
+Create Date: 2026-10-18 20:40:12.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2be14d46529f'
+down_revision = 'f12591b0b7b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # keep only the latest score of a student on a course
+    op.execute(
+        "DELETE FROM course_grades AS a USING course_grades AS b "
+        "WHERE a.student_id = b.student_id "
+        "AND a.course_id = b.course_id AND a.id < b.id"
+    )
+    op.create_unique_constraint(
+        'uq_grade_student_course',
+        'course_grades',
+        ['student_id', 'course_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        'uq_grade_student_course', 'course_grades', type_='unique'
+    )
@@ -0,0 +1,36 @@
+"""visitor search index
+
+Revision ID: 3e9a7c5b2f18
+Revises: 8b4f2e6d1a37
+Create Date: 2026-10-19 00:41:26.093518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e9a7c5b2f18'
+down_revision = '8b4f2e6d1a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # the expression of visitor_search_text
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_visitors_search ON visitors "
+            "USING gist (lower(last_name || ' ' || name || ' ' || "
+            "middle_name || ' ' || passport_id) gist_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_visitors_search',
+            table_name='visitors',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,65 @@
+"""foreign key indexes
+
+Revision ID: 5d1e7a3c9b02
+Revises: 94657428b961
+Create Date: 2026-10-18 22:40:12.118302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1e7a3c9b02'
+down_revision = '94657428b961'
+branch_labels = None
+depends_on = None
+
+# lessons.teacher_id/auditory_id and shedules.group_id lead the
+# ix_lessons_*_schedule indexes and uq_group_date already
+INDEXES = [
+    ('ix_students_group_id', 'students', ['group_id']),
+    (
+        'ix_students_courses_course_student',
+        'students_courses',
+        ['course_id', 'student_id'],
+    ),
+    (
+        'ix_teacher_course_course_teacher',
+        'teacher_course',
+        ['course_id', 'teacher_id'],
+    ),
+    ('ix_course_grades_course_id', 'course_grades', ['course_id']),
+    ('ix_courses_faculty_id', 'courses', ['faculty_id']),
+    ('ix_groups_department_id', 'groups', ['department_id']),
+    ('ix_teachers_department_id', 'teachers', ['department_id']),
+]
+
+
+def upgrade() -> None:
+    # build the indexes without locking the tables against writes
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, postgresql_concurrently=True
+            )
+        op.create_index(
+            'ix_visitors_passport_id_id',
+            'visitors',
+            ['passport_id'],
+            postgresql_include=['id'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_visitors_passport_id_id',
+            table_name='visitors',
+            postgresql_concurrently=True,
+        )
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True
+            )
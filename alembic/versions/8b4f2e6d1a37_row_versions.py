@@ -0,0 +1,34 @@
+"""row versions
+
+Revision ID: 8b4f2e6d1a37
+Revises: 5d1e7a3c9b02
+Create Date: 2026-10-18 23:58:04.512377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4f2e6d1a37'
+down_revision = '5d1e7a3c9b02'
+branch_labels = None
+depends_on = None
+
+TABLES = ['visitors', 'courses', 'course_grades']
+
+
+def upgrade() -> None:
+    # a constant default doesn't rewrite the tables on Postgres 11+
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column(
+                'version', sa.Integer(), server_default='1', nullable=False
+            ),
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_column(table, 'version')
@@ -0,0 +1,40 @@
+"""timetable indexes
+
+Revision ID: 94657428b961
+Revises: c0625baee599
+Create Date: 2026-10-18 21:31:05.264410
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '94657428b961'
+down_revision = 'c0625baee599'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_lessons_schedule_timeslot',
+        'lessons',
+        ['schedule_id', 'timeslot_id'],
+    )
+    op.create_index(
+        'ix_lessons_teacher_schedule', 'lessons', ['teacher_id', 'schedule_id']
+    )
+    op.create_index(
+        'ix_lessons_auditory_schedule',
+        'lessons',
+        ['auditory_id', 'schedule_id'],
+    )
+    op.create_index('ix_shedules_date', 'shedules', ['date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_shedules_date', table_name='shedules')
+    op.drop_index('ix_lessons_auditory_schedule', table_name='lessons')
+    op.drop_index('ix_lessons_teacher_schedule', table_name='lessons')
+    op.drop_index('ix_lessons_schedule_timeslot', table_name='lessons')
@@ -0,0 +1,36 @@
+"""visitor birthdate index
+
+Revision ID: a41c8d7e5f29
+Revises: 3e9a7c5b2f18
+Create Date: 2026-10-19 01:27:53.660184
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41c8d7e5f29'
+down_revision = '3e9a7c5b2f18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # birthdate ranges of the student list filters
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_visitors_birthdate',
+            'visitors',
+            ['birthdate'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_visitors_birthdate',
+            table_name='visitors',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,48 @@
+"""course grade stats
+
+Revision ID: c0625baee599
+Revises: 2be14d46529f
+Create Date: 2026-10-18 21:02:37.540911
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c0625baee599'
+down_revision = '2be14d46529f'
+branch_labels = None
+depends_on = None
+
+SCORES = range(0, 6)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'course_grade_stats',
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        *(
+            sa.Column(f'score_{score}', sa.Integer(), nullable=False)
+            for score in SCORES
+        ),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id']),
+        sa.PrimaryKeyConstraint('course_id'),
+    )
+    score_columns = ", ".join(f"score_{score}" for score in SCORES)
+    score_counts = ", ".join(
+        f"count(CASE WHEN score = {score} THEN 1 END)" for score in SCORES
+    )
+    op.execute(
+        f"INSERT INTO course_grade_stats "
+        f"(course_id, count, total, {score_columns}) "
+        f"SELECT course_id, count(score), coalesce(sum(score), 0), "
+        f"{score_counts} FROM course_grades "
+        f"WHERE course_id IS NOT NULL GROUP BY course_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('course_grade_stats')
@@ -0,0 +1,47 @@
+"""transcript indexes
+
+Revision ID: d7b3e91f4a65
+Revises: a41c8d7e5f29
+Create Date: 2026-10-19 02:41:08.318502
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7b3e91f4a65'
+down_revision = 'a41c8d7e5f29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # exam grades of a student and plans of a group read by the transcript
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_exam_grades_student_id',
+            'exam_grades',
+            ['student_id'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_education_plans_group_id',
+            'education_plans',
+            ['group_id'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_education_plans_group_id',
+            table_name='education_plans',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_exam_grades_student_id',
+            table_name='exam_grades',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,39 @@
+"""student grade stats
+
+Revision ID: e5c2a8f06b14
+Revises: d7b3e91f4a65
+Create Date: 2026-10-19 03:12:45.907163
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c2a8f06b14'
+down_revision = 'd7b3e91f4a65'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'student_grade_stats',
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['student_id'], ['students.id'], ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('student_id'),
+    )
+    op.execute(
+        "INSERT INTO student_grade_stats (student_id, count, total) "
+        "SELECT student_id, count(score), coalesce(sum(score), 0) "
+        "FROM course_grades WHERE student_id IS NOT NULL "
+        "GROUP BY student_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('student_grade_stats')
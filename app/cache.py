@@ -0,0 +1,269 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable, Iterable, Type
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, joinedload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .config import settings
+from .database import Base
+from .models.education import Course
+from .models.structure import Department, Faculty, Group
+
+MISSING = object()
+
+# invalidations are counted per slot the keys are hashed to, which keeps
+# the counters in fixed memory; keys sharing a slot only skip more stores
+GENERATION_SLOTS = 4096
+
+caches: dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """Thread safe LRU cache of at most maxsize entries, each of them
+    expires ttl seconds after it was stored.
+
+    A value read from the database is stored with the generation of its
+    key taken before the read, and is dropped if the key was invalidated
+    in between, so that a reader can't store a result older than the
+    invalidation."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float, enabled=True):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = Lock()
+        self._generations = [0] * GENERATION_SLOTS
+        self._clears = 0
+        caches[name] = self
+
+    def _generation(self, key: Hashable) -> tuple[int, int]:
+        return self._clears, self._generations[hash(key) % GENERATION_SLOTS]
+
+    def generation(self, key: Hashable) -> tuple[int, int]:
+        with self._lock:
+            return self._generation(key)
+
+    def get(self, key: Hashable, default=MISSING):
+        if not self.enabled:
+            return default
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                    self.evictions += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value, generation=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation(key):
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+            self._generations[hash(key) % GENERATION_SLOTS] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._clears += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+reference_cache = TTLCache(
+    "reference",
+    settings.REFERENCE_CACHE_SIZE,
+    settings.REFERENCE_CACHE_TTL,
+    enabled=settings.REFERENCE_CACHE_ENABLED,
+)
+
+# Slow-changing reference models and the many-to-one relationships which
+# are cached together with them, as the response schemas read them.
+REFERENCE_RELATIONSHIPS = {
+    Faculty: (),
+    Department: ("faculty",),
+    Group: ("department",),
+    Course: ("faculty",),
+}
+
+
+def _snapshot(object: Base) -> Base:
+    """Detached copy of a loaded reference object, shareable between
+    sessions."""
+    mapper = inspect(object).mapper
+    copy = mapper.class_manager.new_instance()
+    for attribute in mapper.column_attrs:
+        set_committed_value(
+            copy, attribute.key, getattr(object, attribute.key)
+        )
+    for name in REFERENCE_RELATIONSHIPS[mapper.class_]:
+        related = getattr(object, name)
+        set_committed_value(
+            copy, name, None if related is None else _snapshot(related)
+        )
+    make_transient_to_detached(copy)
+    return copy
+
+
+def _attach(session: Session, snapshot: Base) -> Base:
+    existing = session.identity_map.get(inspect(snapshot).key)
+    if existing is not None:
+        return existing
+    return session.merge(snapshot, load=False)
+
+
+def get_reference(session: Session, model_class: Type[Base], id):
+    """Returns reference object from the cache attached to the session,
+    or None if it is not cached."""
+    snapshot = reference_cache.get((model_class, id), None)
+    if snapshot is None:
+        return None
+    return _attach(session, snapshot)
+
+
+def reference_generation(model_class: Type[Base], id):
+    """Generation to pass to cache_reference for an object read after
+    this call."""
+    return reference_cache.generation((model_class, id))
+
+
+def cache_reference(object: Base, generation=None):
+    model_class = type(object)
+    reference_cache.set(
+        (model_class, inspect(object).identity[0]),
+        _snapshot(object),
+        generation,
+    )
+
+
+def is_reference(model_class) -> bool:
+    return reference_cache.enabled and model_class in REFERENCE_RELATIONSHIPS
+
+
+def populate_references(
+    session: Session, objects: Iterable[Base], relationship: str
+):
+    """Sets many-to-one relationship of each object from the reference
+    cache. References which are not cached yet are loaded with one query
+    and cached."""
+    objects = list(objects)
+    if not objects:
+        return
+    prop = inspect(type(objects[0])).relationships[relationship]
+    model_class = prop.mapper.class_
+    (foreign_key,) = prop.local_columns
+    foreign_key = (
+        inspect(type(objects[0])).get_property_by_column(foreign_key).key
+    )
+
+    references = {}
+    missing = set()
+    for object in objects:
+        id = getattr(object, foreign_key)
+        if id is None or id in references:
+            continue
+        reference = get_reference(session, model_class, id)
+        if reference is None:
+            missing.add(id)
+        else:
+            references[id] = reference
+
+    if missing:
+        generations = {
+            id: reference_generation(model_class, id) for id in missing
+        }
+        query = select(model_class).where(model_class.id.in_(missing))
+        options = reference_options(model_class)
+        for reference in session.scalars(query.options(*options)):
+            cache_reference(reference, generations[reference.id])
+            references[reference.id] = reference
+
+    for object in objects:
+        set_committed_value(
+            object,
+            relationship,
+            references.get(getattr(object, foreign_key)),
+        )
+
+
+def reference_options(model_class) -> tuple:
+    """Loader options fetching the relationships cached together with
+    the reference model."""
+    options = ()
+    for name in REFERENCE_RELATIONSHIPS[model_class]:
+        related = inspect(model_class).relationships[name].mapper.class_
+        loader = joinedload(getattr(model_class, name))
+        options += (loader.options(*reference_options(related)),)
+    return options
+
+
+def invalidate_on_commit(session: Session, cache: TTLCache, keys=None):
+    """Drops keys (or the whole cache if keys is None) right away and once
+    more when the session commits, so that entries cached from the old
+    rows between flush and commit don't survive."""
+    pending = session.info.setdefault("invalidated_cache_keys", [])
+    pending.append((cache, keys))
+    _invalidate(cache, keys)
+
+
+def _invalidate(cache: TTLCache, keys):
+    if keys is None:
+        cache.clear()
+        return
+    for key in keys:
+        cache.invalidate(key)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for cache, keys in session.info.pop("invalidated_cache_keys", ()):
+        _invalidate(cache, keys)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_invalidated_keys(session, previous_transaction):
+    session.info.pop("invalidated_cache_keys", None)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_written_references(session, flush_context):
+    keys = set()
+    for object in list(session.dirty) + list(session.deleted):
+        model_class = type(object)
+        if model_class in (Faculty, Department):
+            # cached departments and groups hold copies of them
+            invalidate_on_commit(session, reference_cache)
+            return
+        if model_class in REFERENCE_RELATIONSHIPS:
+            keys.add((model_class, inspect(object).identity[0]))
+    if keys:
+        invalidate_on_commit(session, reference_cache, keys)
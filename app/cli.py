@@ -0,0 +1,73 @@
+"""Maintenance commands, run as
+
+python -m app.cli <command>
+"""
+
+import argparse
+import time
+
+from .database import Base, SessionLocal, init_engine
+from .services.grade_stats import rebuild_grade_stats
+from .services.seeding import STUDENTS_PER_SCALE, seed_database
+
+
+def rebuild_grade_stats_command(args):
+    init_engine()
+    with SessionLocal() as db:
+        rebuild_grade_stats(db)
+        db.commit()
+    print("course_grade_stats and student_grade_stats rebuilt")
+
+
+def seed_command(args):
+    engine = init_engine()
+    if args.create_tables:
+        Base.metadata.create_all(engine)
+    students = round(args.scale * STUDENTS_PER_SCALE)
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        counts = seed_database(db, students, args.seed)
+        db.commit()
+    elapsed = time.perf_counter() - started
+
+    for table, count in counts.items():
+        print(f"{table:20} {count:>12,}")
+    rows = sum(counts.values())
+    print(f"{rows:,} rows in {elapsed:.1f}s, {rows / elapsed:,.0f} rows/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser(
+        "rebuild-grade-stats",
+        help="recompute course and student grade stats from course_grades",
+    ).set_defaults(handler=rebuild_grade_stats_command)
+
+    seed = commands.add_parser(
+        "seed",
+        help="fill empty database with synthetic university",
+    )
+    seed.add_argument(
+        "--scale",
+        type=float,
+        default=1,
+        help=f"{STUDENTS_PER_SCALE} students per unit of scale",
+    )
+    seed.add_argument(
+        "--seed", type=int, default=0, help="seed of the random data"
+    )
+    seed.add_argument(
+        "--create-tables",
+        action="store_true",
+        help="create missing tables first, instead of alembic upgrade",
+    )
+    seed.set_defaults(handler=seed_command)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
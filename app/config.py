@@ -10,6 +10,70 @@ class Settings(BaseSettings):
     POSTGRES_HOSTNAME: str
     CLIENT_ORIGIN: str
 
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # milliseconds, 0 disables the limit
+    DB_STATEMENT_TIMEOUT: int = 0
+
+    # serve the API with async handlers on top of AsyncSession
+    ASYNC_MODE: bool = False
+
+    # cache of faculties, departments, groups and courses
+    REFERENCE_CACHE_ENABLED: bool = True
+    REFERENCE_CACHE_SIZE: int = 4096
+    # seconds
+    REFERENCE_CACHE_TTL: int = 300
+
+    # cache of group, teacher and auditory timetables, one entry per week
+    TIMETABLE_CACHE_ENABLED: bool = True
+    TIMETABLE_CACHE_SIZE: int = 10000
+    TIMETABLE_CACHE_TTL: int = 3600
+
+    # cache of student transcripts, one entry per student
+    TRANSCRIPT_CACHE_ENABLED: bool = True
+    TRANSCRIPT_CACHE_SIZE: int = 10000
+    TRANSCRIPT_CACHE_TTL: int = 3600
+
+    # seconds after which rankings are rebuilt from student_grade_stats,
+    # picking up grades written by other processes
+    RANKING_REBUILD_INTERVAL: int = 300
+
+    # reject lesson writes which double-book a teacher or an auditory
+    LESSON_CONFLICT_CHECK: bool = True
+
+    # worker processes of the timetable generator and the seconds each
+    # job may spend repairing lessons the greedy pass couldn't place
+    SCHEDULER_WORKERS: int = 1
+    SCHEDULER_TIME_LIMIT: int = 60
+    # finished jobs are forgotten after these seconds, and the oldest of
+    # them when there are more than SCHEDULER_FINISHED_JOBS
+    SCHEDULER_JOB_RETENTION: int = 3600
+    SCHEDULER_FINISHED_JOBS: int = 1000
+
+    # Server-Timing header and Prometheus histograms on /metrics
+    METRICS_ENABLED: bool = True
+
+    # list endpoints build JSON from selected columns, see routers/rows.py
+    FAST_SERIALIZATION: bool = True
+
+    @property
+    def database_url(self) -> str:
+        return (
+            f"postgresql://{self.POSTGRES_USER}"
+            f":{self.POSTGRES_PASSWORD}"
+            f"@{self.POSTGRES_HOSTNAME}"
+            f":{self.DATABASE_PORT}/{self.POSTGRES_DB}"
+        )
+
+    @property
+    def async_database_url(self) -> str:
+        return self.database_url.replace(
+            "postgresql://", "postgresql+asyncpg://", 1
+        )
+
     class Config:
         env_file = "./.env"
 
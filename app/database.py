@@ -1,27 +1,116 @@
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-
+from sqlalchemy.orm import Session, sessionmaker
 
 Base = declarative_base()
 
+# One engine (and therefore one connection pool) per worker process.
+# It is created on application startup and disposed on shutdown.
+engine: Engine | None = None
+async_engine: AsyncEngine | None = None
+
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=True
+)
+
+# Attributes can't be lazily refreshed after commit in async code,
+# so async sessions keep loaded state.
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+def _pool_options(settings) -> dict:
+    return dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
+def init_engine() -> Engine:
+    global engine
+    if engine is not None:
+        return engine
 
-def get_db():
     from .config import settings
 
-    SQLALCHEMY_DATABASE_URL = (
-        f"postgresql://{settings.POSTGRES_USER}"
-        f":{settings.POSTGRES_PASSWORD}"
-        f"@{settings.POSTGRES_HOSTNAME}"
-        f":{settings.DATABASE_PORT}/{settings.POSTGRES_DB}"
+    connect_args = {}
+    if settings.DB_STATEMENT_TIMEOUT:
+        connect_args["options"] = (
+            f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT}"
+        )
+
+    engine = create_engine(
+        settings.database_url,
+        connect_args=connect_args,
+        **_pool_options(settings),
     )
+    SessionLocal.configure(bind=engine)
+    return engine
+
+
+def init_async_engine() -> AsyncEngine:
+    global async_engine
+    if async_engine is not None:
+        return async_engine
+
+    from .config import settings
 
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
-    SessionLocal = sessionmaker(
-        autocommit=False, autoflush=False, bind=engine, expire_on_commit=True
+    connect_args = {}
+    if settings.DB_STATEMENT_TIMEOUT:
+        connect_args["server_settings"] = {
+            "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT)
+        }
+
+    async_engine = create_async_engine(
+        settings.async_database_url,
+        connect_args=connect_args,
+        **_pool_options(settings),
     )
+    AsyncSessionLocal.configure(bind=async_engine)
+    return async_engine
+
+
+def dispose_engine():
+    global engine
+    if engine is not None:
+        engine.dispose()
+        engine = None
+
+
+async def dispose_async_engine():
+    global async_engine
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
+
+
+def get_db():
+    init_engine()
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    init_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def upsert_insert(session: Session, model_class):
+    """Returns INSERT of the session dialect which supports
+    on_conflict_do_update/on_conflict_do_nothing."""
+    if session.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(model_class)
+    return postgresql.insert(model_class)
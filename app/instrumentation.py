@@ -0,0 +1,208 @@
+"""Per-request timings of SQL statements, ORM work and serialization.
+
+Every request gets RequestMetrics in a context variable. Cursor events of
+all engines, listened to once an app is instrumented, add statements and
+their time to it, the wrapped endpoints mark the moment the handler
+returned. The middleware reports the totals in the Server-Timing header
+and in Prometheus histograms labeled by route template.
+"""
+
+import asyncio
+import functools
+import time
+from contextvars import ContextVar
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from prometheus_client import CONTENT_TYPE_LATEST, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+class RequestMetrics:
+    __slots__ = ("started", "endpoint_finished", "statements", "db_seconds")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.endpoint_finished = None
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+current_metrics: ContextVar[RequestMetrics | None] = ContextVar(
+    "current_metrics", default=None
+)
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100, 1000)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to the response start",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing SQL statements",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+ORM_SECONDS = Histogram(
+    "http_request_orm_seconds",
+    "Time spent in the endpoint outside of SQL statements",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+SERIALIZATION_SECONDS = Histogram(
+    "http_request_serialization_seconds",
+    "Time from the endpoint return to the response start",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+SQL_STATEMENTS = Histogram(
+    "http_request_sql_statements",
+    "SQL statements executed by the request",
+    ["method", "route"],
+    buckets=STATEMENT_BUCKETS,
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, *_):
+    if current_metrics.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, *_):
+    metrics = current_metrics.get()
+    if metrics is not None and conn.info.get("query_started"):
+        metrics.statements += 1
+        metrics.db_seconds += (
+            time.perf_counter() - conn.info["query_started"].pop()
+        )
+
+
+def _timed_endpoint(call):
+    def finished():
+        metrics = current_metrics.get()
+        if metrics is not None:
+            metrics.endpoint_finished = time.perf_counter()
+
+    if asyncio.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def endpoint(*args, **kwargs):
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                finished()
+
+    else:
+
+        @functools.wraps(call)
+        def endpoint(*args, **kwargs):
+            try:
+                return call(*args, **kwargs)
+            finally:
+                finished()
+
+    return endpoint
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so that the body isn't buffered and the
+    request context is shared with the endpoint."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append(
+                    (b"server-timing", _report(scope, metrics, message))
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_metrics.reset(token)
+
+
+def _report(scope, metrics: RequestMetrics, message) -> bytes:
+    now = time.perf_counter()
+    total = now - metrics.started
+    if metrics.endpoint_finished is None:
+        # not routed or failed before the endpoint
+        endpoint, serialization = total, 0.0
+    else:
+        endpoint = metrics.endpoint_finished - metrics.started
+        serialization = now - metrics.endpoint_finished
+    orm = max(endpoint - metrics.db_seconds, 0.0)
+
+    route = scope.get("route")
+    labels = {
+        "method": scope["method"],
+        "route": route.path_format if route is not None else "unmatched",
+    }
+    REQUEST_SECONDS.labels(status=message["status"], **labels).observe(total)
+    DB_SECONDS.labels(**labels).observe(metrics.db_seconds)
+    ORM_SECONDS.labels(**labels).observe(orm)
+    SERIALIZATION_SECONDS.labels(**labels).observe(serialization)
+    SQL_STATEMENTS.labels(**labels).observe(metrics.statements)
+
+    return (
+        f'db;dur={metrics.db_seconds * 1000:.2f};desc="{metrics.statements}'
+        f' statements", orm;dur={orm * 1000:.2f}, '
+        f"serialization;dur={serialization * 1000:.2f}, "
+        f"total;dur={total * 1000:.2f}"
+    ).encode()
+
+
+def metrics_endpoint(request: Request) -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+CURSOR_LISTENERS = {
+    "before_cursor_execute": _before_cursor_execute,
+    "after_cursor_execute": _after_cursor_execute,
+}
+
+
+def instrument(app: FastAPI):
+    """Times endpoints of all routes included so far and serves the
+    histograms on /metrics. The cursor events of all engines are listened
+    to from now on, so nothing is timed unless the app is instrumented."""
+    for name, listener in CURSOR_LISTENERS.items():
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            route.dependant.call = _timed_endpoint(route.dependant.call)
+    app.add_middleware(MetricsMiddleware)
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
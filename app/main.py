@@ -1,7 +1,30 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm.exc import StaleDataError
 from app.config import settings
-from app.routers import users, education
-
+from app.database import (
+    init_engine,
+    dispose_engine,
+    init_async_engine,
+    dispose_async_engine,
+)
+from app.routers import (
+    bulk,
+    exports,
+    users,
+    education,
+    internal,
+    rankings,
+    search,
+    timetable,
+    transcripts,
+    async_users,
+    async_education,
+)
+from app.instrumentation import instrument
+from app.services.conflicts import LessonConflictError
+from app.services.scheduler import shutdown_scheduler
 
 app = FastAPI()
 
@@ -9,5 +32,53 @@ origins = [
     settings.CLIENT_ORIGIN,
 ]
 
-app.include_router(users.router, tags=["Users"], prefix="/api")
-app.include_router(education.router, tags=["Education"], prefix="/api")
+if settings.ASYNC_MODE:
+    users_router, education_router = async_users, async_education
+else:
+    users_router, education_router = users, education
+
+app.include_router(users_router.router, tags=["Users"], prefix="/api")
+app.include_router(education_router.router, tags=["Education"], prefix="/api")
+app.include_router(bulk.router, tags=["Bulk"], prefix="/api")
+app.include_router(exports.router, tags=["Exports"], prefix="/api")
+app.include_router(timetable.router, tags=["Timetable"], prefix="/api")
+app.include_router(transcripts.router, tags=["Users"], prefix="/api")
+app.include_router(rankings.router, tags=["Education"], prefix="/api")
+app.include_router(search.router, tags=["Search"], prefix="/api")
+app.include_router(internal.router, tags=["Internal"], prefix="/api")
+
+if settings.METRICS_ENABLED:
+    instrument(app)
+
+
+@app.exception_handler(LessonConflictError)
+def lesson_conflict_handler(request: Request, error: LessonConflictError):
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content=jsonable_encoder(
+            {"detail": str(error), "conflicts": error.conflicts}
+        ),
+    )
+
+
+@app.exception_handler(StaleDataError)
+def stale_data_handler(request: Request, error: StaleDataError):
+    # a concurrent request updated the row after it was loaded
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": "Object was modified concurrently, reload it"},
+    )
+
+
+@app.on_event("startup")
+def startup():
+    init_engine()
+    if settings.ASYNC_MODE:
+        init_async_engine()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    shutdown_scheduler()
+    dispose_engine()
+    await dispose_async_engine()
@@ -8,6 +8,7 @@ from sqlalchemy import (
     Date,
     Time,
     CheckConstraint,
+    Index,
     Table,
     UniqueConstraint,
 )
@@ -22,6 +23,8 @@ students_courses = Table(
     Column("student_id", Integer, ForeignKey("students.id")),
     Column("course_id", Integer, ForeignKey("courses.id")),
     UniqueConstraint("student_id", "course_id", name="uq_student_course"),
+    # students of a course
+    Index("ix_students_courses_course_student", "course_id", "student_id"),
 )
 
 
@@ -35,8 +38,12 @@ class Course(Base):
     teachers = relationship(
         "Teacher", secondary="teacher_course", back_populates="courses"
     )
-    faculty_id = Column(Integer, ForeignKey("faculties.id"))
+    faculty_id = Column(Integer, ForeignKey("faculties.id"), index=True)
     faculty = relationship("Faculty", backref="courses")
+    # incremented by every UPDATE, served as ETag
+    version = Column(Integer, nullable=False, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
 
     # many to many link with students
     students = relationship(
@@ -105,7 +112,7 @@ class ExamGrade(Base):
         Integer,
         CheckConstraint("score >= 0 AND score <= 5", name="score_limit"),
     )
-    student_id = Column(Integer, ForeignKey("students.id"))
+    student_id = Column(Integer, ForeignKey("students.id"), index=True)
     student = relationship("Student", backref="exam_grades")
 
 
@@ -121,7 +128,48 @@ class CourseGrade(Base):
     )
     student_id = Column(Integer, ForeignKey("students.id"))
     student = relationship("Student", backref="course_grades")
-    UniqueConstraint("student_id", "course_id", name="uq_student_course")
+    # incremented by every UPDATE, served as ETag
+    version = Column(Integer, nullable=False, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
+
+    __table_args__ = (
+        UniqueConstraint(
+            "student_id", "course_id", name="uq_grade_student_course"
+        ),
+        Index("ix_course_grades_course_id", "course_id"),
+    )
+
+
+class CourseGradeStats(Base):
+    """Summary of course_grades of one course, kept up to date by every
+    grade write"""
+
+    __tablename__ = "course_grade_stats"
+    course_id = Column(Integer, ForeignKey("courses.id"), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+    # number of grades with every possible score
+    score_0 = Column(Integer, nullable=False, default=0)
+    score_1 = Column(Integer, nullable=False, default=0)
+    score_2 = Column(Integer, nullable=False, default=0)
+    score_3 = Column(Integer, nullable=False, default=0)
+    score_4 = Column(Integer, nullable=False, default=0)
+    score_5 = Column(Integer, nullable=False, default=0)
+
+
+class StudentGradeStats(Base):
+    """Number and total of course scores of one student, kept up to date
+    by every grade write. Students are ranked by their average score."""
+
+    __tablename__ = "student_grade_stats"
+    student_id = Column(
+        Integer,
+        ForeignKey("students.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    count = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
 
 
 class Homework(Base):
@@ -163,7 +211,7 @@ class EducationPlan(Base):
         back_populates="plans",
         cascade="all, delete",
     )
-    group_id = Column(Integer, ForeignKey("groups.id"))
+    group_id = Column(Integer, ForeignKey("groups.id"), index=True)
     group = relationship("Group", backref="plans")
 
 
@@ -196,6 +244,10 @@ class Lesson(Base):
             "schedule_id",
             name="uq_time_auditory_date",
         ),
+        # timetables of a group, a teacher and an auditory
+        Index("ix_lessons_schedule_timeslot", "schedule_id", "timeslot_id"),
+        Index("ix_lessons_teacher_schedule", "teacher_id", "schedule_id"),
+        Index("ix_lessons_auditory_schedule", "auditory_id", "schedule_id"),
     )
 
 
@@ -208,4 +260,5 @@ class Schedule(Base):
 
     __table_args__ = (
         UniqueConstraint("group_id", "date", name="uq_group_date"),
+        Index("ix_shedules_date", "date"),
     )
@@ -5,11 +5,13 @@ from sqlalchemy import (
     String,
     Integer,
     ForeignKey,
+    Index,
     Table,
     UniqueConstraint,
 )
 
-from sqlalchemy.orm import relationship
+from sqlalchemy import DDL, event, func, inspect, literal_column
+from sqlalchemy.orm import Session, relationship
 from .structure import Group, Department
 from .education import Course, Exam
 
@@ -22,9 +24,52 @@ class UnivercityVisitor(Base):
     name = Column(String, nullable=False)
     middle_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
-    birthdate = Column(Date, nullable=False)
+    birthdate = Column(Date, nullable=False, index=True)
     passport_id = Column(String, nullable=False, unique=True)
+    # incremented by every UPDATE, served as ETag
+    version = Column(Integer, nullable=False, server_default="1")
 
+    __mapper_args__ = {"version_id_col": version}
+    __table_args__ = (
+        # the passport lookup reads the id from the index only
+        Index(
+            "ix_visitors_passport_id_id",
+            "passport_id",
+            postgresql_include=["id"],
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+def visitor_search_text(columns):
+    """Lowercased names and passport of the visitor, the expression of
+    the trigram index. Separators are rendered as constants, so that
+    queries repeat the expression of the index exactly."""
+    space = literal_column("' '")
+    return func.lower(
+        columns.last_name
+        + space
+        + columns.name
+        + space
+        + columns.middle_name
+        + space
+        + columns.passport_id
+    )
+
+
+# KNN search ordered by word similarity, see services/search.py
+Index(
+    "ix_visitors_search",
+    visitor_search_text(UnivercityVisitor.__table__.c).label("search_text"),
+    postgresql_using="gist",
+    postgresql_ops={"search_text": "gist_trgm_ops"},
+).ddl_if(dialect="postgresql")
+event.listen(
+    UnivercityVisitor.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(
+        dialect="postgresql"
+    ),
+)
 
 teacher_course = Table(
     "teacher_course",
@@ -32,6 +77,8 @@ teacher_course = Table(
     Column("teacher_id", Integer, ForeignKey("teachers.id")),
     Column("course_id", Integer, ForeignKey("courses.id")),
     UniqueConstraint("teacher_id", "course_id", name="uq_teacher_course"),
+    # teachers of a course
+    Index("ix_teacher_course_course_teacher", "course_id", "teacher_id"),
 )
 
 
@@ -43,15 +90,18 @@ class Teacher(UnivercityVisitor):
         secondary="teacher_course",
         back_populates="teachers",
         cascade="all, delete",
+        order_by=Course.id,
     )
-    department_id = Column(Integer, ForeignKey("departments.id"))
+    department_id = Column(Integer, ForeignKey("departments.id"), index=True)
     department = relationship(Department, backref="teachers")
 
 
 class Student(UnivercityVisitor):
     __tablename__ = "students"
     id = Column(Integer, ForeignKey("visitors.id"), primary_key=True)
-    group_id = Column(Integer, ForeignKey("groups.id"), nullable=True)
+    group_id = Column(
+        Integer, ForeignKey("groups.id"), nullable=True, index=True
+    )
     group = relationship(Group, backref="students")
     exams = relationship(
         Exam,
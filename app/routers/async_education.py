@@ -0,0 +1,258 @@
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.education import (
+    Course,
+    CourseGrade,
+    CourseGradeStats,
+    students_courses,
+)
+from ..models.structure import Faculty
+from ..models.users import Student
+from ..config import settings
+from ..database import get_async_db
+from ..schemas.users_schemas import (
+    CreateStudentCourseGradeSchema,
+    GetStudentCourseGradeSchema,
+    PutStudentCourseGradeSchema,
+)
+
+from ..schemas.users_schemas import GetStudentSchema
+from ..schemas.core import BatchGetSchema
+from ..schemas.education_schemas import (
+    BatchGetCoursesSchema,
+    BulkAssignTeachersSchema,
+    CourseGradeStatsSchema,
+    CreateCourseSchema,
+    GetCourseSchema,
+    TeacherAssignmentSchema,
+)
+from ..services.grade_stats import apply_grade_changes, summarize
+from ..services.teacher_courses import assign_teachers, faculty_teacher_ids
+
+from .core import (
+    async_conditional_get,
+    async_get_object_or_404,
+    async_get_objects,
+    batch_get_response,
+    check_if_match,
+    etag,
+)
+from .loaders import COURSE_OPTIONS, GRADE_OPTIONS, STUDENT_OPTIONS
+from .rows import student_dicts, student_select
+
+router = APIRouter()
+
+
+@router.post(
+    "/courses",
+    response_model=GetCourseSchema,
+    status_code=201,
+    description="Creates new course on faculty",
+)
+async def create_course(
+    course_data: CreateCourseSchema, db: AsyncSession = Depends(get_async_db)
+):
+    await async_get_object_or_404(db, Faculty, course_data.faculty_id)
+
+    new_course = Course(**course_data.dict())
+    db.add(new_course)
+    await db.commit()
+
+    return await async_get_object_or_404(
+        db, Course, new_course.id, COURSE_OPTIONS, populate_existing=True
+    )
+
+
+@router.get(
+    "/courses/{course_id}",
+    response_model=GetCourseSchema,
+    status_code=201,
+    description="Get course by id",
+)
+async def get_course(
+    course_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    not_modified = await async_conditional_get(request, db, Course, course_id)
+    if not_modified is not None:
+        return not_modified
+
+    course = await async_get_object_or_404(
+        db, Course, course_id, COURSE_OPTIONS
+    )
+    response.headers["ETag"] = etag(course)
+    return course
+
+
+@router.post(
+    "/courses:batchGet",
+    response_model=BatchGetCoursesSchema,
+    status_code=200,
+    description="Get courses with the given ids by one query",
+)
+async def batch_get_courses(
+    batch: BatchGetSchema, db: AsyncSession = Depends(get_async_db)
+):
+    courses = await async_get_objects(db, Course, batch.ids, COURSE_OPTIONS)
+    return batch_get_response(batch.ids, courses)
+
+
+@router.post(
+    "/courses/{course_id:int}/teachers:bulkAssign",
+    response_model=TeacherAssignmentSchema,
+    status_code=200,
+    description=(
+        "Assign teachers of the course faculty to the course, "
+        "keeping the assigned ones"
+    ),
+)
+async def bulk_assign_teachers(
+    course_id: int,
+    assignment: BulkAssignTeachersSchema,
+    db: AsyncSession = Depends(get_async_db),
+):
+    course = await async_get_object_or_404(db, Course, course_id)
+    teacher_ids = set(assignment.teacher_ids)
+    found = await db.run_sync(
+        faculty_teacher_ids, teacher_ids, course.faculty_id
+    )
+    if found != teacher_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Teachers {sorted(teacher_ids - found)} don't exist "
+                "or aren't on the course faculty"
+            ),
+        )
+
+    assigned = await db.run_sync(assign_teachers, course_id, teacher_ids)
+    await db.commit()
+    return {
+        "assigned": assigned,
+        "already_assigned": sorted(teacher_ids.difference(assigned)),
+    }
+
+
+@router.get(
+    "/courses/{course_id}/students/",
+    response_model=list[GetStudentSchema],
+    status_code=201,
+    description="Get all course students",
+)
+async def get_course_students(
+    course_id: int, db: AsyncSession = Depends(get_async_db)
+):
+    await async_get_object_or_404(db, Course, course_id)
+    if settings.FAST_SERIALIZATION:
+        rows = await db.execute(
+            student_select()
+            .join(
+                students_courses, students_courses.c.student_id == Student.id
+            )
+            .where(students_courses.c.course_id == course_id)
+        )
+        return ORJSONResponse(student_dicts(rows), status_code=201)
+
+    students = await db.scalars(
+        select(Student)
+        .join(students_courses, students_courses.c.student_id == Student.id)
+        .where(students_courses.c.course_id == course_id)
+        .options(*STUDENT_OPTIONS)
+    )
+    return students.all()
+
+
+@router.get(
+    "/courses/{course_id}/grade-stats",
+    response_model=CourseGradeStatsSchema,
+    description="Get number, average and distribution of course scores",
+)
+async def get_course_grade_stats(
+    course_id: int, db: AsyncSession = Depends(get_async_db)
+):
+    stats = await db.get(CourseGradeStats, course_id)
+    if stats is None:
+        await async_get_object_or_404(db, Course, course_id)
+    return summarize(course_id, stats)
+
+
+@router.post(
+    "/grades",
+    response_model=GetStudentCourseGradeSchema,
+    status_code=201,
+    description="Creates new student course score",
+)
+async def create_grade(
+    grade_data: CreateStudentCourseGradeSchema,
+    db: AsyncSession = Depends(get_async_db),
+):
+    await async_get_object_or_404(db, Student, grade_data.student_id)
+    await async_get_object_or_404(db, Course, grade_data.course_id)
+    new_grade = CourseGrade(**grade_data.dict())
+    db.add(new_grade)
+    try:
+        await db.flush()
+    except IntegrityError:
+        # uq_grade_student_course
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=(
+                "Student already has a grade on the course, "
+                "update it by PUT /grades/{id}"
+            ),
+        )
+    await db.run_sync(
+        apply_grade_changes,
+        [(new_grade.course_id, new_grade.student_id, None, new_grade.score)],
+    )
+    await db.commit()
+    return await async_get_object_or_404(
+        db, CourseGrade, new_grade.id, GRADE_OPTIONS, populate_existing=True
+    )
+
+
+@router.put(
+    "/grades/{grade_id:int}",
+    response_model=GetStudentCourseGradeSchema,
+    description="Update student course score ",
+)
+async def put_grade(
+    grade_id: int,
+    grade_data: PutStudentCourseGradeSchema,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    grade: CourseGrade = await async_get_object_or_404(
+        db, CourseGrade, grade_id, GRADE_OPTIONS, with_for_update=True
+    )
+    check_if_match(request, grade)
+    await db.run_sync(
+        apply_grade_changes,
+        [
+            (
+                grade.course_id,
+                grade.student_id,
+                grade.score,
+                grade_data.score,
+            )
+        ],
+    )
+    grade.score = grade_data.score
+    await db.commit()
+    response.headers["ETag"] = etag(grade)
+    return grade
@@ -0,0 +1,527 @@
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.users import Student, Teacher
+from ..models.education import Course
+from ..models.structure import Group, Department, Faculty
+from ..config import settings
+from ..database import get_async_db
+from ..schemas.core import BatchGetSchema
+from ..schemas.users_schemas import (
+    BatchGetStudentsSchema,
+    BatchGetTeachersSchema,
+    CreateStudentSchema,
+    CreateTeacherSchema,
+    GetStudentSchema,
+    GetTeacherSchema,
+    PatchStudentSchema,
+    PatchTeacherSchema,
+    PutTeacherSchema,
+    StudentsPageSchema,
+    TeachersPageSchema,
+)
+from ..services.teacher_courses import (
+    faculty_course_ids,
+    sync_teacher_courses,
+)
+from .core import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    async_conditional_get,
+    async_get_object_or_404,
+    async_get_objects,
+    batch_get_response,
+    check_if_match,
+    etag,
+    keyset_page,
+    page_response,
+)
+from .fieldsets import Fieldset, student_fieldset, teacher_fieldset
+from .filters import StudentFilters
+from .loaders import (
+    DEPARTMENT_OPTIONS,
+    STUDENT_OPTIONS,
+    TEACHER_FACULTY_OPTIONS,
+    TEACHER_OPTIONS,
+)
+from .rows import (
+    student_dicts,
+    student_select,
+    teacher_courses_select,
+    teacher_dicts,
+    teacher_select,
+)
+
+router = APIRouter()
+
+
+@router.post(
+    "/students",
+    response_model=GetStudentSchema,
+    status_code=201,
+    description="Creates student from the given data",
+)
+async def create_student(
+    student_data: CreateStudentSchema, db: AsyncSession = Depends(get_async_db)
+):
+    if await db.scalar(
+        select(Student.id).filter_by(passport_id=student_data.passport_id)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="User with the same passport ID already exists",
+        )
+
+    if student_data.group_id is not None:
+        await async_get_object_or_404(db, Group, student_data.group_id)
+
+    new_student = Student(**student_data.dict())
+
+    db.add(new_student)
+    await db.commit()
+    return await async_get_object_or_404(
+        db, Student, new_student.id, STUDENT_OPTIONS, populate_existing=True
+    )
+
+
+@router.get(
+    "/students/{student_id:int}",
+    status_code=status.HTTP_200_OK,
+    response_model=GetStudentSchema,
+    description="Return data of specifed student",
+)
+async def get_student(
+    student_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    not_modified = await async_conditional_get(
+        request, db, Student, student_id
+    )
+    if not_modified is not None:
+        return not_modified
+
+    student = await async_get_object_or_404(
+        db, Student, student_id, STUDENT_OPTIONS
+    )
+    response.headers["ETag"] = etag(student)
+    return student
+
+
+@router.get(
+    "/students",
+    status_code=status.HTTP_200_OK,
+    response_model=StudentsPageSchema,
+    description="Get page of students ordered by id",
+)
+async def get_students(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = Query(None, description="Cursor of the next page"),
+    filters: StudentFilters = Depends(),
+    fieldset: Fieldset = Depends(student_fieldset),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if settings.FAST_SERIALIZATION or not fieldset.full:
+        students = student_dicts(
+            await db.execute(
+                keyset_page(
+                    filters.apply(student_select(fieldset)),
+                    Student.id,
+                    limit,
+                    after,
+                )
+            ),
+            fieldset,
+        )
+        return ORJSONResponse(page_response(request, students, limit))
+
+    students = await db.scalars(
+        keyset_page(
+            filters.apply(select(Student).options(*STUDENT_OPTIONS)),
+            Student.id,
+            limit,
+            after,
+        )
+    )
+    return page_response(request, students.all(), limit)
+
+
+async def _update_student(
+    student_id: int,
+    student_data: PatchStudentSchema,
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+):
+    student: Student = await async_get_object_or_404(db, Student, student_id)
+    check_if_match(request, student)
+
+    for key, value in student_data:
+        if hasattr(student, key) and value:
+            setattr(student, key, value)
+
+    await db.commit()
+    student = await async_get_object_or_404(
+        db, Student, student_id, STUDENT_OPTIONS, populate_existing=True
+    )
+    response.headers["ETag"] = etag(student)
+    return student
+
+
+@router.post(
+    "/students:batchGet",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchGetStudentsSchema,
+    description="Get students with the given ids by one query",
+)
+async def batch_get_students(
+    batch: BatchGetSchema,
+    fieldset: Fieldset = Depends(student_fieldset),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if settings.FAST_SERIALIZATION or not fieldset.full:
+        rows = await db.execute(
+            student_select(fieldset).where(Student.id.in_(batch.ids))
+        )
+        students = {
+            student["id"]: student for student in student_dicts(rows, fieldset)
+        }
+        return ORJSONResponse(batch_get_response(batch.ids, students))
+
+    students = await async_get_objects(db, Student, batch.ids, STUDENT_OPTIONS)
+    return batch_get_response(batch.ids, students)
+
+
+@router.patch(
+    "/students/{student_id:int}",
+    status_code=status.HTTP_200_OK,
+    response_model=GetStudentSchema,
+    description="Patch student with specified data",
+)
+async def patch_student(
+    student_id: int,
+    student_data: PatchStudentSchema,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await _update_student(
+        student_id, student_data, request, response, db
+    )
+
+
+@router.put(
+    "/students/{student_id:int}",
+    status_code=status.HTTP_200_OK,
+    response_model=GetStudentSchema,
+    description="Replaces all student data with the given",
+)
+async def put_student(
+    student_id: int,
+    student_data: PatchStudentSchema,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await _update_student(
+        student_id, student_data, request, response, db
+    )
+
+
+@router.delete(
+    "/students/{student_id:int}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    description="Delete the specifed student",
+)
+async def delete_student(
+    student_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    student: Student = await async_get_object_or_404(db, Student, student_id)
+    check_if_match(request, student)
+
+    await db.delete(student)
+    await db.commit()
+    return {"message": "Student deleted successfully"}
+
+
+async def _get_faculty_courses(
+    db: AsyncSession, courses_ids: list[int], faculty: Faculty
+) -> list[Course]:
+    courses = await db.scalars(
+        select(Course)
+        .filter(Course.id.in_(courses_ids))
+        .filter(Course.faculty == faculty)
+    )
+    return courses.all()
+
+
+@router.post(
+    "/teachers",
+    status_code=status.HTTP_201_CREATED,
+    response_model=GetTeacherSchema,
+    description="Create teacher with specified data",
+)
+async def create_teacher(
+    teacher_data: CreateTeacherSchema, db: AsyncSession = Depends(get_async_db)
+):
+    if await db.scalar(
+        select(Teacher.id).filter_by(passport_id=teacher_data.passport_id)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Teacher with same passport id already exist",
+        )
+
+    teacher_dict = teacher_data.dict()
+    courses_ids: list = teacher_dict.pop("courses")
+
+    if courses_ids is not None:
+        department: Department = await async_get_object_or_404(
+            db, Department, teacher_data.department_id, DEPARTMENT_OPTIONS
+        )
+        courses = await _get_faculty_courses(
+            db, courses_ids, department.faculty
+        )
+        if len(courses_ids) != len(courses):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=(
+                    "One of the given courses are not exists",
+                    " or not on the teacher department",
+                ),
+            )
+
+        teacher_dict["courses"] = courses
+
+    new_teacher = Teacher(**teacher_dict)
+
+    db.add(new_teacher)
+    await db.commit()
+    return await async_get_object_or_404(
+        db, Teacher, new_teacher.id, TEACHER_OPTIONS, populate_existing=True
+    )
+
+
+@router.get(
+    "/teachers/{teacher_id:int}",
+    status_code=status.HTTP_200_OK,
+    response_model=GetTeacherSchema,
+    description="Return data of specifed teacher",
+)
+async def get_teacher(
+    teacher_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    not_modified = await async_conditional_get(
+        request, db, Teacher, teacher_id
+    )
+    if not_modified is not None:
+        return not_modified
+
+    teacher = await async_get_object_or_404(
+        db, Teacher, teacher_id, TEACHER_OPTIONS
+    )
+    response.headers["ETag"] = etag(teacher)
+    return teacher
+
+
+async def _teacher_dicts(
+    db: AsyncSession, rows: list, fieldset: Fieldset
+) -> list:
+    courses = ()
+    if "courses" in fieldset.fields:
+        courses = await db.execute(
+            teacher_courses_select([row.id for row in rows], fieldset)
+        )
+    return teacher_dicts(rows, courses, fieldset)
+
+
+@router.get(
+    "/teachers",
+    status_code=status.HTTP_200_OK,
+    response_model=TeachersPageSchema,
+    description="Get page of teachers ordered by id",
+)
+async def get_teachers(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = Query(None, description="Cursor of the next page"),
+    fieldset: Fieldset = Depends(teacher_fieldset),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if settings.FAST_SERIALIZATION or not fieldset.full:
+        rows = (
+            await db.execute(
+                keyset_page(teacher_select(fieldset), Teacher.id, limit, after)
+            )
+        ).all()
+        teachers = await _teacher_dicts(db, rows, fieldset)
+        return ORJSONResponse(page_response(request, teachers, limit))
+
+    teachers = await db.scalars(
+        keyset_page(
+            select(Teacher).options(*TEACHER_OPTIONS),
+            Teacher.id,
+            limit,
+            after,
+        )
+    )
+    return page_response(request, teachers.all(), limit)
+
+
+@router.post(
+    "/teachers:batchGet",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchGetTeachersSchema,
+    description="Get teachers with the given ids by one query",
+)
+async def batch_get_teachers(
+    batch: BatchGetSchema,
+    fieldset: Fieldset = Depends(teacher_fieldset),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if settings.FAST_SERIALIZATION or not fieldset.full:
+        rows = (
+            await db.execute(
+                teacher_select(fieldset).where(Teacher.id.in_(batch.ids))
+            )
+        ).all()
+        teachers = {
+            teacher["id"]: teacher
+            for teacher in await _teacher_dicts(db, rows, fieldset)
+        }
+        return ORJSONResponse(batch_get_response(batch.ids, teachers))
+
+    teachers = await async_get_objects(db, Teacher, batch.ids, TEACHER_OPTIONS)
+    return batch_get_response(batch.ids, teachers)
+
+
+@router.patch(
+    "/teachers/{teacher_id:int}",
+    status_code=status.HTTP_200_OK,
+    response_model=GetTeacherSchema,
+    description="Patch teacher with specified data",
+)
+async def patch_teacher(
+    teacher_id: int,
+    teacher_data: PatchTeacherSchema,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    teacher: Teacher = await async_get_object_or_404(
+        db, Teacher, teacher_id, TEACHER_FACULTY_OPTIONS
+    )
+    check_if_match(request, teacher)
+
+    new_teacher_faculty: Faculty = (
+        teacher.department.faculty
+        if teacher_data.department_id is None
+        else (
+            await async_get_object_or_404(
+                db, Department, teacher_data.department_id, DEPARTMENT_OPTIONS
+            )
+        ).faculty
+    )
+
+    teacher_data_dict = teacher_data.dict()
+
+    courses = teacher_data_dict.pop("courses")
+
+    if courses is not None:
+        found = await db.run_sync(
+            faculty_course_ids, courses, new_teacher_faculty.id
+        )
+        if found != set(courses):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=(
+                    "Given corses are not presented "
+                    "on the {new_teacher_faculty}"
+                ),
+            )
+
+        await db.run_sync(sync_teacher_courses, teacher, courses)
+    elif new_teacher_faculty != teacher.department.faculty:
+        await db.run_sync(sync_teacher_courses, teacher, ())
+
+    for key, value in teacher_data_dict.items():
+        if hasattr(teacher, key) and value:
+            setattr(teacher, key, value)
+
+    await db.commit()
+    teacher = await async_get_object_or_404(
+        db, Teacher, teacher_id, TEACHER_OPTIONS, populate_existing=True
+    )
+    response.headers["ETag"] = etag(teacher)
+    return teacher
+
+
+@router.put(
+    "/teachers/{teacher_id:int}",
+    status_code=status.HTTP_200_OK,
+    response_model=GetTeacherSchema,
+    description="Patch teacher with specified data",
+)
+async def put_teacher(
+    teacher_id: int,
+    teacher_data: PutTeacherSchema,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    teacher: Teacher = await async_get_object_or_404(
+        db, Teacher, teacher_id, TEACHER_FACULTY_OPTIONS
+    )
+    check_if_match(request, teacher)
+
+    new_teacher_faculty = (
+        await async_get_object_or_404(
+            db, Department, teacher_data.department_id, DEPARTMENT_OPTIONS
+        )
+    ).faculty
+
+    teacher_data_dict = teacher_data.dict()
+    # PUT replaces the courses, none if they are missing
+    courses = teacher_data_dict.pop("courses") or []
+
+    found = await db.run_sync(
+        faculty_course_ids, courses, new_teacher_faculty.id
+    )
+    if found != set(courses):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                "Given corses are not presented "
+                "on the {new_teacher_faculty}"
+            ),
+        )
+
+    await db.run_sync(sync_teacher_courses, teacher, courses)
+
+    for key, value in teacher_data_dict.items():
+        if hasattr(teacher, key) and value:
+            setattr(teacher, key, value)
+
+    await db.commit()
+    teacher = await async_get_object_or_404(
+        db, Teacher, teacher_id, TEACHER_OPTIONS, populate_existing=True
+    )
+    response.headers["ETag"] = etag(teacher)
+    return teacher
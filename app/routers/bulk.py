@@ -0,0 +1,336 @@
+import csv
+import json
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, Request, status, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..database import get_db, upsert_insert
+from ..models.education import Course, CourseGrade
+from ..models.structure import Group
+from ..models.users import Student, UnivercityVisitor
+from ..schemas.users_schemas import (
+    BulkImportReportSchema,
+    BulkRowResultSchema,
+    BulkStudentCourseGradeSchema,
+    BulkUpsertReportSchema,
+    CreateStudentSchema,
+    MAX_SCORE,
+    MIN_SCORE,
+)
+from ..services.grade_stats import apply_grade_changes
+from ..services.transcript import invalidate_transcripts
+
+# Bulk endpoints run on the sync engine in both API modes: rows are parsed
+# on the event loop and every batch is written from the threadpool.
+router = APIRouter()
+
+BULK_BATCH_SIZE = 1000
+
+
+class MalformedRow(Exception):
+    pass
+
+
+def _decode(line: bytes) -> str | MalformedRow:
+    try:
+        return line.decode().rstrip("\r")
+    except UnicodeDecodeError as error:
+        return MalformedRow(f"Malformed UTF-8: {error}")
+
+
+async def _read_lines(request: Request) -> AsyncIterator[str | MalformedRow]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield _decode(line)
+    if buffer:
+        yield _decode(buffer)
+
+
+async def _read_records(request: Request) -> AsyncIterator[dict]:
+    """Yields records of JSON array, NDJSON or CSV request body. Records
+    which can't be parsed are yielded as MalformedRow instances so that
+    they are reported in place."""
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith("application/json"):
+        try:
+            records = json.loads(await request.body())
+        except ValueError:
+            records = None
+        if not isinstance(records, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Request body must be a JSON array",
+            )
+        for record in records:
+            yield record
+
+    elif content_type.startswith(
+        ("application/x-ndjson", "application/ndjson")
+    ):
+        async for line in _read_lines(request):
+            if isinstance(line, MalformedRow):
+                yield line
+                continue
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                yield MalformedRow(f"Malformed JSON: {error}")
+
+    elif content_type.startswith("text/csv"):
+        header = None
+        async for line in _read_lines(request):
+            if isinstance(line, MalformedRow):
+                yield line
+                continue
+            if not line.strip():
+                continue
+            values = next(csv.reader([line]))
+            if header is None:
+                header = values
+            elif len(values) != len(header):
+                yield MalformedRow("Wrong number of CSV columns")
+            else:
+                yield {
+                    key: value or None for key, value in zip(header, values)
+                }
+
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=(
+                "Expected application/json, application/x-ndjson "
+                "or text/csv body"
+            ),
+        )
+
+
+async def _batches(
+    records: AsyncIterator[dict], size: int = BULK_BATCH_SIZE
+) -> AsyncIterator[list[tuple[int, dict]]]:
+    batch = []
+    row = 0
+    async for record in records:
+        batch.append((row, record))
+        row += 1
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _format_errors(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, item['loc']))}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def _import_students_batch(
+    db: Session, batch: list[tuple[int, dict]]
+) -> list[BulkRowResultSchema]:
+    results = {}
+    students = []
+    for row, record in batch:
+        if isinstance(record, MalformedRow):
+            results[row] = BulkRowResultSchema(row=row, detail=str(record))
+            continue
+        try:
+            students.append((row, CreateStudentSchema.parse_obj(record)))
+        except ValidationError as error:
+            results[row] = BulkRowResultSchema(
+                row=row, detail=_format_errors(error)
+            )
+
+    passport_ids = {student.passport_id for _, student in students}
+    group_ids = {
+        student.group_id
+        for _, student in students
+        if student.group_id is not None
+    }
+    existing_passport_ids = set(
+        db.scalars(
+            select(UnivercityVisitor.passport_id).where(
+                UnivercityVisitor.passport_id.in_(passport_ids)
+            )
+        )
+    )
+    existing_group_ids = set(
+        db.scalars(select(Group.id).where(Group.id.in_(group_ids)))
+    )
+
+    new_students = []
+    for row, student in students:
+        if student.passport_id in existing_passport_ids:
+            results[row] = BulkRowResultSchema(
+                row=row,
+                detail="User with the same passport ID already exists",
+            )
+        elif (
+            student.group_id is not None
+            and student.group_id not in existing_group_ids
+        ):
+            results[row] = BulkRowResultSchema(
+                row=row,
+                detail=f"Group with id={student.group_id} is not found",
+            )
+        else:
+            existing_passport_ids.add(student.passport_id)
+            new_students.append((row, student.dict()))
+
+    if new_students:
+        try:
+            ids = db.scalars(
+                insert(Student).returning(
+                    Student.id, sort_by_parameter_order=True
+                ),
+                [student for _, student in new_students],
+            ).all()
+            db.commit()
+        except IntegrityError:
+            # a concurrent write took some of the passports or groups
+            db.rollback()
+            ids = [None] * len(new_students)
+
+        for (row, _), id in zip(new_students, ids):
+            results[row] = BulkRowResultSchema(
+                row=row,
+                id=id,
+                detail=None if id else "Batch conflicts with other writes",
+            )
+
+    return [results[row] for row, _ in batch]
+
+
+@router.post(
+    "/students/bulk",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkImportReportSchema,
+    description=(
+        "Creates students from JSON array, NDJSON or CSV body "
+        "and reports result of every row"
+    ),
+)
+async def import_students(request: Request, db: Session = Depends(get_db)):
+    results = []
+    async for batch in _batches(_read_records(request)):
+        results += await run_in_threadpool(_import_students_batch, db, batch)
+
+    created = sum(1 for result in results if result.id is not None)
+    return BulkImportReportSchema(
+        created=created,
+        rejected=len(results) - created,
+        results=results,
+    )
+
+
+@router.post(
+    "/grades/bulk",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkUpsertReportSchema,
+    description=(
+        "Creates or updates course scores of many students "
+        "in one transaction"
+    ),
+)
+def upsert_grades(
+    grades_data: list[BulkStudentCourseGradeSchema],
+    db: Session = Depends(get_db),
+):
+    student_ids = {grade.student_id for grade in grades_data}
+    course_ids = {grade.course_id for grade in grades_data}
+    existing_student_ids = set(
+        db.scalars(select(Student.id).where(Student.id.in_(student_ids)))
+    )
+    existing_course_ids = set(
+        db.scalars(select(Course.id).where(Course.id.in_(course_ids)))
+    )
+
+    results = {}
+    # the same row can't be updated twice by one INSERT ... ON CONFLICT,
+    # so the last score of a student on a course wins
+    rows_by_key = {}
+    for row, grade in enumerate(grades_data):
+        key = (grade.student_id, grade.course_id)
+        if grade.student_id not in existing_student_ids:
+            detail = f"Student with id={grade.student_id} is not found"
+        elif grade.course_id not in existing_course_ids:
+            detail = f"Course with id={grade.course_id} is not found"
+        elif not MIN_SCORE <= grade.score <= MAX_SCORE:
+            detail = f"Score must be from {MIN_SCORE} to {MAX_SCORE}"
+        else:
+            if key in rows_by_key:
+                results[rows_by_key[key]] = BulkRowResultSchema(
+                    row=rows_by_key[key], detail=f"Overridden by row {row}"
+                )
+            rows_by_key[key] = row
+            continue
+        results[row] = BulkRowResultSchema(row=row, detail=detail)
+
+    rows = [grades_data[row].dict() for row in sorted(rows_by_key.values())]
+    old_scores = {
+        (student_id, course_id): score
+        for student_id, course_id, score in db.execute(
+            select(
+                CourseGrade.student_id,
+                CourseGrade.course_id,
+                CourseGrade.score,
+            )
+            .where(
+                tuple_(CourseGrade.student_id, CourseGrade.course_id).in_(
+                    list(rows_by_key)
+                )
+            )
+            .with_for_update()
+        )
+    }
+    apply_grade_changes(
+        db,
+        [
+            (
+                row["course_id"],
+                row["student_id"],
+                old_scores.get((row["student_id"], row["course_id"])),
+                row["score"],
+            )
+            for row in rows
+        ],
+    )
+    invalidate_transcripts(db, {row["student_id"] for row in rows})
+    for start in range(0, len(rows), BULK_BATCH_SIZE):
+        statement = upsert_insert(db, CourseGrade).values(
+            rows[start : start + BULK_BATCH_SIZE]
+        )
+        upserted = db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[CourseGrade.student_id, CourseGrade.course_id],
+                set_={
+                    "score": statement.excluded.score,
+                    # Core updates bypass the version counter of the mapper
+                    "version": CourseGrade.version + 1,
+                },
+            ).returning(
+                CourseGrade.id, CourseGrade.student_id, CourseGrade.course_id
+            )
+        )
+        for id, student_id, course_id in upserted:
+            row = rows_by_key[(student_id, course_id)]
+            results[row] = BulkRowResultSchema(row=row, id=id)
+    db.commit()
+
+    return BulkUpsertReportSchema(
+        upserted=len(rows_by_key),
+        rejected=len(grades_data) - len(rows_by_key),
+        results=[results[row] for row in range(len(grades_data))],
+    )
@@ -1,13 +1,125 @@
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from ..cache import (
+    cache_reference,
+    get_reference,
+    is_reference,
+    reference_generation,
+    reference_options,
+)
 from ..database import Base
+from .loaders import async_load_many, load_many
 from typing import Type
-from fastapi import status, HTTPException
+from fastapi import status, HTTPException, Request, Response
 
 
 def get_object_or_404(
-    session: Session, model_class: Type[Base] | str, id
+    session: Session,
+    model_class: Type[Base] | str,
+    id,
+    options=(),
+    populate_existing: bool = False,
+    with_for_update: bool = False,
 ) -> Type[Base]:
-    object = session.query(model_class).get(id)
+    if is_reference(model_class) and not with_for_update:
+        if not populate_existing:
+            object = get_reference(session, model_class, id)
+            if object is not None:
+                return object
+        options = reference_options(model_class)
+    # a write committed during the read mustn't be hidden by the old row
+    generation = (
+        reference_generation(model_class, id)
+        if is_reference(model_class)
+        else None
+    )
+
+    if populate_existing or with_for_update or isinstance(model_class, str):
+        object = session.get(
+            model_class,
+            id,
+            options=options,
+            populate_existing=populate_existing,
+            with_for_update=with_for_update,
+        )
+    else:
+        object = load_many(session, model_class, [id], options).get(id)
+    if object is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{model_class.__name__} with id={id} is not found",
+        )
+    else:
+        if is_reference(model_class):
+            cache_reference(object, generation)
+        return object
+
+
+def get_objects(
+    session: Session, model_class: Type[Base], ids: list, options=()
+) -> dict:
+    """Objects with the ids by id, the ids which are not found are left
+    out. All of them are looked up by one query."""
+    objects = {}
+    generations = {}
+    if is_reference(model_class):
+        for id in ids:
+            object = get_reference(session, model_class, id)
+            if object is not None:
+                objects[id] = object
+            else:
+                generations[id] = reference_generation(model_class, id)
+        options = reference_options(model_class)
+
+    loaded = load_many(
+        session, model_class, set(ids) - objects.keys(), options
+    )
+    if is_reference(model_class):
+        for id, object in loaded.items():
+            cache_reference(object, generations[id])
+    return objects | loaded
+
+
+def batch_get_response(ids: list, objects: dict) -> dict:
+    """Response of batchGet: the objects in the order of the requested
+    ids, None for the ids which are not found."""
+    return {"items": [objects.get(id) for id in ids]}
+
+
+def commit_and_reload(session: Session, object: Base, options=()) -> Base:
+    """Commits the session and loads object again together with the
+    relationships its response schema reads."""
+    session.flush()
+    id = inspect(object).identity
+    session.commit()
+    return get_object_or_404(
+        session, type(object), id, options, populate_existing=True
+    )
+
+
+async def async_get_object_or_404(
+    session: AsyncSession,
+    model_class: Type[Base],
+    id,
+    options=(),
+    populate_existing: bool = False,
+    with_for_update: bool = False,
+) -> Type[Base]:
+    if populate_existing or with_for_update:
+        object = await session.get(
+            model_class,
+            id,
+            options=options,
+            populate_existing=populate_existing,
+            with_for_update=with_for_update,
+        )
+    else:
+        object = (
+            await async_load_many(session, model_class, [id], options)
+        ).get(id)
     if object is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -15,3 +127,121 @@ def get_object_or_404(
         )
     else:
         return object
+
+
+async def async_get_objects(
+    session: AsyncSession, model_class: Type[Base], ids: list, options=()
+) -> dict:
+    return await async_load_many(session, model_class, ids, options)
+
+
+def etag(object: Base) -> str:
+    """Strong ETag of an object of a model with version_id_col."""
+    return f'"{object.version}"'
+
+
+def _etag_matches(header: str, tag: str, weak: bool) -> bool:
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if weak:
+            candidate = candidate.removeprefix("W/")
+        if candidate in ("*", tag):
+            return True
+    return False
+
+
+def _not_modified(request: Request, model_class, id, version):
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{model_class.__name__} with id={id} is not found",
+        )
+    tag = f'"{version}"'
+    if _etag_matches(request.headers["if-none-match"], tag, weak=True):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": tag}
+        )
+    return None
+
+
+def conditional_get(
+    request: Request, session: Session, model_class: Type[Base], id
+) -> Response | None:
+    """Returns 304 response if If-None-Match of the request matches the
+    current version of the object, which is read by one primary key
+    lookup, without loading the object."""
+    if "if-none-match" not in request.headers:
+        return None
+    version = session.scalar(
+        select(model_class.version).where(model_class.id == id)
+    )
+    return _not_modified(request, model_class, id, version)
+
+
+async def async_conditional_get(
+    request: Request, session: AsyncSession, model_class: Type[Base], id
+) -> Response | None:
+    if "if-none-match" not in request.headers:
+        return None
+    version = await session.scalar(
+        select(model_class.version).where(model_class.id == id)
+    )
+    return _not_modified(request, model_class, id, version)
+
+
+def check_if_match(request: Request, object: Base):
+    """Raises 412 if If-Match of the write request doesn't match the
+    version the object was loaded with. Writes committed after the check
+    fail the version check of the UPDATE instead."""
+    header = request.headers.get("if-match")
+    if header is not None and not _etag_matches(
+        header, etag(object), weak=False
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"{type(object).__name__} was modified, reload it",
+        )
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(id: int) -> str:
+    return urlsafe_b64encode(str(id).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Malformed pagination cursor",
+        )
+
+
+def keyset_page(query, id_column, limit: int, after: str | None):
+    """Restricts query (a Query or a select) to one page ordered by
+    id_column. One extra row is fetched to know whether a next page
+    exists."""
+    if after is not None:
+        query = query.where(id_column > decode_cursor(after))
+    return query.order_by(id_column).limit(limit + 1)
+
+
+def page_response(request: Request, items: list, limit: int) -> dict:
+    """Items are ORM objects or dicts of the fast path."""
+    next_link = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_link = str(
+            request.url.include_query_params(
+                limit=limit,
+                after=encode_cursor(
+                    last["id"] if isinstance(last, dict) else last.id
+                ),
+            )
+        )
+    return {"items": items, "next": next_link}
@@ -1,9 +1,24 @@
-from fastapi import APIRouter, Depends
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import ORJSONResponse
 
 from .users import Student
 
-from ..models.education import Course, CourseGrade
+from ..models.education import (
+    Course,
+    CourseGrade,
+    CourseGradeStats,
+    students_courses,
+)
+from ..config import settings
 from ..database import get_db
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from ..schemas.users_schemas import (
     CreateStudentCourseGradeSchema,
@@ -12,9 +27,29 @@ from ..schemas.users_schemas import (
 )
 
 from ..schemas.users_schemas import GetStudentSchema
-from ..schemas.education_schemas import CreateCourseSchema, GetCourseSchema
-
-from .core import get_object_or_404
+from ..schemas.core import BatchGetSchema
+from ..schemas.education_schemas import (
+    BatchGetCoursesSchema,
+    BulkAssignTeachersSchema,
+    CourseGradeStatsSchema,
+    CreateCourseSchema,
+    GetCourseSchema,
+    TeacherAssignmentSchema,
+)
+from ..services.grade_stats import apply_grade_changes, summarize
+from ..services.teacher_courses import assign_teachers, faculty_teacher_ids
+
+from .core import (
+    batch_get_response,
+    check_if_match,
+    commit_and_reload,
+    conditional_get,
+    etag,
+    get_object_or_404,
+    get_objects,
+)
+from .loaders import COURSE_OPTIONS, GRADE_OPTIONS, fetch_students
+from .rows import student_dicts, student_select
 
 from ..models.structure import Faculty
 
@@ -34,9 +69,7 @@ def create_course(
 
     new_course = Course(**course_data.dict())
     db.add(new_course)
-    db.commit()
-
-    return new_course
+    return commit_and_reload(db, new_course, COURSE_OPTIONS)
 
 
 @router.get(
@@ -45,11 +78,66 @@ def create_course(
     status_code=201,
     description="Get course by id",
 )
-def get_course(course_id: int, db: Session = Depends(get_db)):
-    course = get_object_or_404(db, Course, course_id)
+def get_course(
+    course_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    not_modified = conditional_get(request, db, Course, course_id)
+    if not_modified is not None:
+        return not_modified
+
+    course = get_object_or_404(db, Course, course_id, COURSE_OPTIONS)
+    response.headers["ETag"] = etag(course)
     return course
 
 
+@router.post(
+    "/courses:batchGet",
+    response_model=BatchGetCoursesSchema,
+    status_code=200,
+    description="Get courses with the given ids by one query",
+)
+def batch_get_courses(batch: BatchGetSchema, db: Session = Depends(get_db)):
+    courses = get_objects(db, Course, batch.ids, COURSE_OPTIONS)
+    return batch_get_response(batch.ids, courses)
+
+
+@router.post(
+    "/courses/{course_id:int}/teachers:bulkAssign",
+    response_model=TeacherAssignmentSchema,
+    status_code=200,
+    description=(
+        "Assign teachers of the course faculty to the course, "
+        "keeping the assigned ones"
+    ),
+)
+def bulk_assign_teachers(
+    course_id: int,
+    assignment: BulkAssignTeachersSchema,
+    db: Session = Depends(get_db),
+):
+    course = get_object_or_404(db, Course, course_id)
+    teacher_ids = set(assignment.teacher_ids)
+    found = faculty_teacher_ids(db, teacher_ids, course.faculty_id)
+    if found != teacher_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Teachers {sorted(teacher_ids - found)} don't exist "
+                "or aren't on the course faculty"
+            ),
+        )
+
+    assigned = assign_teachers(db, course_id, teacher_ids)
+    db.commit()
+    return {
+        "assigned": assigned,
+        "already_assigned": sorted(teacher_ids.difference(assigned)),
+    }
+
+
 @router.get(
     "/courses/{course_id}/students/",
     response_model=list[GetStudentSchema],
@@ -57,8 +145,34 @@ def get_course(course_id: int, db: Session = Depends(get_db)):
     description="Get all course students",
 )
 def get_course_students(course_id: int, db: Session = Depends(get_db)):
-    course: Course = get_object_or_404(db, Course, course_id)
-    return course.students
+    get_object_or_404(db, Course, course_id)
+    if settings.FAST_SERIALIZATION:
+        rows = db.execute(
+            student_select()
+            .join(
+                students_courses, students_courses.c.student_id == Student.id
+            )
+            .where(students_courses.c.course_id == course_id)
+        )
+        return ORJSONResponse(student_dicts(rows), status_code=201)
+
+    return fetch_students(
+        db.query(Student)
+        .join(students_courses, students_courses.c.student_id == Student.id)
+        .filter(students_courses.c.course_id == course_id)
+    )
+
+
+@router.get(
+    "/courses/{course_id}/grade-stats",
+    response_model=CourseGradeStatsSchema,
+    description="Get number, average and distribution of course scores",
+)
+def get_course_grade_stats(course_id: int, db: Session = Depends(get_db)):
+    stats = db.get(CourseGradeStats, course_id)
+    if stats is None:
+        get_object_or_404(db, Course, course_id)
+    return summarize(course_id, stats)
 
 
 @router.post(
@@ -74,8 +188,23 @@ def create_grade(
     get_object_or_404(db, Course, grade_data.course_id)
     new_grade = CourseGrade(**grade_data.dict())
     db.add(new_grade)
-    db.commit()
-    return new_grade
+    try:
+        db.flush()
+    except IntegrityError:
+        # uq_grade_student_course
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=(
+                "Student already has a grade on the course, "
+                "update it by PUT /grades/{id}"
+            ),
+        )
+    apply_grade_changes(
+        db,
+        [(new_grade.course_id, new_grade.student_id, None, new_grade.score)],
+    )
+    return commit_and_reload(db, new_grade, GRADE_OPTIONS)
 
 
 @router.put(
@@ -86,9 +215,26 @@ def create_grade(
 def put_grade(
     grade_id: int,
     grade_data: PutStudentCourseGradeSchema,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
 ):
-    grade: CourseGrade = get_object_or_404(db, CourseGrade, grade_id)
+    grade: CourseGrade = get_object_or_404(
+        db, CourseGrade, grade_id, with_for_update=True
+    )
+    check_if_match(request, grade)
+    apply_grade_changes(
+        db,
+        [
+            (
+                grade.course_id,
+                grade.student_id,
+                grade.score,
+                grade_data.score,
+            )
+        ],
+    )
     grade.score = grade_data.score
-    db.commit()
+    grade = commit_and_reload(db, grade, GRADE_OPTIONS)
+    response.headers["ETag"] = etag(grade)
     return grade
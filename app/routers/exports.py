@@ -0,0 +1,183 @@
+import csv
+import io
+from itertools import chain
+from typing import Callable, Iterator, Literal
+
+import orjson
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..models.education import Course, CourseGrade, students_courses
+from ..models.structure import Department, Faculty, Group
+from ..models.users import Student
+from .core import get_object_or_404
+from .rows import student_dict, student_select
+
+router = APIRouter()
+
+# rows fetched from the server-side cursor and sent as one chunk
+EXPORT_BATCH_SIZE = 1000
+FIRST_BATCH_SIZE = 10
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+ExportFormat = Literal["ndjson", "csv"]
+
+ROSTER_COLUMNS = [
+    "id",
+    "name",
+    "middle_name",
+    "last_name",
+    "passport_id",
+    "birthdate",
+    "group",
+    "department",
+    "faculty",
+]
+GRADE_SHEET_COLUMNS = [
+    "student_id",
+    "last_name",
+    "name",
+    "middle_name",
+    "group",
+    "course_id",
+    "course",
+    "score",
+]
+
+
+def _csv_chunk(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def _stream(
+    db: Session,
+    query: Select,
+    format: ExportFormat,
+    columns: list[str],
+    to_json: Callable,
+    to_csv: Callable,
+) -> Iterator[bytes]:
+    """Yields the rows of the query batch by batch. yield_per reads them
+    with a server-side cursor, so neither the rows nor the response are
+    held in memory at once. The CSV header goes out before the query is
+    executed."""
+    if format == "csv":
+        yield _csv_chunk([columns])
+    result = db.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    # a short first batch gets the first bytes out early
+    batches = chain([result.fetchmany(FIRST_BATCH_SIZE)], result.partitions())
+    for rows in batches:
+        if format == "csv":
+            yield _csv_chunk(map(to_csv, rows))
+        else:
+            yield b"".join(orjson.dumps(to_json(row)) + b"\n" for row in rows)
+
+
+def _export_response(
+    chunks: Iterator[bytes], format: ExportFormat, filename: str
+) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{filename}.{format}"'
+            )
+        },
+    )
+
+
+def _roster_csv_row(row) -> tuple:
+    return (
+        row.id,
+        row.name,
+        row.middle_name,
+        row.last_name,
+        row.passport_id,
+        row.birthdate,
+        row.group_name,
+        row.department_name,
+        row.faculty_name,
+    )
+
+
+@router.get(
+    "/courses/{course_id:int}/students/export",
+    response_class=StreamingResponse,
+    description=(
+        "Stream students of the course as NDJSON of the student schema "
+        "or as CSV"
+    ),
+)
+def export_course_students(
+    course_id: int,
+    format: ExportFormat = Query("ndjson"),
+    db: Session = Depends(get_db),
+):
+    get_object_or_404(db, Course, course_id)
+    query = (
+        student_select()
+        .join(students_courses, students_courses.c.student_id == Student.id)
+        .where(students_courses.c.course_id == course_id)
+        # the order of the index, so that rows stream without a sort
+        .order_by(students_courses.c.student_id)
+    )
+    return _export_response(
+        _stream(
+            db, query, format, ROSTER_COLUMNS, student_dict, _roster_csv_row
+        ),
+        format,
+        f"course-{course_id}-students",
+    )
+
+
+@router.get(
+    "/faculties/{faculty_id:int}/grades/export",
+    response_class=StreamingResponse,
+    description=(
+        "Stream course scores of all students of the faculty groups "
+        "as NDJSON or CSV"
+    ),
+)
+def export_faculty_grades(
+    faculty_id: int,
+    format: ExportFormat = Query("ndjson"),
+    db: Session = Depends(get_db),
+):
+    get_object_or_404(db, Faculty, faculty_id)
+    query = (
+        select(
+            Student.id.label("student_id"),
+            Student.last_name,
+            Student.name,
+            Student.middle_name,
+            Group.name.label("group"),
+            Course.id.label("course_id"),
+            Course.name.label("course"),
+            CourseGrade.score,
+        )
+        .join(Group, Group.id == Student.group_id)
+        .join(Department, Department.id == Group.department_id)
+        .join(CourseGrade, CourseGrade.student_id == Student.id)
+        .join(Course, Course.id == CourseGrade.course_id)
+        .where(Department.faculty_id == faculty_id)
+        .order_by(Student.id, Course.id)
+    )
+    return _export_response(
+        _stream(
+            db,
+            query,
+            format,
+            GRADE_SHEET_COLUMNS,
+            lambda row: row._asdict(),
+            tuple,
+        ),
+        format,
+        f"faculty-{faculty_id}-grades",
+    )
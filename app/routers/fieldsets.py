@@ -0,0 +1,126 @@
+from dataclasses import dataclass
+
+from fastapi import HTTPException, Query, status
+
+# Fields of GetStudentSchema and GetTeacherSchema in the order of the
+# schemas and the paths of the relationships nested in them. Sparse
+# responses are built by the fast path of rows.py, which selects and joins
+# only what they return.
+
+VISITOR_FIELDS = (
+    "name",
+    "middle_name",
+    "last_name",
+    "passport_id",
+    "birthdate",
+    "id",
+)
+STUDENT_FIELDS = (*VISITOR_FIELDS, "group")
+STUDENT_INCLUDES = ("group", "group.department", "group.department.faculty")
+TEACHER_FIELDS = (*VISITOR_FIELDS, "courses", "department")
+TEACHER_INCLUDES = (
+    "courses",
+    "courses.faculty",
+    "department",
+    "department.faculty",
+)
+
+
+@dataclass(frozen=True)
+class Fieldset:
+    """Fields of the response items and the expanded relationship paths,
+    each path together with its prefixes."""
+
+    fields: tuple[str, ...]
+    include: frozenset[str]
+    # the whole response schema
+    full: bool = False
+
+
+STUDENT_FIELDSET = Fieldset(
+    STUDENT_FIELDS, frozenset(STUDENT_INCLUDES), full=True
+)
+TEACHER_FIELDSET = Fieldset(
+    TEACHER_FIELDS, frozenset(TEACHER_INCLUDES), full=True
+)
+
+
+def _names(value: str, allowed: tuple, parameter: str) -> list[str]:
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Unknown {parameter}: {', '.join(unknown)}, "
+                f"expected some of {', '.join(allowed)}"
+            ),
+        )
+    return names
+
+
+def parse_fieldset(
+    fields: str | None,
+    include: str | None,
+    default: Fieldset,
+) -> Fieldset:
+    """A returned relationship has its name and the relationships nested
+    in it which are included, all of them without include. Included
+    relationships are returned even if fields don't list them, id is
+    returned always."""
+    if fields is None and include is None:
+        return default
+
+    requested = set(
+        default.fields
+        if fields is None
+        else _names(fields, default.fields, "fields")
+    )
+    if include is None:
+        paths = {
+            path for path in default.include if path.split(".")[0] in requested
+        }
+    else:
+        paths = set()
+        for path in _names(include, tuple(sorted(default.include)), "include"):
+            parts = path.split(".")
+            paths.update(
+                ".".join(parts[:length]) for length in range(1, len(parts) + 1)
+            )
+        requested.update(path.split(".")[0] for path in paths)
+    requested.add("id")
+    return Fieldset(
+        tuple(field for field in default.fields if field in requested),
+        frozenset(paths),
+    )
+
+
+FIELDS_DESCRIPTION = (
+    "Comma separated fields of the items, all of them if empty. "
+    "id is returned always"
+)
+INCLUDE_DESCRIPTION = (
+    "Comma separated relationships expanded in the items, e.g. {example}. "
+    "Relationships which aren't included have their names only, all of "
+    "them are expanded if the parameter is absent"
+)
+
+
+def student_fieldset(
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    include: str | None = Query(
+        None,
+        description=INCLUDE_DESCRIPTION.format(example="group.department"),
+    ),
+) -> Fieldset:
+    return parse_fieldset(fields, include, STUDENT_FIELDSET)
+
+
+def teacher_fieldset(
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    include: str | None = Query(
+        None,
+        description=INCLUDE_DESCRIPTION.format(example="courses,department"),
+    ),
+) -> Fieldset:
+    return parse_fieldset(fields, include, TEACHER_FIELDSET)
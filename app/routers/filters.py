@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Annotated
+
+from fastapi import Query
+from sqlalchemy import select
+
+from ..models.education import students_courses
+from ..models.structure import Department, Group
+from ..models.users import Student
+
+
+@dataclass
+class StudentFilters:
+    """Query parameters of the student list, used as a class dependency.
+    Relations are filtered by semi-joins on indexed columns, so that the
+    filters combine with each other and with the joins of the response."""
+
+    group_id: int | None = None
+    department_id: int | None = None
+    faculty_id: int | None = None
+    course_id: Annotated[
+        int | None, Query(description="Students enrolled to the course")
+    ] = None
+    # inclusive birthdate range
+    born_from: date | None = None
+    born_to: date | None = None
+
+    def apply(self, query):
+        """Restricts query (a Query or a select of Student)."""
+        if self.group_id is not None:
+            query = query.where(Student.group_id == self.group_id)
+        if self.department_id is not None:
+            query = query.where(
+                Student.group_id.in_(
+                    select(Group.id).where(
+                        Group.department_id == self.department_id
+                    )
+                )
+            )
+        if self.faculty_id is not None:
+            query = query.where(
+                Student.group_id.in_(
+                    select(Group.id)
+                    .join(Department, Department.id == Group.department_id)
+                    .where(Department.faculty_id == self.faculty_id)
+                )
+            )
+        if self.course_id is not None:
+            query = query.where(
+                Student.id.in_(
+                    select(students_courses.c.student_id).where(
+                        students_courses.c.course_id == self.course_id
+                    )
+                )
+            )
+        if self.born_from is not None:
+            query = query.where(Student.birthdate >= self.born_from)
+        if self.born_to is not None:
+            query = query.where(Student.birthdate <= self.born_to)
+        return query
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, status
+from sqlalchemy.pool import QueuePool
+
+from ..cache import caches
+from ..config import settings
+from ..database import init_async_engine, init_engine
+from ..schemas.internal_schemas import CacheStatsSchema, PoolStatusSchema
+
+router = APIRouter()
+
+
+@router.get(
+    "/_internal/pool",
+    status_code=status.HTTP_200_OK,
+    response_model=PoolStatusSchema,
+    description="Connection pool usage of the current worker process",
+)
+def get_pool_status():
+    engine = init_async_engine() if settings.ASYNC_MODE else init_engine()
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return PoolStatusSchema(size=0, checked_out=0, idle=0, overflow=0)
+
+    return PoolStatusSchema(
+        size=pool.size(),
+        checked_out=pool.checkedout(),
+        idle=pool.checkedin(),
+        overflow=max(pool.overflow(), 0),
+    )
+
+
+@router.get(
+    "/_internal/cache",
+    status_code=status.HTTP_200_OK,
+    response_model=dict[str, CacheStatsSchema],
+    description="Hit, miss and eviction counters of in-process caches",
+)
+def get_cache_stats():
+    return {name: cache.stats() for name, cache in caches.items()}
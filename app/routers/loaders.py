@@ -0,0 +1,161 @@
+from typing import Any, Iterable, Type
+
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session, joinedload, selectinload
+
+from ..cache import populate_references, reference_cache
+from ..database import Base
+from ..models.education import Course, CourseGrade
+from ..models.structure import Department, Group
+from ..models.users import Student, Teacher
+
+# Loader options that fetch everything the response schemas read, so
+# serialization never falls back to lazy loads. Every schema returned from
+# a handler has its own set of options; a query for a list of objects costs
+# a constant number of statements however long the list is.
+
+# DepartmentSchema
+DEPARTMENT_OPTIONS = (joinedload(Department.faculty),)
+
+# GetCourseSchema
+COURSE_OPTIONS = (joinedload(Course.faculty),)
+
+# GetStudentSchema
+STUDENT_OPTIONS = (
+    joinedload(Student.group)
+    .joinedload(Group.department)
+    .joinedload(Department.faculty),
+)
+
+# GetTeacherSchema
+TEACHER_OPTIONS = (
+    selectinload(Teacher.courses).joinedload(Course.faculty),
+    joinedload(Teacher.department).joinedload(Department.faculty),
+)
+
+# Teacher edits compare the faculties of the departments, the courses
+# are written by difference without loading them
+TEACHER_FACULTY_OPTIONS = (
+    joinedload(Teacher.department).joinedload(Department.faculty),
+)
+
+# GetStudentCourseGradeSchema
+GRADE_OPTIONS = (
+    joinedload(CourseGrade.course).joinedload(Course.faculty),
+    joinedload(CourseGrade.student)
+    .joinedload(Student.group)
+    .joinedload(Group.department)
+    .joinedload(Department.faculty),
+)
+
+
+# With the reference cache on, list endpoints take groups, departments
+# and faculties from the cache instead of joining them for every row.
+
+
+def fetch_students(query: Query) -> list[Student]:
+    if not reference_cache.enabled:
+        return query.options(*STUDENT_OPTIONS).all()
+
+    students = query.all()
+    populate_references(query.session, students, "group")
+    return students
+
+
+def fetch_teachers(query: Query) -> list[Teacher]:
+    if not reference_cache.enabled:
+        return query.options(*TEACHER_OPTIONS).all()
+
+    teachers = query.options(selectinload(Teacher.courses)).all()
+    populate_references(query.session, teachers, "department")
+    populate_references(
+        query.session,
+        [course for teacher in teachers for course in teacher.courses],
+        "faculty",
+    )
+    return teachers
+
+
+# Lookups by primary key take the objects the session already holds from
+# the identity map and fetch all other ids of one model with one IN query.
+
+
+def _loaded(object: Base, options: tuple) -> bool:
+    """Whether the relationships the loader options read are loaded on
+    object, so that serializing it doesn't lazy load them."""
+    for option in options:
+        for element in option.context:
+            # mapper, relationship, mapper, relationship...
+            objects = [object]
+            for relationship in element.path.path[1::2]:
+                key = relationship.key
+                related = []
+                for parent in objects:
+                    state = inspect(parent)
+                    if key in state.unloaded:
+                        return False
+                    value = state.dict.get(key)
+                    if isinstance(value, list):
+                        related.extend(value)
+                    elif value is not None:
+                        related.append(value)
+                objects = related
+    return True
+
+
+def _from_identity_map(
+    session: Session, model_class: Type[Base], id, options: tuple
+):
+    key = inspect(model_class).identity_key_from_primary_key((id,))
+    object = session.identity_map.get(key)
+    if object is None:
+        return None
+    state = inspect(object)
+    if state.expired or state.deleted or not isinstance(object, model_class):
+        return None
+    if not _loaded(object, options):
+        # the IN query loads the missing relationships
+        return None
+    return object
+
+
+def _batch_query(model_class: Type[Base], ids: Iterable, options: tuple):
+    return select(model_class).where(model_class.id.in_(ids)).options(*options)
+
+
+def load_many(
+    session: Session, model_class: Type[Base], ids: Iterable, options=()
+) -> dict[Any, Base]:
+    """Found objects by id."""
+    objects = {}
+    for id in set(ids):
+        object = _from_identity_map(session, model_class, id, options)
+        if object is not None:
+            objects[id] = object
+    missing = set(ids) - objects.keys()
+    if missing:
+        query = _batch_query(model_class, missing, options)
+        for object in session.scalars(query).unique():
+            objects[object.id] = object
+    return objects
+
+
+async def async_load_many(
+    session: AsyncSession, model_class: Type[Base], ids: Iterable, options=()
+) -> dict[Any, Base]:
+    objects = {}
+    for id in set(ids):
+        object = _from_identity_map(
+            session.sync_session, model_class, id, options
+        )
+        if object is not None:
+            objects[id] = object
+    missing = set(ids) - objects.keys()
+    if missing:
+        result = await session.scalars(
+            _batch_query(model_class, missing, options)
+        )
+        for object in result.unique():
+            objects[object.id] = object
+    return objects
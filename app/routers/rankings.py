@@ -0,0 +1,106 @@
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..models.structure import Department, Faculty, Group
+from ..models.users import UnivercityVisitor
+from ..schemas.education_schemas import RankingSchema
+from ..services.rankings import get_ranking
+from .core import get_object_or_404
+
+router = APIRouter()
+
+LIMIT = Query(10, ge=1, le=100, description="Number of the best students")
+STUDENT_ID = Query(None, description="Student to look up the rank of")
+
+
+def _ranking(
+    db: Session,
+    scope: str,
+    model_class,
+    scope_id: int,
+    limit: int,
+    student_id: int | None,
+) -> dict:
+    get_object_or_404(db, model_class, scope_id)
+    ranking = get_ranking(db, (scope, scope_id), limit, student_id)
+    entries = [*ranking["students"], ranking["student"]]
+    ids = [entry["id"] for entry in entries if entry is not None]
+    names = {
+        row.id: row._asdict()
+        for row in db.execute(
+            select(
+                UnivercityVisitor.id,
+                UnivercityVisitor.name,
+                UnivercityVisitor.middle_name,
+                UnivercityVisitor.last_name,
+            ).where(UnivercityVisitor.id.in_(ids))
+        )
+    }
+    # students deleted by other processes stay ranked until the rebuild
+    named = [
+        (
+            None
+            if entry is None or entry["id"] not in names
+            else names[entry["id"]] | entry
+        )
+        for entry in entries
+    ]
+    return {
+        "total": ranking["total"],
+        "students": [entry for entry in named[:-1] if entry is not None],
+        "student": named[-1],
+    }
+
+
+@router.get(
+    "/groups/{group_id:int}/ranking",
+    status_code=status.HTTP_200_OK,
+    response_model=RankingSchema,
+    description="Get students of the group ranked by average course score",
+)
+def get_group_ranking(
+    group_id: int,
+    limit: int = LIMIT,
+    student_id: int | None = STUDENT_ID,
+    db: Session = Depends(get_db),
+):
+    return _ranking(db, "group", Group, group_id, limit, student_id)
+
+
+@router.get(
+    "/departments/{department_id:int}/ranking",
+    status_code=status.HTTP_200_OK,
+    response_model=RankingSchema,
+    description=(
+        "Get students of the department groups ranked by average "
+        "course score"
+    ),
+)
+def get_department_ranking(
+    department_id: int,
+    limit: int = LIMIT,
+    student_id: int | None = STUDENT_ID,
+    db: Session = Depends(get_db),
+):
+    return _ranking(
+        db, "department", Department, department_id, limit, student_id
+    )
+
+
+@router.get(
+    "/faculties/{faculty_id:int}/ranking",
+    status_code=status.HTTP_200_OK,
+    response_model=RankingSchema,
+    description=(
+        "Get students of the faculty groups ranked by average course score"
+    ),
+)
+def get_faculty_ranking(
+    faculty_id: int,
+    limit: int = LIMIT,
+    student_id: int | None = STUDENT_ID,
+    db: Session = Depends(get_db),
+):
+    return _ranking(db, "faculty", Faculty, faculty_id, limit, student_id)
@@ -0,0 +1,30 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..schemas.users_schemas import VisitorSearchResultSchema
+from ..services.search import search_visitors
+
+router = APIRouter()
+
+MAX_SEARCH_RESULTS = 100
+
+
+@router.get(
+    "/visitors/search",
+    status_code=status.HTTP_200_OK,
+    response_model=list[VisitorSearchResultSchema],
+    description=(
+        "Find students and teachers by prefixes or misspellings of "
+        "their names and passport, best matches first"
+    ),
+)
+def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    kind: Literal["student", "teacher"] | None = Query(None),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS),
+    db: Session = Depends(get_db),
+):
+    return search_visitors(db, q, kind, limit)
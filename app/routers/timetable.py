@@ -0,0 +1,155 @@
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, Query, status, HTTPException
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..models.buildings import Auditory
+from ..models.education import Semester
+from ..models.structure import Group
+from ..models.users import Teacher
+from ..schemas.timetable_schemas import (
+    LessonConflictSchema,
+    TimetableJobSchema,
+    TimetableLessonSchema,
+)
+from ..services import scheduler
+from ..services.conflicts import find_period_conflicts
+from ..services.timetable import get_timetable, week_start
+from .core import get_object_or_404
+
+router = APIRouter()
+
+MAX_TIMETABLE_DAYS = 366
+
+
+def _timetable(
+    db: Session,
+    kind: str,
+    model_class,
+    entity_id: int,
+    date_from: date | None,
+    date_to: date | None,
+):
+    if date_from is None:
+        date_from = week_start(date.today())
+    if date_to is None:
+        date_to = date_from + timedelta(days=6)
+    if not 0 <= (date_to - date_from).days < MAX_TIMETABLE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                "date_to must follow date_from by less than "
+                f"{MAX_TIMETABLE_DAYS} days"
+            ),
+        )
+
+    lessons = get_timetable(db, kind, entity_id, date_from, date_to)
+    if not lessons:
+        get_object_or_404(db, model_class, entity_id)
+    return lessons
+
+
+def _get_dated_semester(db: Session, semester_id: int) -> Semester:
+    semester: Semester = get_object_or_404(db, Semester, semester_id)
+    if semester.start is None or semester.end is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Semester has no start or end date",
+        )
+    return semester
+
+
+DATE_FROM = Query(None, description="First day, Monday of this week if empty")
+DATE_TO = Query(None, description="Last day, 6 days after date_from if empty")
+
+
+@router.get(
+    "/groups/{group_id:int}/timetable",
+    status_code=status.HTTP_200_OK,
+    response_model=list[TimetableLessonSchema],
+    description="Get lessons of the group between the dates",
+)
+def get_group_timetable(
+    group_id: int,
+    date_from: date | None = DATE_FROM,
+    date_to: date | None = DATE_TO,
+    db: Session = Depends(get_db),
+):
+    return _timetable(db, "group", Group, group_id, date_from, date_to)
+
+
+@router.get(
+    "/teachers/{teacher_id:int}/timetable",
+    status_code=status.HTTP_200_OK,
+    response_model=list[TimetableLessonSchema],
+    description="Get lessons of the teacher between the dates",
+)
+def get_teacher_timetable(
+    teacher_id: int,
+    date_from: date | None = DATE_FROM,
+    date_to: date | None = DATE_TO,
+    db: Session = Depends(get_db),
+):
+    return _timetable(db, "teacher", Teacher, teacher_id, date_from, date_to)
+
+
+@router.get(
+    "/auditories/{auditory_id:int}/timetable",
+    status_code=status.HTTP_200_OK,
+    response_model=list[TimetableLessonSchema],
+    description="Get lessons in the auditory between the dates",
+)
+def get_auditory_timetable(
+    auditory_id: int,
+    date_from: date | None = DATE_FROM,
+    date_to: date | None = DATE_TO,
+    db: Session = Depends(get_db),
+):
+    return _timetable(
+        db, "auditory", Auditory, auditory_id, date_from, date_to
+    )
+
+
+@router.get(
+    "/semesters/{semester_id:int}/conflicts",
+    status_code=status.HTTP_200_OK,
+    response_model=list[LessonConflictSchema],
+    description=(
+        "Get teachers and auditories booked for several lessons "
+        "at the same time during the semester"
+    ),
+)
+def get_semester_conflicts(semester_id: int, db: Session = Depends(get_db)):
+    semester = _get_dated_semester(db, semester_id)
+    return find_period_conflicts(db, *scheduler.semester_days(semester))
+
+
+@router.post(
+    "/semesters/{semester_id:int}/timetable-jobs",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=TimetableJobSchema,
+    description=(
+        "Start generating lessons of the semester education plans, "
+        "which replace the planned groups lessons of the semester"
+    ),
+)
+def create_timetable_job(semester_id: int, db: Session = Depends(get_db)):
+    _get_dated_semester(db, semester_id)
+    return scheduler.start_job(db.get_bind(), semester_id)
+
+
+@router.get(
+    "/timetable-jobs/{job_id}",
+    status_code=status.HTTP_200_OK,
+    response_model=TimetableJobSchema,
+    description="Get state of the timetable generation job",
+)
+def get_timetable_job(job_id: str):
+    job = scheduler.get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Timetable job {job_id} is not found",
+        )
+    return job
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, status, HTTPException
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..schemas.education_schemas import TranscriptSchema
+from ..services.transcript import get_transcript
+
+router = APIRouter()
+
+
+@router.get(
+    "/students/{student_id:int}/transcript",
+    status_code=status.HTTP_200_OK,
+    response_model=TranscriptSchema,
+    description=(
+        "Get course and exam grades of the student grouped by semester "
+        "with average scores"
+    ),
+)
+def get_student_transcript(student_id: int, db: Session = Depends(get_db)):
+    transcript = get_transcript(db, student_id)
+    if transcript is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Student with id={student_id} is not found",
+        )
+    return transcript
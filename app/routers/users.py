@@ -1,10 +1,23 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import ORJSONResponse
 from ..models.users import Student, Teacher
 from ..models.education import Course
 from ..models.structure import Group, Department, Faculty
+from ..config import settings
 from ..database import get_db
 from sqlalchemy.orm import Session
+from ..schemas.core import BatchGetSchema
 from ..schemas.users_schemas import (
+    BatchGetStudentsSchema,
+    BatchGetTeachersSchema,
     CreateStudentSchema,
     CreateTeacherSchema,
     GetStudentSchema,
@@ -12,8 +25,43 @@ from ..schemas.users_schemas import (
     PatchStudentSchema,
     PatchTeacherSchema,
     PutTeacherSchema,
+    StudentsPageSchema,
+    TeachersPageSchema,
+)
+from ..services.teacher_courses import (
+    faculty_course_ids,
+    sync_teacher_courses,
+)
+from .core import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    batch_get_response,
+    check_if_match,
+    commit_and_reload,
+    conditional_get,
+    etag,
+    get_object_or_404,
+    get_objects,
+    keyset_page,
+    page_response,
+)
+from .fieldsets import Fieldset, student_fieldset, teacher_fieldset
+from .filters import StudentFilters
+from .loaders import (
+    DEPARTMENT_OPTIONS,
+    STUDENT_OPTIONS,
+    TEACHER_FACULTY_OPTIONS,
+    TEACHER_OPTIONS,
+    fetch_students,
+    fetch_teachers,
+)
+from .rows import (
+    student_dicts,
+    student_select,
+    teacher_courses_select,
+    teacher_dicts,
+    teacher_select,
 )
-from .core import get_object_or_404
 
 router = APIRouter()
 
@@ -43,8 +91,7 @@ def create_student(
     new_student = Student(**student_data.dict())
 
     db.add(new_student)
-    db.commit()
-    return new_student
+    return commit_and_reload(db, new_student, STUDENT_OPTIONS)
 
 
 @router.get(
@@ -53,20 +100,77 @@ def create_student(
     response_model=GetStudentSchema,
     description="Return data of specifed student",
 )
-def get_student(student_id: int, db: Session = Depends(get_db)):
-    student = get_object_or_404(db, Student, student_id)
+def get_student(
+    student_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    not_modified = conditional_get(request, db, Student, student_id)
+    if not_modified is not None:
+        return not_modified
+
+    student = get_object_or_404(db, Student, student_id, STUDENT_OPTIONS)
+    response.headers["ETag"] = etag(student)
     return student
 
 
 @router.get(
     "/students",
     status_code=status.HTTP_200_OK,
-    response_model=list[GetStudentSchema],
-    description="Get list of all students",
+    response_model=StudentsPageSchema,
+    description="Get page of students ordered by id",
 )
-def get_students(db: Session = Depends(get_db)):
-    students = db.query(Student).all()
-    return students
+def get_students(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = Query(None, description="Cursor of the next page"),
+    filters: StudentFilters = Depends(),
+    fieldset: Fieldset = Depends(student_fieldset),
+    db: Session = Depends(get_db),
+):
+    if settings.FAST_SERIALIZATION or not fieldset.full:
+        students = student_dicts(
+            db.execute(
+                keyset_page(
+                    filters.apply(student_select(fieldset)),
+                    Student.id,
+                    limit,
+                    after,
+                )
+            ),
+            fieldset,
+        )
+        return ORJSONResponse(page_response(request, students, limit))
+
+    students = fetch_students(
+        keyset_page(filters.apply(db.query(Student)), Student.id, limit, after)
+    )
+    return page_response(request, students, limit)
+
+
+@router.post(
+    "/students:batchGet",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchGetStudentsSchema,
+    description="Get students with the given ids by one query",
+)
+def batch_get_students(
+    batch: BatchGetSchema,
+    fieldset: Fieldset = Depends(student_fieldset),
+    db: Session = Depends(get_db),
+):
+    if settings.FAST_SERIALIZATION or not fieldset.full:
+        rows = db.execute(
+            student_select(fieldset).where(Student.id.in_(batch.ids))
+        )
+        students = {
+            student["id"]: student for student in student_dicts(rows, fieldset)
+        }
+        return ORJSONResponse(batch_get_response(batch.ids, students))
+
+    students = get_objects(db, Student, batch.ids, STUDENT_OPTIONS)
+    return batch_get_response(batch.ids, students)
 
 
 @router.patch(
@@ -78,14 +182,19 @@ def get_students(db: Session = Depends(get_db)):
 def patch_student(
     student_id: int,
     student_data: PatchStudentSchema,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
 ):
     student: Student = get_object_or_404(db, Student, student_id)
+    check_if_match(request, student)
 
     for key, value in student_data:
         if hasattr(student, key) and value:
             setattr(student, key, value)
-    db.commit()
+
+    student = commit_and_reload(db, student, STUDENT_OPTIONS)
+    response.headers["ETag"] = etag(student)
     return student
 
 
@@ -98,15 +207,19 @@ def patch_student(
 def put_student(
     student_id: int,
     student_data: PatchStudentSchema,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
 ):
     student: Student = get_object_or_404(db, Student, student_id)
+    check_if_match(request, student)
 
     for key, value in student_data:
         if hasattr(student, key) and value:
             setattr(student, key, value)
 
-    db.commit()
+    student = commit_and_reload(db, student, STUDENT_OPTIONS)
+    response.headers["ETag"] = etag(student)
     return student
 
 
@@ -115,8 +228,11 @@ def put_student(
     status_code=status.HTTP_204_NO_CONTENT,
     description="Delete the specifed student",
 )
-def delete_student(student_id: int, db: Session = Depends(get_db)):
+def delete_student(
+    student_id: int, request: Request, db: Session = Depends(get_db)
+):
     student: Student = get_object_or_404(db, Student, student_id)
+    check_if_match(request, student)
 
     db.delete(student)
     db.commit()
@@ -147,9 +263,8 @@ def create_teacher(
 
     if courses_ids is not None:
         teacher_faculty: Faculty = get_object_or_404(
-            db, Department, teacher_data.department_id
+            db, Department, teacher_data.department_id, DEPARTMENT_OPTIONS
         ).faculty
-        print(teacher_faculty.name)
         courses = (
             db.query(Course)
             .filter(Course.id.in_(courses_ids))
@@ -170,8 +285,7 @@ def create_teacher(
     new_teacher = Teacher(**teacher_dict)
 
     db.add(new_teacher)
-    db.commit()
-    return new_teacher
+    return commit_and_reload(db, new_teacher, TEACHER_OPTIONS)
 
 
 @router.get(
@@ -180,20 +294,81 @@ def create_teacher(
     response_model=GetTeacherSchema,
     description="Return data of specifed teacher",
 )
-def get_teacher(teacher_id: int, db: Session = Depends(get_db)):
-    teacher: Teacher = get_object_or_404(db, Teacher, teacher_id)
+def get_teacher(
+    teacher_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    not_modified = conditional_get(request, db, Teacher, teacher_id)
+    if not_modified is not None:
+        return not_modified
+
+    teacher: Teacher = get_object_or_404(
+        db, Teacher, teacher_id, TEACHER_OPTIONS
+    )
+    response.headers["ETag"] = etag(teacher)
     return teacher
 
 
+def _teacher_dicts(db: Session, rows: list, fieldset: Fieldset) -> list:
+    courses = ()
+    if "courses" in fieldset.fields:
+        courses = db.execute(
+            teacher_courses_select([row.id for row in rows], fieldset)
+        )
+    return teacher_dicts(rows, courses, fieldset)
+
+
 @router.get(
     "/teachers",
     status_code=status.HTTP_200_OK,
-    response_model=list[GetTeacherSchema],
-    description="Get list of all teachers",
+    response_model=TeachersPageSchema,
+    description="Get page of teachers ordered by id",
+)
+def get_teachers(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = Query(None, description="Cursor of the next page"),
+    fieldset: Fieldset = Depends(teacher_fieldset),
+    db: Session = Depends(get_db),
+):
+    if settings.FAST_SERIALIZATION or not fieldset.full:
+        rows = db.execute(
+            keyset_page(teacher_select(fieldset), Teacher.id, limit, after)
+        ).all()
+        teachers = _teacher_dicts(db, rows, fieldset)
+        return ORJSONResponse(page_response(request, teachers, limit))
+
+    teachers = fetch_teachers(
+        keyset_page(db.query(Teacher), Teacher.id, limit, after)
+    )
+    return page_response(request, teachers, limit)
+
+
+@router.post(
+    "/teachers:batchGet",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchGetTeachersSchema,
+    description="Get teachers with the given ids by one query",
 )
-def get_teachers(db: Session = Depends(get_db)):
-    teachers = db.query(Teacher).all()
-    return teachers
+def batch_get_teachers(
+    batch: BatchGetSchema,
+    fieldset: Fieldset = Depends(teacher_fieldset),
+    db: Session = Depends(get_db),
+):
+    if settings.FAST_SERIALIZATION or not fieldset.full:
+        rows = db.execute(
+            teacher_select(fieldset).where(Teacher.id.in_(batch.ids))
+        ).all()
+        teachers = {
+            teacher["id"]: teacher
+            for teacher in _teacher_dicts(db, rows, fieldset)
+        }
+        return ORJSONResponse(batch_get_response(batch.ids, teachers))
+
+    teachers = get_objects(db, Teacher, batch.ids, TEACHER_OPTIONS)
+    return batch_get_response(batch.ids, teachers)
 
 
 @router.patch(
@@ -205,15 +380,20 @@ def get_teachers(db: Session = Depends(get_db)):
 def patch_teacher(
     teacher_id: int,
     teacher_data: PatchTeacherSchema,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
 ):
-    teacher: Teacher = get_object_or_404(db, Teacher, teacher_id)
+    teacher: Teacher = get_object_or_404(
+        db, Teacher, teacher_id, TEACHER_FACULTY_OPTIONS
+    )
+    check_if_match(request, teacher)
 
     new_teacher_faculty: Faculty = (
         teacher.department.faculty
         if teacher_data.department_id is None
         else get_object_or_404(
-            db, Department, teacher_data.department_id
+            db, Department, teacher_data.department_id, DEPARTMENT_OPTIONS
         ).faculty
     )
 
@@ -221,20 +401,9 @@ def patch_teacher(
 
     courses = teacher_data_dict.pop("courses")
 
-    if (
-        new_teacher_faculty != teacher.department.faculty
-        or courses is not None
-    ):
-        teacher.courses.clear()
-
     if courses is not None:
-        new_courses = (
-            db.query(Course)
-            .filter(Course.id.in_(teacher_data.courses))
-            .filter(Course.faculty == new_teacher_faculty)
-            .all()
-        )
-        if len(new_courses) != len(courses):
+        found = faculty_course_ids(db, courses, new_teacher_faculty.id)
+        if found != set(courses):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=(
@@ -243,13 +412,16 @@ def patch_teacher(
                 ),
             )
 
-        teacher.courses = new_courses
+        sync_teacher_courses(db, teacher, courses)
+    elif new_teacher_faculty != teacher.department.faculty:
+        sync_teacher_courses(db, teacher, ())
 
     for key, value in teacher_data_dict.items():
         if hasattr(teacher, key) and value:
             setattr(teacher, key, value)
 
-    db.commit()
+    teacher = commit_and_reload(db, teacher, TEACHER_OPTIONS)
+    response.headers["ETag"] = etag(teacher)
     return teacher
 
 
@@ -262,25 +434,25 @@ def patch_teacher(
 def put_teacher(
     teacher_id: int,
     teacher_data: PutTeacherSchema,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
 ):
-    teacher: Teacher = get_object_or_404(db, Teacher, teacher_id)
+    teacher: Teacher = get_object_or_404(
+        db, Teacher, teacher_id, TEACHER_FACULTY_OPTIONS
+    )
+    check_if_match(request, teacher)
 
     new_teacher_faculty = get_object_or_404(
-        db, Department, teacher_data.department_id
+        db, Department, teacher_data.department_id, DEPARTMENT_OPTIONS
     ).faculty
 
     teacher_data_dict = teacher_data.dict()
-    courses = teacher_data_dict.pop("courses")
-    teacher.courses.clear()
+    # PUT replaces the courses, none if they are missing
+    courses = teacher_data_dict.pop("courses") or []
 
-    new_courses = (
-        db.query(Course)
-        .filter(Course.id.in_(teacher_data.courses))
-        .filter(Course.faculty == new_teacher_faculty)
-        .all()
-    )
-    if len(new_courses) != len(courses):
+    found = faculty_course_ids(db, courses, new_teacher_faculty.id)
+    if found != set(courses):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=(
@@ -289,11 +461,12 @@ def put_teacher(
             ),
         )
 
-    teacher.courses = new_courses
+    sync_teacher_courses(db, teacher, courses)
 
     for key, value in teacher_data_dict.items():
         if hasattr(teacher, key) and value:
             setattr(teacher, key, value)
 
-    db.commit()
+    teacher = commit_and_reload(db, teacher, TEACHER_OPTIONS)
+    response.headers["ETag"] = etag(teacher)
     return teacher
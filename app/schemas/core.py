@@ -1,5 +1,10 @@
 import inspect
-from pydantic import BaseModel
+from typing import List
+
+from pydantic import BaseModel, Field
+
+# most ids one batchGet request can look up
+BATCH_GET_MAX_IDS = 500
 
 
 def optional(*fields):
@@ -25,3 +30,9 @@ def optional(*fields):
         return dec(cls)
 
     return dec
+
+
+class BatchGetSchema(BaseModel):
+    ids: List[int] = Field(
+        description="Ids of the objects", max_items=BATCH_GET_MAX_IDS
+    )
@@ -1,4 +1,8 @@
+from datetime import datetime
+from typing import Optional
+
 from pydantic import BaseModel, Field
+from .core import BATCH_GET_MAX_IDS
 from .structure_schemas import FacultySchema
 
 
@@ -16,3 +20,92 @@ class GetCourseSchema(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class BatchGetCoursesSchema(BaseModel):
+    items: list[Optional[GetCourseSchema]] = Field(
+        description="Courses in the order of the ids, empty if not found"
+    )
+
+
+class BulkAssignTeachersSchema(BaseModel):
+    teacher_ids: list[int] = Field(
+        description="Ids of the teachers",
+        min_items=1,
+        max_items=BATCH_GET_MAX_IDS,
+    )
+
+
+class TeacherAssignmentSchema(BaseModel):
+    assigned: list[int] = Field(description="Ids of the newly assigned")
+    already_assigned: list[int] = Field(
+        description="Ids of the teachers who were assigned before"
+    )
+
+
+class CourseGradeStatsSchema(BaseModel):
+    course_id: int = Field(description="Course id")
+    count: int = Field(description="Number of grades")
+    mean: Optional[float] = Field(description="Average score")
+    distribution: dict[int, int] = Field(
+        description="Number of grades with every score"
+    )
+
+
+class TranscriptCourseSchema(BaseModel):
+    id: int
+    name: Optional[str]
+
+
+class TranscriptCourseGradeSchema(BaseModel):
+    id: int = Field(description="Course grade id")
+    course: Optional[TranscriptCourseSchema]
+    score: Optional[int]
+
+
+class TranscriptExamGradeSchema(BaseModel):
+    id: int = Field(description="Exam grade id")
+    exam_id: int
+    date: Optional[datetime] = Field(description="Start of the exam")
+    course: Optional[TranscriptCourseSchema]
+    score: Optional[int]
+
+
+class TranscriptSemesterSchema(BaseModel):
+    id: Optional[int] = Field(
+        description="Semester id, empty for grades out of any semester"
+    )
+    number: Optional[int]
+    start: Optional[datetime]
+    end: Optional[datetime]
+    course_grades: list[TranscriptCourseGradeSchema]
+    exam_grades: list[TranscriptExamGradeSchema]
+    course_average: Optional[float] = Field(description="Average course score")
+    exam_average: Optional[float] = Field(description="Average exam score")
+    average: Optional[float] = Field(description="Average of all scores")
+
+
+class TranscriptSchema(BaseModel):
+    student_id: int
+    semesters: list[TranscriptSemesterSchema]
+    average: Optional[float] = Field(description="Average of all scores")
+
+
+class RankedStudentSchema(BaseModel):
+    rank: int = Field(description="Students with equal averages share rank")
+    id: int = Field(description="Student id")
+    name: str
+    middle_name: str
+    last_name: str
+    average: float = Field(description="Average course score")
+    count: int = Field(description="Number of course scores")
+
+
+class RankingSchema(BaseModel):
+    total: int = Field(description="Number of ranked students")
+    students: list[RankedStudentSchema] = Field(
+        description="Best students in the order of rank"
+    )
+    student: Optional[RankedStudentSchema] = Field(
+        description="The requested student, empty if not ranked here"
+    )
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+
+
+class PoolStatusSchema(BaseModel):
+    size: int = Field(description="Configured number of pooled connections")
+    checked_out: int = Field(description="Connections currently in use")
+    idle: int = Field(description="Connections waiting in the pool")
+    overflow: int = Field(description="Connections opened above pool size")
+
+
+class CacheStatsSchema(BaseModel):
+    enabled: bool
+    size: int = Field(description="Number of cached entries")
+    maxsize: int = Field(description="Maximum number of cached entries")
+    hits: int
+    misses: int
+    evictions: int = Field(description="Entries dropped as expired or LRU")
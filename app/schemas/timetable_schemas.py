@@ -0,0 +1,70 @@
+from datetime import date, datetime, time
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class TimetableTimeSlotSchema(BaseModel):
+    id: int
+    name: Optional[str]
+    start: Optional[time]
+    end: Optional[time]
+
+
+class TimetableCourseSchema(BaseModel):
+    id: int
+    name: str
+
+
+class TimetableTeacherSchema(BaseModel):
+    id: int
+    name: str
+    middle_name: str
+    last_name: str
+
+
+class TimetableAuditorySchema(BaseModel):
+    id: int
+    room_number: Optional[str]
+    building_id: Optional[int]
+
+
+class TimetableGroupSchema(BaseModel):
+    id: int
+    name: str
+
+
+class TimetableLessonSchema(BaseModel):
+    id: int = Field(description="Lesson id")
+    date: date
+    timeslot: Optional[TimetableTimeSlotSchema]
+    course: Optional[TimetableCourseSchema]
+    teacher: Optional[TimetableTeacherSchema]
+    auditory: Optional[TimetableAuditorySchema]
+    group: TimetableGroupSchema
+
+
+class LessonConflictSchema(BaseModel):
+    kind: str = Field(description="teacher or auditory")
+    entity_id: int = Field(description="Id of the double-booked entity")
+    date: date
+    timeslot_id: int
+    lesson_ids: list[int] = Field(description="Clashing lessons")
+
+
+class UnplacedLessonsSchema(BaseModel):
+    group_id: int
+    course_id: int
+    weekly_lessons: int = Field(description="Lessons a week not placed")
+
+
+class TimetableJobSchema(BaseModel):
+    id: str
+    semester_id: int
+    status: str = Field(description="queued, solving, writing, done or failed")
+    created: datetime
+    finished: Optional[datetime]
+    lessons: Optional[int] = Field(description="Number of created lessons")
+    unplaced: list[UnplacedLessonsSchema]
+    conflicts: list[LessonConflictSchema]
+    detail: Optional[str]
@@ -1,6 +1,6 @@
 from datetime import date
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Literal, Optional, List
 from .education_schemas import GetCourseSchema
 from .core import optional
 
@@ -38,6 +38,44 @@ class GetStudentSchema(VisitorBaseSchema):
         orm_mode = True
 
 
+class BatchGetStudentsSchema(BaseModel):
+    items: List[Optional[GetStudentSchema]] = Field(
+        description="Students in the order of the ids, empty if not found"
+    )
+
+
+class StudentsPageSchema(BaseModel):
+    items: List[GetStudentSchema]
+    next: Optional[str] = Field(None, description="Link to the next page")
+
+
+class VisitorSearchResultSchema(BaseModel):
+    id: int = Field(description="Student or teacher id")
+    kind: Literal["student", "teacher"]
+    name: str
+    middle_name: str
+    last_name: str
+    passport_id: str
+
+
+class BulkRowResultSchema(BaseModel):
+    row: int = Field(description="Number of the row in the request, from 0")
+    id: Optional[int] = Field(None, description="Id of the created object")
+    detail: Optional[str] = Field(None, description="Why row was rejected")
+
+
+class BulkImportReportSchema(BaseModel):
+    created: int = Field(description="Number of created objects")
+    rejected: int = Field(description="Number of rejected rows")
+    results: List[BulkRowResultSchema]
+
+
+class BulkUpsertReportSchema(BaseModel):
+    upserted: int = Field(description="Number of created or updated rows")
+    rejected: int = Field(description="Number of rejected rows")
+    results: List[BulkRowResultSchema]
+
+
 class CreateTeacherSchema(VisitorBaseSchema):
     courses: Optional[List[int]] = Field(None, description="Teachers courses")
     department_id: int = Field(description="Teacher department id")
@@ -67,17 +105,42 @@ class GetTeacherSchema(GetVisitorSchema):
     department: DepartmentSchema
 
 
+class BatchGetTeachersSchema(BaseModel):
+    items: List[Optional[GetTeacherSchema]] = Field(
+        description="Teachers in the order of the ids, empty if not found"
+    )
+
+
+class TeachersPageSchema(BaseModel):
+    items: List[GetTeacherSchema]
+    next: Optional[str] = Field(None, description="Link to the next page")
+
+
+# same limits as the score_limit check constraint of course_grades
+MIN_SCORE = 0
+MAX_SCORE = 5
+
+
 class CreateStudentCourseGradeSchema(BaseModel):
     course_id: int
-    score: int
+    score: int = Field(ge=MIN_SCORE, le=MAX_SCORE)
     student_id: int
 
     class Config:
         orm_mode = True
 
 
-class PutStudentCourseGradeSchema(BaseModel):
+class BulkStudentCourseGradeSchema(BaseModel):
+    """Row of the bulk grade upsert. Scores out of the limits are reported
+    as rejected rows instead of failing the whole request."""
+
+    course_id: int
     score: int
+    student_id: int
+
+
+class PutStudentCourseGradeSchema(BaseModel):
+    score: int = Field(ge=MIN_SCORE, le=MAX_SCORE)
 
     class Config:
         orm_mode = True
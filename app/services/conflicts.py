@@ -0,0 +1,136 @@
+from collections import defaultdict
+from datetime import date
+from itertools import chain
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import event, inspect, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.education import Lesson, Schedule
+
+
+class LessonSlot(NamedTuple):
+    lesson_id: int
+    date: date
+    timeslot_id: int
+    teacher_id: int | None
+    auditory_id: int | None
+
+
+class LessonConflictError(Exception):
+    def __init__(self, conflicts: list[dict]):
+        self.conflicts = conflicts
+        super().__init__(f"{len(conflicts)} timetable conflicts")
+
+
+def _slots_query():
+    return select(
+        Lesson.id,
+        Schedule.date,
+        Lesson.timeslot_id,
+        Lesson.teacher_id,
+        Lesson.auditory_id,
+    ).join(Schedule, Schedule.id == Lesson.schedule_id)
+
+
+def find_conflicts(slots: Iterable[LessonSlot]) -> list[dict]:
+    """Teachers and auditories booked by more than one lesson at the same
+    date and timeslot, found in one pass over the lessons."""
+    bookings = defaultdict(list)
+    for slot in slots:
+        if slot.timeslot_id is None:
+            continue
+        if slot.teacher_id is not None:
+            key = ("teacher", slot.teacher_id, slot.date, slot.timeslot_id)
+            bookings[key].append(slot.lesson_id)
+        if slot.auditory_id is not None:
+            key = ("auditory", slot.auditory_id, slot.date, slot.timeslot_id)
+            bookings[key].append(slot.lesson_id)
+
+    clashes = [
+        (key, lesson_ids)
+        for key, lesson_ids in bookings.items()
+        if len(lesson_ids) > 1
+    ]
+    # ordered by date and timeslot
+    clashes.sort(key=lambda clash: clash[0][2:] + clash[0][:2])
+    return [
+        {
+            "kind": kind,
+            "entity_id": entity_id,
+            "date": day,
+            "timeslot_id": timeslot_id,
+            "lesson_ids": sorted(lesson_ids),
+        }
+        for (kind, entity_id, day, timeslot_id), lesson_ids in clashes
+    ]
+
+
+def find_period_conflicts(
+    session: Session, date_from: date, date_to: date
+) -> list[dict]:
+    slots = session.execute(
+        _slots_query().where(Schedule.date.between(date_from, date_to))
+    )
+    return find_conflicts(LessonSlot(*row) for row in slots)
+
+
+def check_lesson_conflicts(session: Session, lesson_ids: set[int]):
+    """Raises LessonConflictError if any of the lessons shares a timeslot
+    with another lesson of the same teacher or in the same auditory."""
+    written = session.connection().execute(
+        _slots_query().where(Lesson.id.in_(lesson_ids))
+    )
+    written = [LessonSlot(*row) for row in written]
+    slots = {(slot.date, slot.timeslot_id) for slot in written}
+    teacher_ids = {slot.teacher_id for slot in written} - {None}
+    auditory_ids = {slot.auditory_id for slot in written} - {None}
+    if not slots:
+        return
+
+    neighbours = session.connection().execute(
+        _slots_query()
+        .where(tuple_(Schedule.date, Lesson.timeslot_id).in_(slots))
+        .where(
+            or_(
+                Lesson.teacher_id.in_(teacher_ids),
+                Lesson.auditory_id.in_(auditory_ids),
+            )
+        )
+    )
+    conflicts = [
+        conflict
+        for conflict in find_conflicts(LessonSlot(*row) for row in neighbours)
+        if lesson_ids.intersection(conflict["lesson_ids"])
+    ]
+    if conflicts:
+        raise LessonConflictError(conflicts)
+
+
+@event.listens_for(Session, "after_flush")
+def _check_written_lessons(session, flush_context):
+    if not settings.LESSON_CONFLICT_CHECK:
+        return
+    lesson_ids = {
+        object.id
+        for object in chain(session.new, session.dirty)
+        if isinstance(object, Lesson)
+    }
+    # lessons of a schedule moved to another date move with it
+    moved_schedule_ids = {
+        object.id
+        for object in session.dirty
+        if isinstance(object, Schedule)
+        and inspect(object).attrs.date.history.has_changes()
+    }
+    if moved_schedule_ids:
+        lesson_ids.update(
+            session.connection().scalars(
+                select(Lesson.id).where(
+                    Lesson.schedule_id.in_(moved_schedule_ids)
+                )
+            )
+        )
+    if lesson_ids:
+        check_lesson_conflicts(session, lesson_ids)
@@ -0,0 +1,141 @@
+from collections import defaultdict
+from typing import Iterable
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..database import upsert_insert
+from ..models.education import (
+    CourseGrade,
+    CourseGradeStats,
+    StudentGradeStats,
+)
+from .rankings import invalidate_rankings
+
+SCORES = range(0, 6)
+
+# (course_id, student_id, old score or None, new score or None) of a
+# written grade
+GradeChange = tuple[int, int, int | None, int | None]
+
+
+def _add_delta(delta: dict, old_score: int | None, new_score: int | None):
+    if old_score is not None:
+        delta["count"] -= 1
+        delta["total"] -= old_score
+        delta[f"score_{old_score}"] -= 1
+    if new_score is not None:
+        delta["count"] += 1
+        delta["total"] += new_score
+        delta[f"score_{new_score}"] += 1
+
+
+def apply_grade_changes(session: Session, changes: Iterable[GradeChange]):
+    """Adds deltas of the written grades to course_grade_stats and
+    student_grade_stats within the session transaction."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    student_deltas = defaultdict(lambda: defaultdict(int))
+    for course_id, student_id, old_score, new_score in changes:
+        if old_score == new_score:
+            continue
+        if course_id is not None:
+            _add_delta(deltas[course_id], old_score, new_score)
+        if student_id is not None:
+            _add_delta(student_deltas[student_id], old_score, new_score)
+
+    if student_deltas:
+        _apply_student_deltas(session, student_deltas)
+    if not deltas:
+        return
+
+    columns = ["count", "total"] + [f"score_{score}" for score in SCORES]
+    statement = upsert_insert(session, CourseGradeStats).values(
+        [
+            {"course_id": course_id}
+            | {column: delta[column] for column in columns}
+            for course_id, delta in deltas.items()
+        ]
+    )
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[CourseGradeStats.course_id],
+            set_={
+                column: getattr(CourseGradeStats, column)
+                + getattr(statement.excluded, column)
+                for column in columns
+            },
+        )
+    )
+
+
+def _apply_student_deltas(session: Session, deltas: dict):
+    statement = upsert_insert(session, StudentGradeStats).values(
+        [
+            {
+                "student_id": student_id,
+                "count": delta["count"],
+                "total": delta["total"],
+            }
+            for student_id, delta in deltas.items()
+        ]
+    )
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[StudentGradeStats.student_id],
+            set_={
+                "count": StudentGradeStats.count + statement.excluded.count,
+                "total": StudentGradeStats.total + statement.excluded.total,
+            },
+        )
+    )
+    invalidate_rankings(session, deltas)
+
+
+def rebuild_grade_stats(session: Session):
+    """Recomputes course_grade_stats and student_grade_stats from
+    course_grades."""
+    session.execute(delete(CourseGradeStats))
+    session.execute(
+        insert(CourseGradeStats).from_select(
+            ["course_id", "count", "total"]
+            + [f"score_{score}" for score in SCORES],
+            select(
+                CourseGrade.course_id,
+                func.count(CourseGrade.score),
+                func.coalesce(func.sum(CourseGrade.score), 0),
+                *(
+                    func.count(case((CourseGrade.score == score, 1)))
+                    for score in SCORES
+                ),
+            )
+            .where(CourseGrade.course_id.is_not(None))
+            .group_by(CourseGrade.course_id),
+        )
+    )
+    session.execute(delete(StudentGradeStats))
+    session.execute(
+        insert(StudentGradeStats).from_select(
+            ["student_id", "count", "total"],
+            select(
+                CourseGrade.student_id,
+                func.count(CourseGrade.score),
+                func.coalesce(func.sum(CourseGrade.score), 0),
+            )
+            .where(CourseGrade.student_id.is_not(None))
+            .group_by(CourseGrade.student_id),
+        )
+    )
+    invalidate_rankings(session)
+
+
+def summarize(course_id: int, stats: CourseGradeStats | None) -> dict:
+    count = stats.count if stats else 0
+    return {
+        "course_id": course_id,
+        "count": count,
+        "mean": stats.total / count if count else None,
+        "distribution": {
+            score: getattr(stats, f"score_{score}") if stats else 0
+            for score in SCORES
+        },
+    }
@@ -0,0 +1,293 @@
+"""Rankings of students by average course score within their group,
+department and faculty.
+
+student_grade_stats holds the number and total of the course scores of
+every student and is updated by every grade write. RankingIndex keeps the
+averages of the students of every group, department and faculty in
+descending order together with their ids, so the top of a ranking is a
+slice and the rank of a student is a binary search. The index is built on
+the first read, refreshed for the students whose grades or groups were
+changed by this process and rebuilt every RANKING_REBUILD_INTERVAL
+seconds to pick up writes of other processes. Rebuilds don't hold up the
+reads, which are served from the previous rankings until the new ones
+are swapped in.
+"""
+
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from itertools import chain
+from threading import Lock
+from typing import Iterable, Iterator
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.education import StudentGradeStats
+from ..models.structure import Department, Group
+from ..models.users import Student
+
+SCOPES = ("group", "department", "faculty")
+
+# (scope, id of the group, department or faculty)
+ScopeKey = tuple[str, int]
+
+# ids are looked up by chunks when the index is refreshed
+REFRESH_CHUNK_SIZE = 1000
+
+
+def _ranking_query():
+    students = Student.__table__
+    return (
+        select(
+            StudentGradeStats.student_id,
+            StudentGradeStats.count,
+            StudentGradeStats.total,
+            students.c.group_id,
+            Group.department_id,
+            Department.faculty_id,
+        )
+        .join(students, students.c.id == StudentGradeStats.student_id)
+        .outerjoin(Group, Group.id == students.c.group_id)
+        .outerjoin(Department, Department.id == Group.department_id)
+        .where(StudentGradeStats.count > 0)
+    )
+
+
+class RankingIndex:
+    """(negated average, id) of the students of every scope in ascending
+    order. Students with equal averages are ordered by id and share the
+    rank."""
+
+    def __init__(self):
+        self.lock = Lock()
+        # held by the thread building the rankings, which is done outside
+        # lock so that reads go on with the current rankings meanwhile
+        self.build_lock = Lock()
+        self.building = False
+        self.stale = True
+        self.built_at = 0.0
+        # students whose rows changed since the index was built
+        self.pending: set[int] = set()
+        self._rankings: dict[ScopeKey, list[tuple[float, int]]] = {}
+        # student id: (negated average, count, group, department and
+        # faculty ids)
+        self._students: dict[int, tuple] = {}
+
+    @staticmethod
+    def _student(row) -> tuple:
+        return (
+            -row.total / row.count,
+            row.count,
+            row.group_id,
+            row.department_id,
+            row.faculty_id,
+        )
+
+    @staticmethod
+    def _scopes(student: tuple) -> Iterator[ScopeKey]:
+        for scope, id in zip(SCOPES, student[2:]):
+            if id is not None:
+                yield scope, id
+
+    @property
+    def built(self) -> bool:
+        return self.built_at > 0
+
+    def needs_build(self) -> bool:
+        age = time.monotonic() - self.built_at
+        return self.stale or age > settings.RANKING_REBUILD_INTERVAL
+
+    @classmethod
+    def read(cls, session: Session) -> tuple[dict, dict]:
+        """Rankings and students of every ranked student."""
+        rankings = defaultdict(list)
+        students = {}
+        rows = session.execute(
+            _ranking_query().execution_options(yield_per=10000)
+        )
+        for row in rows:
+            student = cls._student(row)
+            students[row.student_id] = student
+            for scope in cls._scopes(student):
+                rankings[scope].append((student[0], row.student_id))
+        for entries in rankings.values():
+            entries.sort()
+        return dict(rankings), students
+
+    def build(self, session: Session, wait: bool = True):
+        """Reads the rankings without holding lock and swaps them in. The
+        students changed meanwhile stay pending. Without wait, returns at
+        once if another thread is building them."""
+        if not self.build_lock.acquire(blocking=wait):
+            return
+        try:
+            with self.lock:
+                # another thread could have built them while this waited
+                if not self.needs_build():
+                    return
+                self.building = True
+                self.stale = False
+                self.pending.clear()
+            try:
+                rankings, students = self.read(session)
+            except BaseException:
+                with self.lock:
+                    self.building = False
+                    self.stale = True
+                raise
+            with self.lock:
+                self._rankings, self._students = rankings, students
+                self.built_at = time.monotonic()
+                self.building = False
+        finally:
+            self.build_lock.release()
+
+    def refresh(self, session: Session):
+        """Re-reads the rows of the pending students."""
+        ids = sorted(self.pending)
+        self.pending.clear()
+        for id in ids:
+            self.remove(id)
+        for start in range(0, len(ids), REFRESH_CHUNK_SIZE):
+            chunk = ids[start : start + REFRESH_CHUNK_SIZE]
+            for row in session.execute(
+                _ranking_query().where(StudentGradeStats.student_id.in_(chunk))
+            ):
+                self.add(row.student_id, self._student(row))
+
+    def add(self, id: int, student: tuple):
+        self._students[id] = student
+        for scope in self._scopes(student):
+            insort(self._rankings.setdefault(scope, []), (student[0], id))
+
+    def remove(self, id: int):
+        student = self._students.pop(id, None)
+        if student is None:
+            return
+        for scope in self._scopes(student):
+            entries = self._rankings[scope]
+            position = bisect_left(entries, (student[0], id))
+            if position < len(entries) and entries[position][1] == id:
+                del entries[position]
+            if not entries:
+                del self._rankings[scope]
+
+    def size(self, scope: ScopeKey) -> int:
+        return len(self._rankings.get(scope, ()))
+
+    def top(self, scope: ScopeKey, limit: int) -> list[dict]:
+        entries = self._rankings.get(scope, ())
+        results = []
+        rank = 0
+        for position, (key, id) in enumerate(entries[:limit]):
+            if position == 0 or key != entries[position - 1][0]:
+                rank = position + 1
+            results.append(self._entry(rank, id))
+        return results
+
+    def rank(self, scope: ScopeKey, id: int) -> dict | None:
+        """Rank of the student within the scope, None if the student isn't
+        ranked there."""
+        student = self._students.get(id)
+        if student is None or scope not in self._scopes(student):
+            return None
+        entries = self._rankings[scope]
+        return self._entry(bisect_left(entries, (student[0],)) + 1, id)
+
+    def _entry(self, rank: int, id: int) -> dict:
+        key, count = self._students[id][:2]
+        return {"rank": rank, "id": id, "average": -key, "count": count}
+
+
+_indexes: dict[str, RankingIndex] = {}
+_indexes_lock = Lock()
+
+
+def _index_key(session: Session) -> str:
+    # sync and async engines of the same database share the index
+    url = session.get_bind().url
+    return str(url.set(drivername=url.get_backend_name()))
+
+
+def get_ranking(
+    session: Session,
+    scope: ScopeKey,
+    limit: int,
+    student_id: int | None = None,
+) -> dict:
+    """Number of ranked students of the scope, the best limit of them and
+    the rank of the student_id student."""
+    with _indexes_lock:
+        index = _indexes.setdefault(_index_key(session), RankingIndex())
+    with index.lock:
+        needs_build = index.needs_build()
+        built = index.built
+    if needs_build:
+        # the current rankings are served while another thread builds
+        # new ones, unless there are none yet
+        index.build(session, wait=not built)
+    with index.lock:
+        if index.pending and not index.building:
+            index.refresh(session)
+        return {
+            "total": index.size(scope),
+            "students": index.top(scope, limit),
+            "student": (
+                None if student_id is None else index.rank(scope, student_id)
+            ),
+        }
+
+
+def invalidate_rankings(session: Session, student_ids: Iterable[int] = None):
+    """Refreshes the ranks of the students (or rebuilds all rankings) once
+    the session commits."""
+    if student_ids is None:
+        session.info["rankings_stale"] = True
+    else:
+        session.info.setdefault("ranking_changes", set()).update(student_ids)
+
+
+def _changed(object, name: str) -> bool:
+    return inspect(object).attrs[name].history.has_changes()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_ranking_changes(session, flush_context):
+    student_ids = set()
+    for object in chain(session.dirty, session.deleted):
+        deleted = object in session.deleted
+        if isinstance(object, Student):
+            if deleted or _changed(object, "group_id"):
+                student_ids.add(inspect(object).identity[0])
+        elif isinstance(object, Group):
+            if deleted or _changed(object, "department_id"):
+                invalidate_rankings(session)
+        elif isinstance(object, Department):
+            if deleted or _changed(object, "faculty_id"):
+                invalidate_rankings(session)
+    if student_ids:
+        invalidate_rankings(session, student_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_ranking_changes(session):
+    changes = session.info.pop("ranking_changes", ())
+    stale = session.info.pop("rankings_stale", False)
+    if not changes and not stale:
+        return
+    index = _indexes.get(_index_key(session))
+    if index is None:
+        return
+    with index.lock:
+        if stale:
+            index.stale = True
+        else:
+            index.pending.update(changes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_ranking_changes(session, previous_transaction):
+    session.info.pop("ranking_changes", None)
+    session.info.pop("rankings_stale", None)
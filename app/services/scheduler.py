@@ -0,0 +1,509 @@
+"""Semester timetable generator.
+
+The solver builds one weekly timetable from the education plans of the
+semester and the timetable repeats it on every week of the semester.
+Every plan course of a group gets its weekly number of lessons, taught by
+one of the teachers of the course, so that no group, teacher or auditory
+has two lessons at the same time.
+"""
+
+import math
+import multiprocessing
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from threading import Lock
+from typing import NamedTuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.buildings import Auditory
+from ..models.education import (
+    CourseProgramm,
+    CourseProgrammTheme,
+    EducationPlan,
+    Lesson,
+    Schedule,
+    Semester,
+    TimeSlot,
+    plans_courses,
+)
+from ..models.users import teacher_course
+from .conflicts import LessonConflictError, find_period_conflicts
+from .timetable import invalidate_timetables
+
+WORKING_DAYS = 5
+
+# lessons a week of a course without programm themes
+DEFAULT_WEEKLY_LESSONS = 2
+
+WRITE_BATCH_SIZE = 1000
+
+
+class Demand(NamedTuple):
+    group_id: int
+    course_id: int
+    weekly_lessons: int
+
+
+class Problem(NamedTuple):
+    demands: list[Demand]
+    # qualified teachers of every course
+    teachers: dict[int, list[int]]
+    timeslots: list[int]
+    auditories: list[int]
+    days: int = WORKING_DAYS
+
+
+class Placement(NamedTuple):
+    group_id: int
+    course_id: int
+    teacher_id: int
+    auditory_id: int
+    weekday: int
+    timeslot_id: int
+
+
+class Solution(NamedTuple):
+    placements: list[Placement]
+    # lessons a week which couldn't be placed
+    unplaced: list[Demand]
+
+
+class _Week:
+    """Weekly timetable being built, indexed by every exclusive resource."""
+
+    def __init__(self, problem: Problem):
+        self.problem = problem
+        self.slots = [
+            (day, timeslot)
+            for day in range(problem.days)
+            for timeslot in problem.timeslots
+        ]
+        self.lessons: dict[int, Placement] = {}
+        self.by_group: dict[tuple, int] = {}
+        self.by_teacher: dict[tuple, int] = {}
+        self.by_slot = {slot: set() for slot in self.slots}
+        self.free_auditories = {
+            slot: list(problem.auditories) for slot in self.slots
+        }
+        # lessons of a group course on a day, spread over the week
+        self.course_days = Counter()
+        self.group_days = Counter()
+        self.teacher_load = Counter()
+        self.teacher_of: dict[tuple[int, int], int] = {}
+        self._next_id = 0
+
+    def is_free(self, group_id, teacher_id, slot) -> bool:
+        return (
+            (group_id, *slot) not in self.by_group
+            and (teacher_id, *slot) not in self.by_teacher
+            and bool(self.free_auditories[slot])
+        )
+
+    def add(self, group_id, course_id, teacher_id, slot) -> int:
+        day, timeslot = slot
+        lesson = Placement(
+            group_id,
+            course_id,
+            teacher_id,
+            self.free_auditories[slot].pop(),
+            day,
+            timeslot,
+        )
+        id = self._next_id
+        self._next_id += 1
+        self.lessons[id] = lesson
+        self.by_group[(group_id, *slot)] = id
+        self.by_teacher[(teacher_id, *slot)] = id
+        self.by_slot[slot].add(id)
+        self.course_days[(group_id, course_id, day)] += 1
+        self.group_days[(group_id, day)] += 1
+        self.teacher_load[teacher_id] += 1
+        return id
+
+    def remove(self, id: int) -> Placement:
+        lesson = self.lessons.pop(id)
+        slot = (lesson.weekday, lesson.timeslot_id)
+        del self.by_group[(lesson.group_id, *slot)]
+        del self.by_teacher[(lesson.teacher_id, *slot)]
+        self.by_slot[slot].remove(id)
+        self.free_auditories[slot].append(lesson.auditory_id)
+        self.course_days[(lesson.group_id, lesson.course_id, slot[0])] -= 1
+        self.group_days[(lesson.group_id, slot[0])] -= 1
+        self.teacher_load[lesson.teacher_id] -= 1
+        return lesson
+
+    def best_slot(self, group_id, course_id, teacher_id, exclude=None):
+        """Free slot which spreads the course and the group load most
+        evenly over the week."""
+        best, best_cost = None, None
+        for slot in self.slots:
+            if slot == exclude or not self.is_free(group_id, teacher_id, slot):
+                continue
+            cost = (
+                self.course_days[(group_id, course_id, slot[0])],
+                self.group_days[(group_id, slot[0])],
+            )
+            if best_cost is None or cost < best_cost:
+                best, best_cost = slot, cost
+        return best
+
+    def teachers(self, group_id, course_id) -> list[int]:
+        """Teacher already teaching the course to the group first, then
+        the least loaded ones."""
+        teachers = sorted(
+            self.problem.teachers.get(course_id, ()),
+            key=lambda teacher: self.teacher_load[teacher],
+        )
+        current = self.teacher_of.get((group_id, course_id))
+        if current is not None:
+            teachers.remove(current)
+            teachers.insert(0, current)
+        return teachers
+
+    def place(self, group_id, course_id) -> bool:
+        for teacher_id in self.teachers(group_id, course_id):
+            slot = self.best_slot(group_id, course_id, teacher_id)
+            if slot is not None:
+                self.add(group_id, course_id, teacher_id, slot)
+                self.teacher_of.setdefault((group_id, course_id), teacher_id)
+                return True
+        return False
+
+    def _move(self, id: int, exclude) -> bool:
+        lesson = self.lessons[id]
+        slot = self.best_slot(
+            lesson.group_id, lesson.course_id, lesson.teacher_id, exclude
+        )
+        if slot is None:
+            return False
+        self.remove(id)
+        self.add(lesson.group_id, lesson.course_id, lesson.teacher_id, slot)
+        return True
+
+    def repair(self, group_id, course_id) -> bool:
+        """Places the lesson by moving the lessons which occupy its group,
+        teacher or the last auditory to other free slots."""
+        for teacher_id in self.teachers(group_id, course_id):
+            for slot in self.slots:
+                blockers = {
+                    self.by_group.get((group_id, *slot)),
+                    self.by_teacher.get((teacher_id, *slot)),
+                } - {None}
+                if not all(self._move(id, slot) for id in blockers):
+                    continue
+                if not self.free_auditories[slot] and not any(
+                    self._move(id, slot) for id in list(self.by_slot[slot])
+                ):
+                    continue
+                self.add(group_id, course_id, teacher_id, slot)
+                self.teacher_of.setdefault((group_id, course_id), teacher_id)
+                return True
+        return False
+
+
+def solve(problem: Problem, time_limit: float = 60) -> Solution:
+    """Greedy placement of the most constrained lessons first followed by
+    the local search for the lessons which didn't fit."""
+    deadline = time.monotonic() + time_limit
+    week = _Week(problem)
+
+    units = [
+        (demand.group_id, demand.course_id)
+        for demand in problem.demands
+        for _ in range(demand.weekly_lessons)
+    ]
+    weekly_lessons = Counter(units)
+    units.sort(
+        key=lambda unit: (
+            len(problem.teachers.get(unit[1], ())),
+            -weekly_lessons[unit],
+            unit,
+        )
+    )
+    unplaced = [unit for unit in units if not week.place(*unit)]
+
+    while unplaced and time.monotonic() < deadline:
+        remaining = [unit for unit in unplaced if not week.repair(*unit)]
+        if len(remaining) == len(unplaced):
+            break
+        unplaced = remaining
+
+    unplaced = Counter(unplaced)
+    return Solution(
+        placements=list(week.lessons.values()),
+        unplaced=[
+            Demand(group_id, course_id, count)
+            for (group_id, course_id), count in sorted(unplaced.items())
+        ],
+    )
+
+
+def semester_days(semester: Semester) -> tuple[date, date]:
+    return semester.start.date(), semester.end.date()
+
+
+def load_problem(session: Session, semester: Semester) -> Problem:
+    """Weekly lessons of every plan course are the total duration of the
+    course programm themes, counted in lessons, spread over the weeks of
+    the semester."""
+    first_day, last_day = semester_days(semester)
+    weeks = max(math.ceil(((last_day - first_day).days + 1) / 7), 1)
+
+    plan_courses = session.execute(
+        select(EducationPlan.group_id, plans_courses.c.course_id)
+        .join(plans_courses, plans_courses.c.plan_id == EducationPlan.id)
+        .where(EducationPlan.semester_id == semester.id)
+        .distinct()
+    ).all()
+    course_ids = {course_id for _, course_id in plan_courses}
+
+    durations = dict(
+        session.execute(
+            select(
+                CourseProgramm.course_id,
+                func.sum(CourseProgrammTheme.duration),
+            )
+            .join(
+                CourseProgrammTheme,
+                CourseProgrammTheme.course_programm_id == CourseProgramm.id,
+            )
+            .where(CourseProgramm.course_id.in_(course_ids))
+            .group_by(CourseProgramm.course_id)
+        ).all()
+    )
+
+    teachers = defaultdict(list)
+    for teacher_id, course_id in session.execute(
+        select(teacher_course.c.teacher_id, teacher_course.c.course_id)
+        .where(teacher_course.c.course_id.in_(course_ids))
+        .order_by(teacher_course.c.teacher_id)
+    ):
+        teachers[course_id].append(teacher_id)
+
+    return Problem(
+        demands=[
+            Demand(
+                group_id,
+                course_id,
+                (
+                    math.ceil(durations[course_id] / weeks)
+                    if durations.get(course_id)
+                    else DEFAULT_WEEKLY_LESSONS
+                ),
+            )
+            for group_id, course_id in sorted(plan_courses)
+        ],
+        teachers=dict(teachers),
+        timeslots=list(
+            session.scalars(select(TimeSlot.id).order_by(TimeSlot.start))
+        ),
+        auditories=list(
+            session.scalars(select(Auditory.id).order_by(Auditory.id))
+        ),
+    )
+
+
+def write_timetable(
+    session: Session, semester: Semester, solution: Solution
+) -> int:
+    """Replaces lessons of the planned groups during the semester with the
+    weekly timetable repeated on every week. Groups none of whose lessons
+    were placed are left without lessons. Returns number of lessons."""
+    first_day, last_day = semester_days(semester)
+    group_ids = set(
+        session.scalars(
+            select(EducationPlan.group_id).where(
+                EducationPlan.semester_id == semester.id,
+                EducationPlan.group_id.is_not(None),
+            )
+        )
+    )
+    group_ids.update(lesson.group_id for lesson in solution.placements)
+    by_weekday = defaultdict(list)
+    for lesson in solution.placements:
+        by_weekday[lesson.weekday].append(lesson)
+
+    schedules = {
+        (group_id, day): id
+        for id, group_id, day in session.execute(
+            select(Schedule.id, Schedule.group_id, Schedule.date)
+            .where(Schedule.group_id.in_(group_ids))
+            .where(Schedule.date.between(first_day, last_day))
+        )
+    }
+    if schedules:
+        session.execute(
+            delete(Lesson).where(Lesson.schedule_id.in_(schedules.values()))
+        )
+
+    days = [
+        first_day + timedelta(days=offset)
+        for offset in range((last_day - first_day).days + 1)
+    ]
+    missing = sorted(
+        {
+            (lesson.group_id, day)
+            for day in days
+            for lesson in by_weekday[day.weekday()]
+        }
+        - set(schedules)
+    )
+    if missing:
+        created = session.execute(
+            insert(Schedule).returning(
+                Schedule.id,
+                Schedule.group_id,
+                Schedule.date,
+                sort_by_parameter_order=True,
+            ),
+            [{"group_id": group_id, "date": day} for group_id, day in missing],
+        )
+        schedules.update(
+            ((group_id, day), id) for id, group_id, day in created
+        )
+
+    rows = [
+        {
+            "schedule_id": schedules[(lesson.group_id, day)],
+            "course_id": lesson.course_id,
+            "teacher_id": lesson.teacher_id,
+            "auditory_id": lesson.auditory_id,
+            "timeslot_id": lesson.timeslot_id,
+        }
+        for day in days
+        for lesson in by_weekday[day.weekday()]
+    ]
+    lesson_ids = set()
+    for start in range(0, len(rows), WRITE_BATCH_SIZE):
+        lesson_ids.update(
+            session.scalars(
+                insert(Lesson).returning(Lesson.id),
+                rows[start : start + WRITE_BATCH_SIZE],
+            )
+        )
+
+    # lessons of the groups without plans stay and may clash
+    conflicts = [
+        conflict
+        for conflict in find_period_conflicts(session, first_day, last_day)
+        if lesson_ids.intersection(conflict["lesson_ids"])
+    ]
+    if conflicts:
+        raise LessonConflictError(conflicts)
+
+    invalidate_timetables(session)
+    return len(rows)
+
+
+jobs: dict[str, dict] = {}
+_jobs_lock = Lock()
+_job_threads: ThreadPoolExecutor | None = None
+_solvers: ProcessPoolExecutor | None = None
+
+
+def _prune_jobs():
+    """Forgets the finished jobs past retention or beyond the number
+    kept. Called with _jobs_lock held."""
+    finished = sorted(
+        (job["finished"], job_id)
+        for job_id, job in jobs.items()
+        if job["finished"] is not None
+    )
+    expired = datetime.now() - timedelta(
+        seconds=settings.SCHEDULER_JOB_RETENTION
+    )
+    excess = len(finished) - settings.SCHEDULER_FINISHED_JOBS
+    for position, (finished_at, job_id) in enumerate(finished):
+        if position < excess or finished_at < expired:
+            del jobs[job_id]
+
+
+def _update_job(job_id: str, **values):
+    with _jobs_lock:
+        jobs[job_id].update(values)
+
+
+def _run_job(job_id: str, bind: Engine | Connection, semester_id: int):
+    try:
+        with Session(bind=bind) as session:
+            semester = session.get(Semester, semester_id)
+            problem = load_problem(session, semester)
+            session.rollback()
+
+            _update_job(job_id, status="solving")
+            solution = _solvers.submit(
+                solve, problem, settings.SCHEDULER_TIME_LIMIT
+            ).result()
+
+            _update_job(
+                job_id,
+                status="writing",
+                unplaced=[demand._asdict() for demand in solution.unplaced],
+            )
+            lessons = write_timetable(session, semester, solution)
+            session.commit()
+        _update_job(job_id, status="done", lessons=lessons)
+    except LessonConflictError as error:
+        _update_job(
+            job_id,
+            status="failed",
+            detail=str(error),
+            conflicts=error.conflicts,
+        )
+    except Exception as error:
+        _update_job(job_id, status="failed", detail=repr(error))
+    finally:
+        with _jobs_lock:
+            jobs[job_id]["finished"] = datetime.now()
+            _prune_jobs()
+
+
+def start_job(bind: Engine | Connection, semester_id: int) -> dict:
+    """Generates timetable of the semester in the background. The solver
+    runs in a worker process, jobs are known to this process only."""
+    global _job_threads, _solvers
+    with _jobs_lock:
+        if _solvers is None:
+            # threads of the parent must not be forked
+            _solvers = ProcessPoolExecutor(
+                settings.SCHEDULER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _job_threads = ThreadPoolExecutor(settings.SCHEDULER_WORKERS)
+        _prune_jobs()
+        job_id = uuid.uuid4().hex
+        jobs[job_id] = {
+            "id": job_id,
+            "semester_id": semester_id,
+            "status": "queued",
+            "created": datetime.now(),
+            "finished": None,
+            "lessons": None,
+            "unplaced": [],
+            "conflicts": [],
+            "detail": None,
+        }
+        job = dict(jobs[job_id])
+    _job_threads.submit(_run_job, job_id, bind, semester_id)
+    return job
+
+
+def get_job(job_id: str) -> dict | None:
+    with _jobs_lock:
+        job = jobs.get(job_id)
+        return None if job is None else dict(job)
+
+
+def shutdown_scheduler():
+    global _job_threads, _solvers
+    if _solvers is not None:
+        _job_threads.shutdown(cancel_futures=True)
+        _solvers.shutdown(cancel_futures=True)
+        _job_threads = _solvers = None
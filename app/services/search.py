@@ -0,0 +1,441 @@
+"""Search of students and teachers by names and passport.
+
+Postgres answers with a KNN scan of the trigram index ix_visitors_search
+ordered by word similarity, which matches prefixes and misspelled words
+alike. Other databases (SQLite of tests and local development) use
+VisitorIndex, an in-memory prefix index of the name and passport tokens
+of every visitor, built on the first search and kept up to date by
+session events of this process.
+"""
+
+import difflib
+import heapq
+import sys
+from array import array
+from bisect import bisect_left, insort
+from threading import Lock
+from typing import Iterator
+
+from sqlalchemy import event, inspect, literal, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.util import find_tables
+
+from ..models.users import (
+    Student,
+    Teacher,
+    UnivercityVisitor,
+    visitor_search_text,
+)
+
+KIND_MODELS = {"student": Student, "teacher": Teacher}
+VISITOR_TABLES = {"visitors", "students", "teachers"}
+SEARCH_COLUMNS = {"name", "middle_name", "last_name", "passport_id"}
+
+# misspelled words are replaced with at most this many similar names
+FUZZY_MATCHES = 5
+FUZZY_CUTOFF = 0.75
+
+
+def query_words(query: str) -> list[str]:
+    return query.lower().split()
+
+
+def visitor_tokens(name, middle_name, last_name, passport_id) -> tuple:
+    """Name tokens and passport series and number, lowercased. Names
+    repeat a lot, so they are interned."""
+    names = (
+        sys.intern(value.lower()) for value in (name, middle_name, last_name)
+    )
+    return (*names, *passport_id.lower().split())
+
+
+class VisitorIndex:
+    """Sorted distinct tokens of every kind of visitors with the ids of
+    the visitors having the token. Results are ordered by the token the
+    most selective query word matched, then by id, so exact matches come
+    before longer names with the same prefix."""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.stale = True
+        self._tokens: dict[str, list[str]] = {}
+        self._ids: dict[str, dict[str, array]] = {}
+        self._visitors: dict[int, tuple[str, tuple]] = {}
+        self._names: set[str] = set()
+
+    def build(self, session: Session):
+        self._tokens = {kind: [] for kind in KIND_MODELS}
+        self._ids = {kind: {} for kind in KIND_MODELS}
+        self._visitors = {}
+        self._names = set()
+        for kind, model in KIND_MODELS.items():
+            rows = session.execute(
+                select(
+                    model.id,
+                    model.name,
+                    model.middle_name,
+                    model.last_name,
+                    model.passport_id,
+                )
+                .order_by(model.id)
+                .execution_options(yield_per=10000)
+            )
+            ids = self._ids[kind]
+            for id, *columns in rows:
+                tokens = visitor_tokens(*columns)
+                self._visitors[id] = (kind, tokens)
+                self._names.update(tokens[:3])
+                for token in tokens:
+                    # ids come in ascending order
+                    ids.setdefault(token, array("q")).append(id)
+            self._tokens[kind] = sorted(ids)
+        self.stale = False
+
+    def add(self, id: int, kind: str, tokens: tuple):
+        self.remove(id)
+        self._visitors[id] = (kind, tokens)
+        self._names.update(tokens[:3])
+        ids = self._ids[kind]
+        for token in tokens:
+            if token not in ids:
+                insort(self._tokens[kind], token)
+                ids[token] = array("q")
+            token_ids = ids[token]
+            token_ids.insert(bisect_left(token_ids, id), id)
+
+    def remove(self, id: int):
+        kind, tokens = self._visitors.pop(id, (None, ()))
+        for token in tokens:
+            token_ids = self._ids[kind].get(token)
+            if token_ids is None or id not in token_ids:
+                continue
+            token_ids.remove(id)
+            if not token_ids:
+                del self._ids[kind][token]
+                tokens_of_kind = self._tokens[kind]
+                del tokens_of_kind[bisect_left(tokens_of_kind, token)]
+
+    def _prefix_tokens(self, kind: str, prefix: str) -> Iterator[str]:
+        tokens = self._tokens[kind]
+        for position in range(bisect_left(tokens, prefix), len(tokens)):
+            if not tokens[position].startswith(prefix):
+                return
+            yield tokens[position]
+
+    def _has_prefix(self, prefix: str) -> bool:
+        return any(
+            next(self._prefix_tokens(kind, prefix), None) is not None
+            for kind in self._tokens
+        )
+
+    def _matches(self, kind: str, word) -> Iterator[tuple[str, int, str]]:
+        """(token, id, kind) of the visitors matching the word, ordered.
+        The word is a prefix or a set of exact tokens."""
+        if isinstance(word, str):
+            tokens = self._prefix_tokens(kind, word)
+        else:
+            tokens = (
+                token for token in sorted(word) if token in self._ids[kind]
+            )
+        for token in tokens:
+            for id in self._ids[kind][token]:
+                yield token, id, kind
+
+    def _count(self, word, kinds: list[str], at_most: float) -> float:
+        """Number of visitors matching the word, counted up to at_most."""
+        count = 0
+        for kind in kinds:
+            if isinstance(word, str):
+                tokens = self._prefix_tokens(kind, word)
+            else:
+                tokens = (token for token in word if token in self._ids[kind])
+            for token in tokens:
+                count += len(self._ids[kind][token])
+                if count > at_most:
+                    return count
+        return count
+
+    def search(
+        self, query: str, kind: str | None, limit: int
+    ) -> list[tuple[int, str]]:
+        """Ids and kinds of the best visitors matching every query word
+        by prefix or, if no token has the prefix, by similarity."""
+        words = []
+        for word in dict.fromkeys(query_words(query)):
+            if self._has_prefix(word):
+                words.append(word)
+            else:
+                words.append(
+                    frozenset(
+                        difflib.get_close_matches(
+                            word, self._names, FUZZY_MATCHES, FUZZY_CUTOFF
+                        )
+                    )
+                )
+        if not words:
+            return []
+
+        def matches(word, tokens) -> bool:
+            if isinstance(word, str):
+                return any(token.startswith(word) for token in tokens)
+            return not word.isdisjoint(tokens)
+
+        # the most selective word selects the candidates, the others
+        # filter them
+        kinds = [kind] if kind else list(KIND_MODELS)
+        driver, fewest = None, float("inf")
+        for word in words:
+            count = self._count(word, kinds, fewest)
+            if count < fewest or driver is None:
+                driver, fewest = word, count
+        filters = [word for word in words if word is not driver]
+        candidates = heapq.merge(*(self._matches(k, driver) for k in kinds))
+        results = []
+        seen = set()
+        for _, id, candidate_kind in candidates:
+            if id in seen:
+                continue
+            seen.add(id)
+            tokens = self._visitors[id][1]
+            if all(matches(word, tokens) for word in filters):
+                results.append((id, candidate_kind))
+                if len(results) == limit:
+                    break
+        return results
+
+
+_indexes: dict[str, VisitorIndex] = {}
+_indexes_lock = Lock()
+
+
+def _index_key(session: Session) -> str:
+    # sync and async engines of the same database share the index
+    url = session.get_bind().url
+    return str(url.set(drivername=url.get_backend_name()))
+
+
+def get_visitor_index(session: Session) -> VisitorIndex:
+    with _indexes_lock:
+        index = _indexes.setdefault(_index_key(session), VisitorIndex())
+    with index.lock:
+        if index.stale:
+            index.build(session)
+    return index
+
+
+def _visitor_columns():
+    return (
+        UnivercityVisitor.id,
+        UnivercityVisitor.name,
+        UnivercityVisitor.middle_name,
+        UnivercityVisitor.last_name,
+        UnivercityVisitor.passport_id,
+    )
+
+
+def _postgres_search(
+    session: Session, query: str, kind: str | None, limit: int
+) -> list[dict]:
+    query = " ".join(query_words(query))
+    search_text = visitor_search_text(UnivercityVisitor)
+    students = Student.__table__
+    statement = (
+        select(*_visitor_columns(), students.c.id.is_not(None))
+        .outerjoin(students, students.c.id == UnivercityVisitor.id)
+        # <% and <<-> are served by the GiST index, the threshold is
+        # pg_trgm.word_similarity_threshold
+        .where(literal(query).op("<%")(search_text))
+        .order_by(literal(query).op("<<->")(search_text))
+        .limit(limit)
+    )
+    if kind is not None:
+        model = KIND_MODELS[kind].__table__
+        statement = statement.where(
+            select(model.c.id)
+            .where(model.c.id == UnivercityVisitor.id)
+            .exists()
+        )
+    return [
+        {
+            "id": id,
+            "kind": "student" if is_student else "teacher",
+            "name": name,
+            "middle_name": middle_name,
+            "last_name": last_name,
+            "passport_id": passport_id,
+        }
+        for id, name, middle_name, last_name, passport_id, is_student in (
+            session.execute(statement)
+        )
+    ]
+
+
+def search_visitors(
+    session: Session, query: str, kind: str | None, limit: int
+) -> list[dict]:
+    """Best limit visitors matching the query, optionally of one kind."""
+    if session.get_bind().dialect.name == "postgresql":
+        return _postgres_search(session, query, kind, limit)
+
+    index = get_visitor_index(session)
+    with index.lock:
+        found = index.search(query, kind, limit)
+    if not found:
+        return []
+    rows = {
+        row.id: row
+        for row in session.execute(
+            select(*_visitor_columns()).where(
+                UnivercityVisitor.id.in_([id for id, _ in found])
+            )
+        )
+    }
+    return [
+        {"kind": kind, **rows[id]._asdict()}
+        for id, kind in found
+        if id in rows
+    ]
+
+
+# Changes are collected on flush and applied to the in-memory indexes on
+# commit. Core statements writing visitors re-read the written rows, or mark
+# the indexes stale if the rows can't be told.
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_visitor_changes(session, flush_context):
+    changes = session.info.setdefault("visitor_index_changes", [])
+    for object in session.new | session.dirty:
+        if isinstance(object, (Student, Teacher)):
+            kind = "student" if isinstance(object, Student) else "teacher"
+            tokens = visitor_tokens(
+                object.name,
+                object.middle_name,
+                object.last_name,
+                object.passport_id,
+            )
+            changes.append((object.id, kind, tokens))
+    for object in session.deleted:
+        if isinstance(object, UnivercityVisitor):
+            changes.append((inspect(object).identity[0], None, None))
+
+
+def _visitor_changes(session: Session, ids: list[int]) -> list[tuple]:
+    """Index changes making the visitors as they are in the transaction.
+    Missing visitors and those of no kind yet are removed."""
+    visitors = UnivercityVisitor.__table__
+    students = Student.__table__
+    teachers = Teacher.__table__
+    found = {}
+    rows = session.execute(
+        select(
+            visitors.c.id,
+            visitors.c.name,
+            visitors.c.middle_name,
+            visitors.c.last_name,
+            visitors.c.passport_id,
+            students.c.id.is_not(None),
+            teachers.c.id.is_not(None),
+        )
+        .outerjoin(students, students.c.id == visitors.c.id)
+        .outerjoin(teachers, teachers.c.id == visitors.c.id)
+        .where(visitors.c.id.in_(set(ids)))
+    )
+    for id, *columns, is_student, is_teacher in rows:
+        if is_student or is_teacher:
+            kind = "student" if is_student else "teacher"
+            found[id] = (kind, visitor_tokens(*columns))
+    return [(id, *found.get(id, (None, None))) for id in dict.fromkeys(ids)]
+
+
+def _written_columns(orm_execute_state) -> set[str]:
+    statement = orm_execute_state.statement
+    values = dict(statement._ordered_values or statement._values or {})
+    parameters = orm_execute_state.parameters
+    # executemany rows of a bulk UPDATE by primary key
+    for row in parameters if isinstance(parameters, list) else ():
+        values.update(row)
+    return {getattr(column, "key", column) for column in values}
+
+
+def _written_ids(orm_execute_state) -> list[int] | None:
+    """Ids of the visitors the statement is about to write, if they can
+    be told before it runs."""
+    statement = orm_execute_state.statement
+    parameters = orm_execute_state.parameters
+    if isinstance(parameters, dict):
+        parameters = [parameters]
+    whereclause = getattr(statement, "whereclause", None)
+    if whereclause is None:
+        # rows given with ids, otherwise inserted or the whole table
+        ids = [row["id"] for row in parameters or () if "id" in row]
+        return ids if ids and len(ids) == len(parameters) else None
+    table = statement.table
+    tables = find_tables(whereclause)
+    if any(other.name != table.name for other in tables):
+        return None
+    return orm_execute_state.session.scalars(
+        select(table.c.id).where(whereclause)
+    ).all()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_writes(orm_execute_state):
+    if not (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        return
+    statement = orm_execute_state.statement
+    if getattr(statement.table, "name", None) not in VISITOR_TABLES:
+        return
+    session = orm_execute_state.session
+    if session.get_bind().dialect.name == "postgresql":
+        return
+    # the version bumps of teachers and other writes of unindexed columns
+    if orm_execute_state.is_update and not (
+        _written_columns(orm_execute_state) & SEARCH_COLUMNS
+    ):
+        return
+
+    ids = _written_ids(orm_execute_state)
+    result = orm_execute_state.invoke_statement()
+    if ids is None and "id" in result.keys():
+        # inserted ids are read off RETURNING, the caller gets the rows
+        frozen = result.freeze()
+        ids = frozen().scalars("id").all()
+        result = frozen()
+    if ids is None:
+        session.info["visitor_index_stale"] = True
+    elif ids:
+        session.info.setdefault("visitor_index_changes", []).extend(
+            _visitor_changes(session, ids)
+        )
+    return result
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_visitor_changes(session):
+    changes = session.info.pop("visitor_index_changes", ())
+    stale = session.info.pop("visitor_index_stale", False)
+    if not changes and not stale:
+        return
+    index = _indexes.get(_index_key(session))
+    if index is None:
+        return
+    with index.lock:
+        if stale:
+            index.stale = True
+        elif not index.stale:
+            for id, kind, tokens in changes:
+                if kind is None:
+                    index.remove(id)
+                else:
+                    index.add(id, kind, tokens)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_visitor_changes(session, previous_transaction):
+    session.info.pop("visitor_index_changes", None)
+    session.info.pop("visitor_index_stale", None)
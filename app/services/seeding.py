@@ -0,0 +1,344 @@
+"""Synthetic university of the given number of students, for benchmarks
+and local development. Rows get consecutive ids starting from 1, so the
+dataset is seeded into empty tables."""
+
+import csv
+import io
+import random
+from datetime import date, datetime, time, timedelta
+from typing import Iterator
+
+from sqlalchemy import Table, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from ..models.buildings import Auditory, Building
+from ..models.education import (
+    Course,
+    CourseGrade,
+    EducationPlan,
+    Lesson,
+    Schedule,
+    Semester,
+    TimeSlot,
+    plans_courses,
+    students_courses,
+)
+from ..models.structure import Department, Faculty, Group
+from ..models.users import Student, Teacher, UnivercityVisitor, teacher_course
+from .grade_stats import rebuild_grade_stats
+
+# students of the dataset of scale factor 1
+STUDENTS_PER_SCALE = 1000
+
+FACULTIES = 10
+DEPARTMENTS_PER_FACULTY = 5
+COURSES_PER_FACULTY = 20
+STUDENTS_PER_GROUP = 25
+STUDENTS_PER_TEACHER = 20
+COURSES_PER_STUDENT = 5
+COURSES_PER_TEACHER = 3
+COURSES_PER_PLAN = 6
+AUDITORIES_PER_BUILDING = 100
+
+TIMESLOTS = 6
+LESSONS_PER_DAY = 3
+SEMESTER_START = date(2023, 9, 4)
+SEMESTER_WEEKS = 18
+# weeks of the semester with lessons
+SCHEDULE_WEEKS = 2
+
+# rows inserted by one statement, or copied by one COPY on Postgres
+BATCH_SIZE = 10000
+COPY_BATCH_SIZE = 100000
+
+NAMES = ["Anna", "Boris", "Daria", "Egor", "Irina", "Ivan", "Olga", "Petr"]
+LAST_NAMES = ["Ivanov", "Petrov", "Smirnov", "Sokolov", "Volkov", "Popov"]
+
+# seeded tables in the order of their foreign keys
+TABLES: list[Table] = [
+    Faculty.__table__,
+    Department.__table__,
+    Course.__table__,
+    Group.__table__,
+    Building.__table__,
+    Auditory.__table__,
+    TimeSlot.__table__,
+    Semester.__table__,
+    EducationPlan.__table__,
+    plans_courses,
+    UnivercityVisitor.__table__,
+    Student.__table__,
+    Teacher.__table__,
+    students_courses,
+    teacher_course,
+    CourseGrade.__table__,
+    Schedule.__table__,
+    Lesson.__table__,
+]
+
+
+def dataset_size(students: int) -> dict[str, int]:
+    groups = max(students // STUDENTS_PER_GROUP, 1)
+    return {
+        "faculties": FACULTIES,
+        "departments": FACULTIES * DEPARTMENTS_PER_FACULTY,
+        "courses": FACULTIES * COURSES_PER_FACULTY,
+        "groups": groups,
+        # every group has its own auditory
+        "auditories": groups,
+        "buildings": -(-groups // AUDITORIES_PER_BUILDING),
+        "students": students,
+        "teachers": max(students // STUDENTS_PER_TEACHER, 1),
+    }
+
+
+def _visitor(randomizer: random.Random, id: int, age: int) -> dict:
+    return {
+        "id": id,
+        "name": randomizer.choice(NAMES),
+        "middle_name": randomizer.choice(NAMES) + "ovich",
+        "last_name": randomizer.choice(LAST_NAMES),
+        "birthdate": date(2023 - age, 1, 1)
+        + timedelta(days=randomizer.randrange(365)),
+        "passport_id": f"{id // 10**6:04} {id % 10**6:06}",
+    }
+
+
+def generate_rows(
+    students: int, seed: int = 0
+) -> Iterator[tuple[Table, dict]]:
+    """Yields rows of the dataset table after table, the same ones for the
+    same seed."""
+    randomizer = random.Random(seed)
+    size = dataset_size(students)
+    groups = range(1, size["groups"] + 1)
+
+    def faculty_courses(department_id: int) -> range:
+        faculty_id = (department_id - 1) // DEPARTMENTS_PER_FACULTY + 1
+        first = (faculty_id - 1) * COURSES_PER_FACULTY + 1
+        return range(first, first + COURSES_PER_FACULTY)
+
+    def group_department(group_id: int) -> int:
+        return group_id % size["departments"] + 1
+
+    def student_group(student_id: int) -> int:
+        return (student_id - 1) % size["groups"] + 1
+
+    for id in range(1, FACULTIES + 1):
+        yield Faculty.__table__, {"id": id, "name": f"Faculty {id}"}
+    for id in range(1, size["departments"] + 1):
+        yield Department.__table__, {
+            "id": id,
+            "name": f"Department {id}",
+            "faculty_id": (id - 1) // DEPARTMENTS_PER_FACULTY + 1,
+        }
+    for id in range(1, size["courses"] + 1):
+        yield Course.__table__, {
+            "id": id,
+            "name": f"Course {id}",
+            "faculty_id": (id - 1) // COURSES_PER_FACULTY + 1,
+        }
+    for id in groups:
+        yield Group.__table__, {
+            "id": id,
+            "name": f"Group {id}",
+            "department_id": group_department(id),
+        }
+
+    for id in range(1, size["buildings"] + 1):
+        yield Building.__table__, {
+            "id": id,
+            "street": f"Street {id}",
+            "house_number": str(id),
+        }
+    for id in range(1, size["auditories"] + 1):
+        yield Auditory.__table__, {
+            "id": id,
+            "room_number": str(100 + id % AUDITORIES_PER_BUILDING),
+            "building_id": (id - 1) // AUDITORIES_PER_BUILDING + 1,
+        }
+    for id in range(1, TIMESLOTS + 1):
+        start = 8 * 60 + 30 + (id - 1) * 100
+        yield TimeSlot.__table__, {
+            "id": id,
+            "name": f"Lesson {id}",
+            "start": time(start // 60, start % 60),
+            "end": time((start + 90) // 60, (start + 90) % 60),
+        }
+    yield Semester.__table__, {
+        "id": 1,
+        "start": datetime.combine(SEMESTER_START, time()),
+        "end": datetime.combine(
+            SEMESTER_START + timedelta(weeks=SEMESTER_WEEKS, days=-1), time()
+        ),
+        "number": 1,
+    }
+
+    plans = {
+        id: randomizer.sample(
+            faculty_courses(group_department(id)), COURSES_PER_PLAN
+        )
+        for id in groups
+    }
+    for id in groups:
+        yield EducationPlan.__table__, {
+            "id": id,
+            "semester_id": 1,
+            "group_id": id,
+        }
+    for id, courses in plans.items():
+        for course_id in courses:
+            yield plans_courses, {"plan_id": id, "course_id": course_id}
+
+    teacher_ids = range(students + 1, students + size["teachers"] + 1)
+    for id in range(1, students + 1):
+        yield UnivercityVisitor.__table__, _visitor(randomizer, id, 20)
+    for id in teacher_ids:
+        yield UnivercityVisitor.__table__, _visitor(randomizer, id, 45)
+
+    def enrollments() -> Iterator[tuple[int, int]]:
+        # generated twice, for students_courses and for course_grades,
+        # instead of keeping millions of pairs in memory
+        randomizer = random.Random(seed + 1)
+        for id in range(1, students + 1):
+            courses = faculty_courses(group_department(student_group(id)))
+            for course_id in randomizer.sample(courses, COURSES_PER_STUDENT):
+                yield id, course_id
+
+    for id in range(1, students + 1):
+        yield Student.__table__, {"id": id, "group_id": student_group(id)}
+    for number, id in enumerate(teacher_ids):
+        yield Teacher.__table__, {
+            "id": id,
+            "department_id": number % size["departments"] + 1,
+        }
+
+    for student_id, course_id in enrollments():
+        yield students_courses, {
+            "student_id": student_id,
+            "course_id": course_id,
+        }
+    course_teachers = {}
+    for number, id in enumerate(teacher_ids):
+        courses = faculty_courses(number % size["departments"] + 1)
+        for course_id in randomizer.sample(courses, COURSES_PER_TEACHER):
+            course_teachers.setdefault(course_id, []).append(id)
+            yield teacher_course, {"teacher_id": id, "course_id": course_id}
+
+    for id, (student_id, course_id) in enumerate(enrollments(), 1):
+        yield CourseGrade.__table__, {
+            "id": id,
+            "student_id": student_id,
+            "course_id": course_id,
+            "score": randomizer.randrange(6),
+        }
+
+    days = [
+        SEMESTER_START + timedelta(weeks=week, days=weekday)
+        for week in range(SCHEDULE_WEEKS)
+        for weekday in range(5)
+    ]
+    for number, day in enumerate(days):
+        for id in groups:
+            yield Schedule.__table__, {
+                "id": number * size["groups"] + id,
+                "date": day,
+                "group_id": id,
+            }
+
+    # every group has lessons in its own auditory and no teacher has two
+    # lessons at the same time
+    lesson_id = 0
+    for number, day in enumerate(days):
+        busy_teachers = set()
+        for group_id in groups:
+            plan = plans[group_id]
+            for timeslot in range(1, LESSONS_PER_DAY + 1):
+                course_id = plan[(number + timeslot) % len(plan)]
+                teacher_id = next(
+                    (
+                        teacher
+                        for teacher in course_teachers.get(course_id, ())
+                        if (teacher, timeslot) not in busy_teachers
+                    ),
+                    None,
+                )
+                if teacher_id is None:
+                    continue
+                busy_teachers.add((teacher_id, timeslot))
+                lesson_id += 1
+                yield Lesson.__table__, {
+                    "id": lesson_id,
+                    "schedule_id": number * size["groups"] + group_id,
+                    "course_id": course_id,
+                    "teacher_id": teacher_id,
+                    "timeslot_id": timeslot,
+                    "auditory_id": group_id,
+                }
+
+
+def _insert(session: Session, table: Table, rows: list[dict]):
+    session.execute(insert(table), rows)
+
+
+def _copy(session: Session, table: Table, rows: list[dict]):
+    """Writes the rows with COPY FROM STDIN of psycopg2."""
+    preparer = session.get_bind().dialect.identifier_preparer
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    # empty unquoted CSV values are read as NULL
+    csv.writer(buffer).writerows(
+        [row[column] for column in columns] for row in rows
+    )
+    buffer.seek(0)
+    cursor = session.connection().connection.cursor()
+    cursor.copy_expert(
+        f"COPY {preparer.format_table(table)} "
+        f"({', '.join(map(preparer.quote, columns))}) "
+        "FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def _reset_sequences(session: Session):
+    for table in TABLES:
+        if "id" not in table.c or table.c.id.foreign_keys:
+            continue
+        session.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'),"
+                f" (SELECT max(id) FROM {table.name}))"
+            )
+        )
+
+
+def seed_database(
+    session: Session, students: int, seed: int = 0
+) -> dict[str, int]:
+    """Inserts the dataset and returns number of rows of every table.
+    Postgres is written with COPY, other databases with executemany
+    batches. Doesn't commit."""
+    if session.scalar(select(func.count()).select_from(UnivercityVisitor)):
+        raise ValueError("Dataset can be seeded into empty database only")
+
+    if session.get_bind().dialect.name == "postgresql":
+        write, batch_size = _copy, COPY_BATCH_SIZE
+    else:
+        write, batch_size = _insert, BATCH_SIZE
+
+    counts = dict.fromkeys((table.name for table in TABLES), 0)
+    batch, batch_table = [], None
+    for table, row in generate_rows(students, seed):
+        if table is not batch_table or len(batch) == batch_size:
+            if batch:
+                write(session, batch_table, batch)
+            batch, batch_table = [], table
+        batch.append(row)
+        counts[table.name] += 1
+    if batch:
+        write(session, batch_table, batch)
+
+    if session.get_bind().dialect.name == "postgresql":
+        _reset_sequences(session)
+    rebuild_grade_stats(session)
+    return counts
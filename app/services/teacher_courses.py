@@ -0,0 +1,140 @@
+"""Writes of teacher_course by difference with its current rows: an edit
+deletes the removed rows by one DELETE and inserts the added ones by one
+INSERT, and writes nothing if the courses stay the same.
+
+The statements bypass the relationship collections, so the loaded
+collections of the changed teachers and courses are expired and the
+teacher versions served as ETag are bumped here."""
+
+from typing import Iterable
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+
+from ..database import upsert_insert
+from ..models.education import Course
+from ..models.structure import Department
+from ..models.users import Teacher, UnivercityVisitor, teacher_course
+
+
+def faculty_course_ids(
+    session: Session, course_ids: Iterable[int], faculty_id: int
+) -> set[int]:
+    """Those of the courses which exist and belong to the faculty."""
+    return set(
+        session.scalars(
+            select(Course.id).where(
+                Course.id.in_(set(course_ids)),
+                Course.faculty_id == faculty_id,
+            )
+        )
+    )
+
+
+def faculty_teacher_ids(
+    session: Session, teacher_ids: Iterable[int], faculty_id: int
+) -> set[int]:
+    """Those of the teachers which exist and work on the faculty."""
+    return set(
+        session.scalars(
+            select(Teacher.id)
+            .join(Department, Department.id == Teacher.department_id)
+            .where(
+                Teacher.id.in_(set(teacher_ids)),
+                Department.faculty_id == faculty_id,
+            )
+        )
+    )
+
+
+def _insert(session: Session, pairs: list[tuple[int, int]]):
+    # rows inserted concurrently are kept
+    session.execute(
+        upsert_insert(session, teacher_course)
+        .values(
+            [
+                {"teacher_id": teacher_id, "course_id": course_id}
+                for teacher_id, course_id in pairs
+            ]
+        )
+        .on_conflict_do_nothing()
+    )
+
+
+def _expire(
+    session: Session,
+    model_class,
+    ids: Iterable[int],
+    names: list[str] | None = None,
+):
+    for id in ids:
+        object = session.identity_map.get(identity_key(model_class, id))
+        if object is not None:
+            session.expire(object, names)
+
+
+def sync_teacher_courses(
+    session: Session, teacher: Teacher, course_ids: Iterable[int]
+) -> bool:
+    """Makes course_ids the courses of the teacher within the session
+    transaction. Returns whether they changed."""
+    teacher_id = teacher.id
+    wanted = set(course_ids)
+    current = set(
+        session.scalars(
+            select(teacher_course.c.course_id).where(
+                teacher_course.c.teacher_id == teacher_id
+            )
+        )
+    )
+    added = wanted - current
+    removed = current - wanted
+    if removed:
+        session.execute(
+            delete(teacher_course).where(
+                teacher_course.c.teacher_id == teacher_id,
+                teacher_course.c.course_id.in_(removed),
+            )
+        )
+    if added:
+        _insert(session, [(teacher_id, id) for id in sorted(added)])
+    if not added and not removed:
+        return False
+
+    session.expire(teacher, ["courses"])
+    _expire(session, Course, added | removed, ["teachers"])
+    # the UPDATE of the flush checks the loaded version and writes this one
+    teacher.version += 1
+    return True
+
+
+def assign_teachers(
+    session: Session, course_id: int, teacher_ids: Iterable[int]
+) -> list[int]:
+    """Adds the teachers to the course within the session transaction,
+    keeping the assigned ones. Returns ids of the newly assigned."""
+    wanted = set(teacher_ids)
+    current = set(
+        session.scalars(
+            select(teacher_course.c.teacher_id).where(
+                teacher_course.c.course_id == course_id,
+                teacher_course.c.teacher_id.in_(wanted),
+            )
+        )
+    )
+    added = sorted(wanted - current)
+    if not added:
+        return added
+
+    _insert(session, [(id, course_id) for id in added])
+    visitors = UnivercityVisitor.__table__
+    session.execute(
+        update(visitors)
+        .where(visitors.c.id.in_(added))
+        .values(version=visitors.c.version + 1)
+    )
+    # the loaded teachers have stale versions too
+    _expire(session, Teacher, added)
+    _expire(session, Course, [course_id], ["teachers"])
+    return added
@@ -0,0 +1,219 @@
+from datetime import date, timedelta
+from itertools import chain
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from ..cache import TTLCache, invalidate_on_commit
+from ..config import settings
+from ..models.buildings import Auditory
+from ..models.education import Course, Lesson, Schedule, TimeSlot
+from ..models.structure import Group
+from ..models.users import Teacher, UnivercityVisitor
+
+timetable_cache = TTLCache(
+    "timetable",
+    settings.TIMETABLE_CACHE_SIZE,
+    settings.TIMETABLE_CACHE_TTL,
+    enabled=settings.TIMETABLE_CACHE_ENABLED,
+)
+
+# column the timetable of every kind of entity is filtered by
+TIMETABLE_FILTERS = {
+    "group": Schedule.group_id,
+    "teacher": Lesson.teacher_id,
+    "auditory": Lesson.auditory_id,
+}
+
+# columns of other models shown in the cached lessons; their changes are
+# rare, so any of them drops all cached timetables
+SHOWN_COLUMNS = {
+    Course: ("name",),
+    Group: ("name",),
+    Teacher: ("name", "middle_name", "last_name"),
+    Auditory: ("room_number", "building_id"),
+    TimeSlot: ("name", "start", "end"),
+}
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def _timetable_query(kind: str, entity_id: int, date_from, date_to):
+    return (
+        select(
+            Lesson.id,
+            Schedule.date,
+            TimeSlot.id.label("timeslot_id"),
+            TimeSlot.name.label("timeslot_name"),
+            TimeSlot.start,
+            TimeSlot.end,
+            Course.id.label("course_id"),
+            Course.name.label("course_name"),
+            UnivercityVisitor.id.label("teacher_id"),
+            UnivercityVisitor.name.label("teacher_name"),
+            UnivercityVisitor.middle_name,
+            UnivercityVisitor.last_name,
+            Auditory.id.label("auditory_id"),
+            Auditory.room_number,
+            Auditory.building_id,
+            Group.id.label("group_id"),
+            Group.name.label("group_name"),
+        )
+        .select_from(Lesson)
+        .join(Schedule, Schedule.id == Lesson.schedule_id)
+        .join(Group, Group.id == Schedule.group_id)
+        .outerjoin(TimeSlot, TimeSlot.id == Lesson.timeslot_id)
+        .outerjoin(Course, Course.id == Lesson.course_id)
+        .outerjoin(
+            UnivercityVisitor, UnivercityVisitor.id == Lesson.teacher_id
+        )
+        .outerjoin(Auditory, Auditory.id == Lesson.auditory_id)
+        .where(TIMETABLE_FILTERS[kind] == entity_id)
+        .where(Schedule.date.between(date_from, date_to))
+        .order_by(Schedule.date, TimeSlot.start, Lesson.id)
+    )
+
+
+def _lesson(row) -> dict:
+    lesson = {
+        "id": row.id,
+        "date": row.date,
+        "timeslot": None,
+        "course": None,
+        "teacher": None,
+        "auditory": None,
+        "group": {"id": row.group_id, "name": row.group_name},
+    }
+    if row.timeslot_id is not None:
+        lesson["timeslot"] = {
+            "id": row.timeslot_id,
+            "name": row.timeslot_name,
+            "start": row.start,
+            "end": row.end,
+        }
+    if row.course_id is not None:
+        lesson["course"] = {"id": row.course_id, "name": row.course_name}
+    if row.teacher_id is not None:
+        lesson["teacher"] = {
+            "id": row.teacher_id,
+            "name": row.teacher_name,
+            "middle_name": row.middle_name,
+            "last_name": row.last_name,
+        }
+    if row.auditory_id is not None:
+        lesson["auditory"] = {
+            "id": row.auditory_id,
+            "room_number": row.room_number,
+            "building_id": row.building_id,
+        }
+    return lesson
+
+
+def get_timetable(
+    session: Session, kind: str, entity_id: int, date_from: date, date_to: date
+) -> list[dict]:
+    """Lessons of the group, teacher or auditory between the dates. Weeks
+    are cached separately, the weeks which are not cached yet are fetched
+    by one query."""
+    weeks = []
+    week = week_start(date_from)
+    while week <= date_to:
+        weeks.append(week)
+        week += timedelta(weeks=1)
+
+    lessons_by_week = {}
+    for week in weeks:
+        lessons = timetable_cache.get((kind, entity_id, week), None)
+        if lessons is not None:
+            lessons_by_week[week] = lessons
+
+    missing = [week for week in weeks if week not in lessons_by_week]
+    if missing:
+        generations = {
+            week: timetable_cache.generation((kind, entity_id, week))
+            for week in missing
+        }
+        fetched = {week: [] for week in missing}
+        query = _timetable_query(
+            kind, entity_id, missing[0], missing[-1] + timedelta(days=6)
+        )
+        for row in session.execute(query):
+            week = week_start(row.date)
+            if week in fetched:
+                fetched[week].append(_lesson(row))
+        for week, lessons in fetched.items():
+            timetable_cache.set(
+                (kind, entity_id, week), lessons, generations[week]
+            )
+        lessons_by_week.update(fetched)
+
+    return [
+        lesson
+        for week in weeks
+        for lesson in lessons_by_week[week]
+        if date_from <= lesson["date"] <= date_to
+    ]
+
+
+def invalidate_timetables(session: Session):
+    """Drops all cached timetables when the session commits. For writes
+    which bypass the ORM unit of work."""
+    invalidate_on_commit(session, timetable_cache)
+
+
+def _shown_changes(session: Session, object) -> bool:
+    names = SHOWN_COLUMNS.get(type(object), ())
+    if not names:
+        return False
+    if object in session.deleted:
+        return True
+    attributes = inspect(object).attrs
+    return any(attributes[name].history.has_changes() for name in names)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_changed_timetables(session, flush_context):
+    if any(
+        # lessons moved to another date or group
+        isinstance(object, Schedule) or _shown_changes(session, object)
+        for object in chain(session.dirty, session.deleted)
+    ):
+        invalidate_timetables(session)
+        return
+
+    lessons = [
+        object
+        for object in chain(session.new, session.dirty, session.deleted)
+        if isinstance(object, Lesson)
+    ]
+    if not lessons:
+        return
+
+    # both old and new values of the changed lessons
+    ids = {"schedule_id": set(), "teacher_id": set(), "auditory_id": set()}
+    for lesson in lessons:
+        attributes = inspect(lesson).attrs
+        for name, values in ids.items():
+            history = attributes[name].history
+            values.update(
+                value
+                for value in chain(
+                    history.added, history.unchanged, history.deleted
+                )
+                if value is not None
+            )
+
+    keys = set()
+    schedules = session.connection().execute(
+        select(Schedule.date, Schedule.group_id).where(
+            Schedule.id.in_(ids["schedule_id"])
+        )
+    )
+    for day, group_id in schedules:
+        week = week_start(day)
+        keys.add(("group", group_id, week))
+        keys.update(("teacher", id, week) for id in ids["teacher_id"])
+        keys.update(("auditory", id, week) for id in ids["auditory_id"])
+    invalidate_on_commit(session, timetable_cache, keys)
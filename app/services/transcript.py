@@ -0,0 +1,273 @@
+from datetime import datetime
+from itertools import chain
+
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    String,
+    cast,
+    event,
+    func,
+    inspect,
+    literal,
+    null,
+    select,
+    union_all,
+)
+from sqlalchemy.orm import Session
+
+from ..cache import TTLCache, invalidate_on_commit
+from ..config import settings
+from ..models.education import (
+    Course,
+    CourseGrade,
+    EducationPlan,
+    Exam,
+    ExamGrade,
+    Semester,
+    plans_courses,
+)
+from ..models.users import Student
+
+transcript_cache = TTLCache(
+    "transcript",
+    settings.TRANSCRIPT_CACHE_SIZE,
+    settings.TRANSCRIPT_CACHE_TTL,
+    enabled=settings.TRANSCRIPT_CACHE_ENABLED,
+)
+
+GRADE_MODELS = (CourseGrade, ExamGrade)
+# models whose changes move grades of any student to another semester
+# or rename their courses
+SEMESTER_MODELS = (Course, Exam, EducationPlan, Semester)
+
+
+def _transcript_query(student_id: int):
+    """Grades of the student with their semesters, one row each, after a
+    row of the student itself, so that no rows mean no student. A grade
+    belongs to the earliest semester of the plans of the student's group
+    with the course, an exam grade falls back to the semester of the exam
+    date."""
+    students = Student.__table__
+    group_id = (
+        select(students.c.group_id)
+        .where(students.c.id == student_id)
+        .scalar_subquery()
+    )
+
+    def plan_semester(course_id):
+        return (
+            select(func.min(EducationPlan.semester_id))
+            .join(plans_courses, plans_courses.c.plan_id == EducationPlan.id)
+            .where(
+                EducationPlan.group_id == group_id,
+                plans_courses.c.course_id == course_id,
+            )
+            .scalar_subquery()
+        )
+
+    exam_semester = (
+        select(func.min(Semester.id))
+        .where(Semester.start <= Exam.start, Semester.end >= Exam.start)
+        .correlate(Exam)
+        .scalar_subquery()
+    )
+    exam_grade_semester = func.coalesce(
+        plan_semester(Exam.course_id), exam_semester
+    )
+    semester_columns = (
+        Semester.id.label("semester_id"),
+        Semester.number,
+        Semester.start.label("semester_start"),
+        Semester.end.label("semester_end"),
+    )
+    student = select(
+        literal("student").label("kind"),
+        students.c.id,
+        cast(null(), Integer).label("exam_id"),
+        cast(null(), Integer).label("course_id"),
+        cast(null(), String).label("course_name"),
+        cast(null(), DateTime).label("date"),
+        cast(null(), Integer).label("score"),
+        *(
+            cast(null(), column.type).label(column.name)
+            for column in semester_columns
+        ),
+    ).where(students.c.id == student_id)
+    course_grades = (
+        select(
+            literal("course"),
+            CourseGrade.id,
+            null(),
+            CourseGrade.course_id,
+            Course.name,
+            null(),
+            CourseGrade.score,
+            *semester_columns,
+        )
+        .outerjoin(Course, Course.id == CourseGrade.course_id)
+        .outerjoin(
+            Semester, Semester.id == plan_semester(CourseGrade.course_id)
+        )
+        .where(CourseGrade.student_id == student_id)
+    )
+    exam_grades = (
+        select(
+            literal("exam"),
+            ExamGrade.id,
+            Exam.id,
+            Exam.course_id,
+            Course.name,
+            Exam.start,
+            ExamGrade.score,
+            *semester_columns,
+        )
+        .join(Exam, Exam.id == ExamGrade.exam_id)
+        .outerjoin(Course, Course.id == Exam.course_id)
+        .outerjoin(Semester, Semester.id == exam_grade_semester)
+        .where(ExamGrade.student_id == student_id)
+    )
+    return union_all(student, course_grades, exam_grades)
+
+
+def _average(grades: list[dict]) -> float | None:
+    scores = [grade["score"] for grade in grades if grade["score"] is not None]
+    return sum(scores) / len(scores) if scores else None
+
+
+def _course(row) -> dict | None:
+    if row.course_id is None:
+        return None
+    return {"id": row.course_id, "name": row.course_name}
+
+
+def _build_transcript(student_id: int, rows) -> dict:
+    semesters = {}
+    for row in rows:
+        if row.kind == "student":
+            continue
+        semester = semesters.get(row.semester_id)
+        if semester is None:
+            semester = semesters[row.semester_id] = {
+                "id": row.semester_id,
+                "number": row.number,
+                "start": row.semester_start,
+                "end": row.semester_end,
+                "course_grades": [],
+                "exam_grades": [],
+            }
+        if row.kind == "course":
+            semester["course_grades"].append(
+                {"id": row.id, "course": _course(row), "score": row.score}
+            )
+        else:
+            semester["exam_grades"].append(
+                {
+                    "id": row.id,
+                    "exam_id": row.exam_id,
+                    "date": row.date,
+                    "course": _course(row),
+                    "score": row.score,
+                }
+            )
+
+    for semester in semesters.values():
+        semester["course_grades"].sort(
+            key=lambda grade: (grade["course"] is None, grade["id"])
+        )
+        semester["exam_grades"].sort(
+            key=lambda grade: (grade["date"] or datetime.max, grade["id"])
+        )
+        semester["course_average"] = _average(semester["course_grades"])
+        semester["exam_average"] = _average(semester["exam_grades"])
+        semester["average"] = _average(
+            semester["course_grades"] + semester["exam_grades"]
+        )
+
+    # grades out of any semester go last
+    ordered = sorted(
+        semesters.values(),
+        key=lambda semester: (
+            semester["id"] is None,
+            semester["start"] or datetime.max,
+            semester["number"] or 0,
+            semester["id"] or 0,
+        ),
+    )
+    return {
+        "student_id": student_id,
+        "semesters": ordered,
+        "average": _average(
+            [
+                grade
+                for semester in ordered
+                for grade in semester["course_grades"]
+                + semester["exam_grades"]
+            ]
+        ),
+    }
+
+
+def get_transcript(session: Session, student_id: int) -> dict | None:
+    """Course and exam grades of the student grouped by semester, or None
+    if there is no such student."""
+    transcript = transcript_cache.get(student_id, None)
+    if transcript is not None:
+        return transcript
+    generation = transcript_cache.generation(student_id)
+    rows = session.execute(_transcript_query(student_id)).all()
+    if not rows:
+        return None
+    transcript = _build_transcript(student_id, rows)
+    transcript_cache.set(student_id, transcript, generation)
+    return transcript
+
+
+def invalidate_transcripts(session: Session, student_ids=None):
+    """Drops cached transcripts of the students (or all of them) when the
+    session commits. For writes which bypass the ORM unit of work."""
+    invalidate_on_commit(
+        session,
+        transcript_cache,
+        None if student_ids is None else set(student_ids),
+    )
+
+
+def _changed(object, name: str) -> bool:
+    return inspect(object).attrs[name].history.has_changes()
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_changed_transcripts(session, flush_context):
+    for object in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(object, SEMESTER_MODELS):
+            continue
+        if isinstance(object, (Course, Exam)) and object in session.new:
+            # nobody is graded yet
+            continue
+        if (
+            isinstance(object, Course)
+            and object in session.dirty
+            and not _changed(object, "name")
+        ):
+            # courses are dirty when their teachers or students change
+            continue
+        invalidate_transcripts(session)
+        return
+
+    student_ids = set()
+    for object in chain(session.new, session.dirty, session.deleted):
+        if isinstance(object, GRADE_MODELS):
+            history = inspect(object).attrs.student_id.history
+            student_ids.update(
+                chain(history.added, history.unchanged, history.deleted)
+            )
+        elif isinstance(object, Student) and (
+            object in session.deleted
+            or object in session.dirty
+            and _changed(object, "group_id")
+        ):
+            student_ids.add(inspect(object).identity[0])
+    student_ids.discard(None)
+    if student_ids:
+        invalidate_transcripts(session, student_ids)
@@ -0,0 +1,187 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from ..database import Base, get_async_db
+from ..models.structure import Department, Faculty, Group
+from ..models.education import Course
+from ..models.users import Student
+from ..routers import async_users, async_education
+from ..routers.core import async_get_object_or_404
+from ..routers.loaders import STUDENT_OPTIONS
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_async.db"
+
+sync_engine = create_engine(SQLALCHEMY_DATABASE_URL)
+Base.metadata.drop_all(bind=sync_engine)
+Base.metadata.create_all(bind=sync_engine)
+
+# each TestClient request runs on its own event loop, so connections
+# must not be pooled between requests
+engine = create_async_engine(
+    "sqlite+aiosqlite:///./test_async.db", poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=engine, autoflush=False, expire_on_commit=False
+)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+app = FastAPI()
+app.include_router(async_users.router, prefix="/api")
+app.include_router(async_education.router, prefix="/api")
+app.dependency_overrides[get_async_db] = override_get_async_db
+
+client = TestClient(app)
+
+
+def setup_module():
+    with sync_engine.begin() as connection:
+        connection.execute(Faculty.__table__.insert(), {"id": 1, "name": "F"})
+        connection.execute(
+            Department.__table__.insert(),
+            {"id": 1, "name": "D", "faculty_id": 1},
+        )
+        connection.execute(
+            Group.__table__.insert(),
+            {"id": 1, "name": "G", "department_id": 1},
+        )
+        connection.execute(
+            Course.__table__.insert(),
+            {"id": 1, "name": "Math", "faculty_id": 1},
+        )
+
+
+def test_student_and_teacher_are_served_with_relationships():
+    response = client.post(
+        "/api/students",
+        json={
+            "name": "Ivan",
+            "middle_name": "Ivanovich",
+            "last_name": "Ivanov",
+            "passport_id": "1234 567890",
+            "birthdate": "2001-01-01",
+            "group_id": 1,
+        },
+    )
+    assert response.status_code == 201, response.text
+    assert response.json()["group"]["department"]["faculty"]["name"] == "F"
+
+    response = client.post(
+        "/api/teachers",
+        json={
+            "name": "Petr",
+            "middle_name": "Petrovich",
+            "last_name": "Petrov",
+            "passport_id": "1234 567891",
+            "birthdate": "1970-01-01",
+            "department_id": 1,
+            "courses": [1],
+        },
+    )
+    assert response.status_code == 201, response.text
+    teacher_id = response.json()["id"]
+
+    response = client.get(f"/api/teachers/{teacher_id}")
+    assert response.status_code == 200, response.text
+    assert response.json()["courses"][0]["faculty"]["name"] == "F"
+
+    response = client.get("/api/students")
+    assert [s["name"] for s in response.json()["items"]] == ["Ivan"]
+
+    tag = client.get(f"/api/teachers/{teacher_id}").headers["etag"]
+    response = client.get(
+        f"/api/teachers/{teacher_id}", headers={"If-None-Match": tag}
+    )
+    assert response.status_code == 304
+    response = client.patch(
+        f"/api/teachers/{teacher_id}",
+        json={"name": "Pavel"},
+        headers={"If-Match": tag},
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["etag"] != tag
+
+
+def test_batch_get_and_lookups_with_options():
+    ids = []
+    for number in range(3):
+        response = client.post(
+            "/api/students",
+            json={
+                "name": "Batch",
+                "middle_name": "Batchevich",
+                "last_name": "Batchev",
+                "passport_id": f"2022 00000{number}",
+                "birthdate": "2001-01-01",
+                "group_id": 1,
+            },
+        )
+        ids.append(response.json()["id"])
+
+    response = client.post(
+        "/api/students:batchGet", json={"ids": [ids[1], 999999]}
+    )
+    assert response.status_code == 200, response.text
+    student, missing = response.json()["items"]
+    assert (student["id"], missing) == (ids[1], None)
+    assert student["group"]["department"]["faculty"]["name"] == "F"
+    response = client.post("/api/courses:batchGet", json={"ids": [1]})
+    assert response.json()["items"][0]["name"] == "Math"
+
+    async def lookup_after_plain_load():
+        async with TestingAsyncSessionLocal() as db:
+            await db.get(Student, ids[0])
+            # serializing it must not lazy load on the async session
+            student = await async_get_object_or_404(
+                db, Student, ids[0], STUDENT_OPTIONS
+            )
+            return student.group.department.faculty.name
+
+    assert asyncio.run(lookup_after_plain_load()) == "F"
+
+
+def test_teacher_courses_are_synced():
+    response = client.post(
+        "/api/teachers",
+        json={
+            "name": "Sync",
+            "middle_name": "Syncovich",
+            "last_name": "Syncov",
+            "passport_id": "2025 000001",
+            "birthdate": "1970-01-01",
+            "department_id": 1,
+        },
+    )
+    teacher_id = response.json()["id"]
+
+    response = client.post(
+        "/api/courses/1/teachers:bulkAssign",
+        json={"teacher_ids": [teacher_id]},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "assigned": [teacher_id],
+        "already_assigned": [],
+    }
+    tag = client.get(f"/api/teachers/{teacher_id}").headers["etag"]
+    assert client.get(f"/api/teachers/{teacher_id}").json()["courses"] == [
+        {"name": "Math", "faculty": {"name": "F"}}
+    ]
+
+    response = client.patch(
+        f"/api/teachers/{teacher_id}",
+        json={"courses": []},
+        headers={"If-Match": tag},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["courses"] == []
+    assert response.headers["etag"] != tag
@@ -0,0 +1,90 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import inspect, select
+
+from ..config import settings
+from ..models.users import Student
+from ..routers.core import get_object_or_404
+from ..routers.loaders import STUDENT_OPTIONS
+from ..schemas.core import BATCH_GET_MAX_IDS
+from .test_query_counts import count_statements, seed
+from .test_sql_app import TestingSessionLocal, client
+
+
+def student_ids(prefix: str) -> list[int]:
+    db = TestingSessionLocal()
+    ids = list(
+        db.scalars(
+            select(Student.id)
+            .where(Student.passport_id.startswith(prefix))
+            .order_by(Student.id)
+        )
+    )
+    db.close()
+    return ids
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_batch_get_students_by_one_query(fast, monkeypatch):
+    monkeypatch.setattr(settings, "FAST_SERIALIZATION", fast)
+    prefix = "2019" if fast else "2023"
+    seed(prefix, 3)
+    first, second, third = student_ids(prefix)
+    ids = [third, 999999, first, third]
+    with count_statements() as statements:
+        response = client.post("/api/students:batchGet", json={"ids": ids})
+    assert response.status_code == 200, response.text
+    assert len(statements) == 1
+
+    items = response.json()["items"]
+    assert [item and item["id"] for item in items] == [
+        third,
+        None,
+        first,
+        third,
+    ]
+    assert items[0] == client.get(f"/api/students/{third}").json()
+
+    response = client.post(
+        "/api/students:batchGet",
+        json={"ids": list(range(BATCH_GET_MAX_IDS + 1))},
+    )
+    assert response.status_code == 422
+
+
+def test_batch_get_teachers_and_courses():
+    ids = seed("2020", 2)
+    with count_statements() as statements:
+        response = client.post(
+            "/api/teachers:batchGet", json={"ids": [ids["teacher"]]}
+        )
+    # teachers and their courses
+    assert len(statements) == 2
+    (teacher,) = response.json()["items"]
+    assert teacher == client.get(f"/api/teachers/{ids['teacher']}").json()
+
+    response = client.post(
+        "/api/courses:batchGet", json={"ids": [ids["course"], 999999]}
+    )
+    assert response.json()["items"] == [
+        {"name": "2020 course 0", "faculty": {"name": "2020 faculty"}},
+        None,
+    ]
+
+
+def test_lookups_load_the_relationships_of_the_options():
+    seed("2021", 3)
+    first = student_ids("2021")[0]
+    db = TestingSessionLocal()
+    plain = db.get(Student, first)
+    assert "group" in inspect(plain).unloaded
+    with count_statements() as statements:
+        student = get_object_or_404(db, Student, first, STUDENT_OPTIONS)
+        # the identity map answers once the relationships are loaded
+        assert get_object_or_404(db, Student, first, STUDENT_OPTIONS) is plain
+    assert len(statements) == 1
+    assert student is plain
+    assert student.group.department.faculty.name == "2021 faculty"
+    with pytest.raises(HTTPException):
+        get_object_or_404(db, Student, 999999)
+    db.close()
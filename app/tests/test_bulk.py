@@ -0,0 +1,141 @@
+import json
+
+from ..models.education import Course
+from ..models.structure import Department, Faculty, Group
+from .test_sql_app import TestingSessionLocal, client
+
+
+def student(passport_id: str, group_id=None) -> dict:
+    return {
+        "name": "Bulk",
+        "middle_name": "Bulk",
+        "last_name": "Bulk",
+        "passport_id": passport_id,
+        "birthdate": "2002-02-02",
+        "group_id": group_id,
+    }
+
+
+def create_group(name: str) -> int:
+    db = TestingSessionLocal()
+    faculty = Faculty(name=f"{name} faculty")
+    group = Group(
+        name=f"{name} group",
+        department=Department(name=f"{name} department", faculty=faculty),
+    )
+    db.add(group)
+    db.commit()
+    group_id = group.id
+    db.close()
+    return group_id
+
+
+def test_bulk_student_import_reports_every_row():
+    group_id = create_group("Import")
+    body = "\n".join(
+        [
+            json.dumps(student("3000 000001", group_id)),
+            json.dumps(student("3000 000001", group_id)),
+            json.dumps(student("3000 000002", group_id + 100)),
+            "{not json",
+            json.dumps(student("wrong")),
+            json.dumps(student("3000 000003")),
+        ]
+    )
+    response = client.post(
+        "/api/students/bulk",
+        content=body,
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["created"], report["rejected"]) == (2, 4)
+    assert [result["id"] is not None for result in report["results"]] == [
+        True,
+        False,
+        False,
+        False,
+        False,
+        True,
+    ]
+    assert "passport" in report["results"][1]["detail"]
+
+    csv_body = (
+        "name,middle_name,last_name,passport_id,birthdate,group_id\n"
+        f"Csv,Csv,Csv,3000 000004,2002-02-02,{group_id}\n"
+        "Csv,Csv,Csv,3000 000001,2002-02-02,\n"
+    )
+    response = client.post(
+        "/api/students/bulk",
+        content=csv_body,
+        headers={"content-type": "text/csv"},
+    )
+    assert (response.json()["created"], response.json()["rejected"]) == (1, 1)
+
+    # the first data row is not UTF-8
+    invalid = csv_body.encode().replace(b"Csv", b"\xff", 1)
+    response = client.post(
+        "/api/students/bulk",
+        content=invalid,
+        headers={"content-type": "text/csv"},
+    )
+    assert response.status_code == 200, response.text
+    assert "Malformed UTF-8" in response.json()["results"][0]["detail"]
+    response = client.post(
+        "/api/students/bulk",
+        content=invalid.split(b"\n")[1],
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200, response.text
+    assert "Malformed UTF-8" in response.json()["results"][0]["detail"]
+
+    response = client.post("/api/students/bulk", json=[student("3000 000005")])
+    assert response.json()["created"] == 1
+
+    student_id = response.json()["results"][0]["id"]
+    response = client.get(f"/api/students/{student_id}")
+    assert response.json()["passport_id"] == "3000 000005"
+
+
+def test_bulk_grade_upsert_updates_existing_scores():
+    group_id = create_group("Upsert")
+    response = client.post(
+        "/api/students/bulk",
+        json=[student("3100 000001", group_id), student("3100 000002")],
+    )
+    student_ids = [result["id"] for result in response.json()["results"]]
+    db = TestingSessionLocal()
+    course = Course(name="Bulk course", faculty=Faculty(name="Grades"))
+    db.add(course)
+    db.commit()
+    course_id = course.id
+    db.close()
+
+    grades = [
+        {"student_id": student_ids[0], "course_id": course_id, "score": 3},
+        {"student_id": student_ids[1], "course_id": course_id, "score": 4},
+        {"student_id": student_ids[1], "course_id": course_id, "score": 5},
+        {"student_id": student_ids[0], "course_id": course_id + 1, "score": 5},
+        {"student_id": student_ids[0], "course_id": course_id, "score": 9},
+    ]
+    response = client.post("/api/grades/bulk", json=grades)
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["upserted"], report["rejected"]) == (2, 3)
+    assert [bool(result["detail"]) for result in report["results"]] == [
+        False,
+        True,
+        False,
+        True,
+        True,
+    ]
+
+    grades = [
+        {"student_id": student_ids[0], "course_id": course_id, "score": 2}
+    ]
+    first_id = report["results"][0]["id"]
+    report = client.post("/api/grades/bulk", json=grades).json()
+    assert report["results"][0]["id"] == first_id
+
+    response = client.put(f"/api/grades/{first_id}", json={"score": 2})
+    assert response.json()["score"] == 2
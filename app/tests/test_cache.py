@@ -0,0 +1,93 @@
+import pytest
+
+from ..cache import TTLCache, reference_cache
+from ..models.education import Course
+from ..models.structure import Faculty
+from ..routers import core
+from .test_query_counts import count_statements
+from .test_sql_app import TestingSessionLocal, client
+
+
+def test_ttl_cache_evicts_least_recently_used_and_expired():
+    cache = TTLCache("test", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b", None) is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+    cache.ttl = -1
+    cache.set("d", 4)
+    assert cache.get("d", None) is None
+    # "b" and then "a" were dropped as least recently used, "d" as expired
+    assert cache.stats()["evictions"] == 3
+
+
+def test_ttl_cache_drops_values_read_before_an_invalidation():
+    cache = TTLCache("test", maxsize=2, ttl=60)
+    generation = cache.generation("a")
+    cache.invalidate("a")
+    cache.set("a", "stale", generation)
+    assert cache.get("a", None) is None
+
+    generation = cache.generation("a")
+    cache.clear()
+    cache.set("a", "stale", generation)
+    assert cache.get("a", None) is None
+
+    cache.set("a", "fresh", cache.generation("a"))
+    assert cache.get("a") == "fresh"
+
+
+@pytest.mark.skipif(
+    not reference_cache.enabled, reason="reference cache is switched off"
+)
+def test_reference_cache_serves_course_and_is_invalidated_on_write():
+    db = TestingSessionLocal()
+    course = Course(name="Cached", faculty=Faculty(name="Cached faculty"))
+    db.add(course)
+    db.commit()
+    course_id = course.id
+
+    assert client.get(f"/api/courses/{course_id}").json()["name"] == "Cached"
+    with count_statements() as statements:
+        response = client.get(f"/api/courses/{course_id}")
+    assert response.json()["faculty"]["name"] == "Cached faculty"
+    assert statements == []
+
+    course.name = "Renamed"
+    db.commit()
+    db.close()
+    assert client.get(f"/api/courses/{course_id}").json()["name"] == "Renamed"
+
+    stats = client.get("/api/_internal/cache").json()["reference"]
+    assert stats["hits"] >= 1
+
+
+@pytest.mark.skipif(
+    not reference_cache.enabled, reason="reference cache is switched off"
+)
+def test_reference_read_before_a_write_is_not_cached(monkeypatch):
+    db = TestingSessionLocal()
+    course = Course(name="Raced", faculty=Faculty(name="Raced faculty"))
+    db.add(course)
+    db.commit()
+    course_id = course.id
+    load_many = core.load_many
+
+    def load_and_rename(*args, **kwargs):
+        loaded = load_many(*args, **kwargs)
+        # committed after the read and before the store
+        course.name = "Renamed raced"
+        db.commit()
+        return loaded
+
+    monkeypatch.setattr(core, "load_many", load_and_rename)
+    response = client.get(f"/api/courses/{course_id}")
+    assert response.json()["name"] == "Raced"
+    monkeypatch.undo()
+    db.close()
+
+    response = client.get(f"/api/courses/{course_id}")
+    assert response.json()["name"] == "Renamed raced"
@@ -0,0 +1,79 @@
+from .test_query_counts import count_statements, seed
+from .test_sql_app import client
+
+
+def test_not_modified_from_one_lookup():
+    ids = seed("2005", 1)
+    url = f"/api/students/{ids['student']}"
+    response = client.get(url)
+    assert response.status_code == 200
+    tag = response.headers["etag"]
+
+    with count_statements() as statements:
+        response = client.get(url, headers={"If-None-Match": tag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == tag
+    assert response.content == b""
+    assert len(statements) == 1
+
+    response = client.get(url, headers={"If-None-Match": '"0", W/' + tag})
+    assert response.status_code == 304
+
+    response = client.get(url, headers={"If-None-Match": '"0"'})
+    assert response.status_code == 200
+
+    response = client.get(
+        "/api/students/999999", headers={"If-None-Match": tag}
+    )
+    assert response.status_code == 404
+
+
+def test_if_match_of_writes():
+    ids = seed("2006", 1)
+    url = f"/api/students/{ids['student']}"
+    tag = client.get(url).headers["etag"]
+
+    response = client.patch(
+        url, json={"name": "New"}, headers={"If-Match": '"0"'}
+    )
+    assert response.status_code == 412
+
+    response = client.patch(
+        url, json={"name": "New"}, headers={"If-Match": tag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != tag
+    assert client.get(url, headers={"If-None-Match": tag}).status_code == 200
+
+    response = client.delete(url, headers={"If-Match": tag})
+    assert response.status_code == 412
+
+
+def test_courses_of_teacher_change_version():
+    ids = seed("2007", 1)
+    url = f"/api/teachers/{ids['teacher']}"
+    tag = client.get(url).headers["etag"]
+
+    response = client.patch(url, json={"courses": [ids["course"]]})
+    assert response.status_code == 200
+    assert len(response.json()["courses"]) == 1
+    assert response.headers["etag"] != tag
+
+
+def test_bulk_upsert_changes_grade_version():
+    ids = seed("2008", 1)
+    grade = {
+        "student_id": ids["student"],
+        "course_id": ids["course"],
+        "score": 3,
+    }
+    response = client.post("/api/grades/bulk", json=[grade])
+    grade_id = response.json()["results"][0]["id"]
+    client.post("/api/grades/bulk", json=[grade | {"score": 4}])
+
+    url = f"/api/grades/{grade_id}"
+    response = client.put(url, json={"score": 5}, headers={"If-Match": '"1"'})
+    assert response.status_code == 412
+    response = client.put(url, json={"score": 5}, headers={"If-Match": '"2"'})
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"3"'
@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+
+from ..config import settings
+from ..models.education import CourseGrade
+from ..models.structure import Department
+from .test_query_counts import seed
+from .test_sql_app import TestingSessionLocal, client
+
+
+def test_course_students_export_matches_the_list(monkeypatch):
+    ids = seed("2013", 3)
+    url = f"/api/courses/{ids['course']}/students"
+    monkeypatch.setattr(settings, "FAST_SERIALIZATION", False)
+    students = client.get(f"{url}/").json()
+
+    response = client.get(f"{url}/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.content.splitlines()
+    assert [json.loads(line) for line in lines] == students
+
+    response = client.get(f"{url}/export", params={"format": "csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(row["id"]) for row in rows] == [s["id"] for s in students]
+    assert rows[0]["faculty"] == "2013 faculty"
+
+    assert client.get("/api/courses/999999/students/export").status_code == 404
+
+
+def test_faculty_grades_export():
+    ids = seed("2014", 2)
+    db = TestingSessionLocal()
+    db.add(
+        CourseGrade(
+            student_id=ids["student"], course_id=ids["course"], score=4
+        )
+    )
+    db.commit()
+    faculty_id = db.get(Department, ids["department"]).faculty_id
+    db.close()
+
+    url = f"/api/faculties/{faculty_id}/grades/export"
+    rows = [json.loads(line) for line in client.get(url).content.splitlines()]
+    assert rows == [
+        {
+            "student_id": ids["student"],
+            "last_name": "L",
+            "name": "2014 student",
+            "middle_name": "M",
+            "group": "2014 group 0",
+            "course_id": ids["course"],
+            "course": "2014 course 0",
+            "score": 4,
+        }
+    ]
+
+    response = client.get(url, params={"format": "csv"})
+    assert response.text.splitlines() == [
+        "student_id,last_name,name,middle_name,group,course_id,course,score",
+        f"{ids['student']},L,2014 student,M,2014 group 0,"
+        f"{ids['course']},2014 course 0,4",
+    ]
@@ -0,0 +1,90 @@
+from ..config import settings
+from .test_batch_get import student_ids
+from .test_query_counts import count_statements, seed
+from .test_sql_app import client
+
+
+def batch_get(url: str, ids: list[int], **params) -> tuple[list, list]:
+    with count_statements() as statements:
+        response = client.post(url, params=params, json={"ids": ids})
+    assert response.status_code == 200, response.text
+    return response.json()["items"], statements
+
+
+def test_student_fieldsets_shrink_the_query(monkeypatch):
+    monkeypatch.setattr(settings, "FAST_SERIALIZATION", False)
+    seed("2024", 1)
+    [id] = student_ids("2024")
+    url = "/api/students:batchGet"
+    [full], _ = batch_get(url, [id])
+
+    [student], [statement] = batch_get(url, [id], fields="last_name")
+    assert student == {"last_name": "L", "id": id}
+    assert "OUTER JOIN" not in statement
+
+    [student], [statement] = batch_get(url, [id], fields="id,group")
+    assert student == {"id": id, "group": full["group"]}
+    assert statement.count("OUTER JOIN") == 3
+
+    [student], [statement] = batch_get(
+        url, [id], fields="name", include="group.department"
+    )
+    assert student == {
+        "name": "2024 student",
+        "id": id,
+        "group": {
+            "name": full["group"]["name"],
+            "department": {"name": full["group"]["department"]["name"]},
+        },
+    }
+    assert statement.count("OUTER JOIN") == 2
+
+    [student], _ = batch_get(url, [id], include="")
+    assert student["group"] == {"name": full["group"]["name"]}
+
+    [student], _ = batch_get(url, [id], fields=",".join(full))
+    assert student == full
+
+
+def test_teacher_fieldsets_skip_the_courses_query():
+    ids = seed("2025", 1)
+    url = "/api/teachers:batchGet"
+    [full], _ = batch_get(url, [ids["teacher"]])
+    assert full["courses"]
+
+    [teacher], [statement] = batch_get(
+        url, [ids["teacher"]], fields="id,name,last_name"
+    )
+    assert teacher == {
+        "name": full["name"],
+        "last_name": full["last_name"],
+        "id": ids["teacher"],
+    }
+    assert "OUTER JOIN" not in statement
+
+    [teacher], statements = batch_get(
+        url, [ids["teacher"]], fields="id", include="courses,department"
+    )
+    assert teacher["courses"] == [
+        {"name": course["name"]} for course in full["courses"]
+    ]
+    assert teacher["department"] == {"name": full["department"]["name"]}
+    joins = [statement.count("OUTER JOIN") for statement in statements]
+    assert joins == [1, 0]
+
+
+def test_sparse_pages_keep_the_fieldset():
+    seed("2026", 2)
+    response = client.get(
+        "/api/students",
+        params={"fields": "id", "limit": 1},
+    )
+    page = response.json()
+    assert list(page["items"][0]) == ["id"]
+    assert "fields=id" in page["next"]
+
+    response = client.get("/api/teachers", params={"fields": "id,salary"})
+    assert response.status_code == 400
+    assert "salary" in response.json()["detail"]
+    response = client.get("/api/students", params={"include": "department"})
+    assert response.status_code == 400
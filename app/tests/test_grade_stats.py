@@ -0,0 +1,69 @@
+from sqlalchemy import select
+
+from ..models.education import Course, CourseGrade, CourseGradeStats
+from ..models.structure import Faculty
+from ..services.grade_stats import rebuild_grade_stats, summarize
+from .test_bulk import student
+from .test_sql_app import TestingSessionLocal, client
+
+
+def test_grade_stats_follow_every_grade_write():
+    response = client.post(
+        "/api/students/bulk",
+        json=[student(f"3200 00000{number}") for number in range(3)],
+    )
+    student_ids = [result["id"] for result in response.json()["results"]]
+    db = TestingSessionLocal()
+    course = Course(name="Stats course", faculty=Faculty(name="Stats"))
+    db.add(course)
+    db.commit()
+    course_id = course.id
+
+    client.post(
+        "/api/grades",
+        json={
+            "student_id": student_ids[0],
+            "course_id": course_id,
+            "score": 2,
+        },
+    )
+    grade_id = db.scalar(select(CourseGrade.id).filter_by(course_id=course_id))
+    client.put(f"/api/grades/{grade_id}", json={"score": 5})
+    # neither counted twice nor out of the score limits
+    grade = {"student_id": student_ids[0], "course_id": course_id}
+    response = client.post("/api/grades", json=grade | {"score": 3})
+    assert response.status_code == 409
+    response = client.post("/api/grades", json=grade | {"score": 9})
+    assert response.status_code == 422
+    response = client.put(f"/api/grades/{grade_id}", json={"score": -1})
+    assert response.status_code == 422
+    client.post(
+        "/api/grades/bulk",
+        json=[
+            {"student_id": student_ids[0], "course_id": course_id, "score": 4},
+            {"student_id": student_ids[1], "course_id": course_id, "score": 3},
+            {"student_id": student_ids[2], "course_id": course_id, "score": 3},
+        ],
+    )
+
+    response = client.get(f"/api/courses/{course_id}/grade-stats")
+    assert response.status_code == 200, response.text
+    stats = response.json()
+    assert (stats["count"], stats["mean"]) == (3, 10 / 3)
+    assert stats["distribution"] == {
+        "0": 0,
+        "1": 0,
+        "2": 0,
+        "3": 2,
+        "4": 1,
+        "5": 0,
+    }
+
+    rebuild_grade_stats(db)
+    db.commit()
+    rebuilt = summarize(course_id, db.get(CourseGradeStats, course_id))
+    assert rebuilt["count"] == stats["count"]
+    assert rebuilt["mean"] == stats["mean"]
+    db.close()
+
+    assert client.get("/api/courses/100000/grade-stats").status_code == 404
@@ -0,0 +1,23 @@
+import re
+
+from .test_query_counts import seed
+from .test_sql_app import client
+
+
+def test_server_timing_and_metrics():
+    ids = seed("2003", 1)
+    response = client.get(f"/api/students/{ids['student']}")
+    assert response.status_code == 200
+
+    timing = response.headers["server-timing"]
+    statements = re.search(r'db;dur=[\d.]+;desc="(\d+) statements"', timing)
+    assert statements and int(statements[1]) >= 1
+    for metric in ("orm", "serialization", "total"):
+        assert re.search(rf"{metric};dur=[\d.]+", timing), timing
+
+    metrics = client.get("/metrics").text
+    assert (
+        'http_request_sql_statements_count{method="GET",'
+        'route="/api/students/{student_id}"}'
+    ) in metrics
+    assert "http_request_serialization_seconds_bucket" in metrics
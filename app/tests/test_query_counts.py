@@ -0,0 +1,108 @@
+from contextlib import contextmanager
+from datetime import date
+
+from sqlalchemy import event
+
+from ..models.education import Course
+from ..models.structure import Department, Faculty, Group
+from ..models.users import Student, Teacher
+from .test_sql_app import TestingSessionLocal, client, engine
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def seed(prefix: str, count: int) -> dict:
+    db = TestingSessionLocal()
+    faculty = Faculty(name=f"{prefix} faculty")
+    department = Department(name=f"{prefix} department", faculty=faculty)
+    courses = [
+        Course(name=f"{prefix} course {number}", faculty=faculty)
+        for number in range(3)
+    ]
+    groups = [
+        Group(name=f"{prefix} group {number}", department=department)
+        for number in range(count)
+    ]
+    visitor = dict(middle_name="M", last_name="L", birthdate=date(2000, 1, 1))
+    students = [
+        Student(
+            name=f"{prefix} student",
+            passport_id=f"{prefix} {number:06}",
+            group=group,
+            courses=courses,
+            **visitor,
+        )
+        for number, group in enumerate(groups)
+    ]
+    teachers = [
+        Teacher(
+            name=f"{prefix} teacher",
+            passport_id=f"{prefix} {count + number:06}",
+            department=department,
+            courses=courses,
+            **visitor,
+        )
+        for number in range(count)
+    ]
+    db.add_all(students + teachers)
+    db.commit()
+    ids = {
+        "course": courses[0].id,
+        "department": department.id,
+        "student": students[0].id,
+        "teacher": teachers[0].id,
+    }
+    db.close()
+    return ids
+
+
+def statements_per_endpoint(ids: dict) -> dict:
+    counts = {}
+    requests = {
+        "students": ("get", "/api/students?limit=1000", None),
+        "student": ("get", f"/api/students/{ids['student']}", None),
+        "teachers": ("get", "/api/teachers?limit=1000", None),
+        "teacher": ("get", f"/api/teachers/{ids['teacher']}", None),
+        "course": ("get", f"/api/courses/{ids['course']}", None),
+        "course_students": (
+            "get",
+            f"/api/courses/{ids['course']}/students/",
+            None,
+        ),
+        "create_grade": (
+            "post",
+            "/api/grades",
+            {
+                "student_id": ids["student"],
+                "course_id": ids["course"],
+                "score": 4,
+            },
+        ),
+    }
+    for name, (method, url, body) in requests.items():
+        with count_statements() as statements:
+            response = client.request(method, url, json=body)
+        assert response.status_code < 400, response.text
+        counts[name] = len(statements)
+    return counts
+
+
+def test_statement_count_does_not_grow_with_result_size():
+    small = statements_per_endpoint(seed("2001", 2))
+    large = statements_per_endpoint(seed("2002", 20))
+
+    assert small == large
+    # creating a grade updates course and student grade stats
+    assert max(large.values()) <= 5, large
@@ -0,0 +1,66 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from ..models.education import Course, CourseGrade, students_courses
+from ..models.users import Student, Teacher, teacher_course
+from ..routers.core import DEFAULT_PAGE_SIZE, keyset_page
+from ..routers.filters import StudentFilters
+from ..routers.loaders import STUDENT_OPTIONS
+from ..routers.rows import student_select
+from ..services.timetable import _timetable_query
+from ..services.transcript import _transcript_query
+from .test_sql_app import engine
+
+WEEK = (date(2030, 9, 2), date(2030, 9, 8))
+
+
+def student_page(**filters):
+    query = StudentFilters(**filters).apply(student_select())
+    return keyset_page(query, Student.id, DEFAULT_PAGE_SIZE, None)
+
+
+KEY_QUERIES = {
+    "course students": select(Student)
+    .join(students_courses, students_courses.c.student_id == Student.id)
+    .where(students_courses.c.course_id == 1)
+    .options(*STUDENT_OPTIONS),
+    "passport lookup": select(Student.id).filter_by(passport_id="0000"),
+    "group students": select(Student).where(Student.group_id == 1),
+    "course teachers": select(Teacher)
+    .join(teacher_course, teacher_course.c.teacher_id == Teacher.id)
+    .where(teacher_course.c.course_id == 1),
+    "course grades": select(CourseGrade).where(CourseGrade.course_id == 1),
+    "faculty courses": select(Course).where(Course.faculty_id == 1),
+    "group timetable": _timetable_query("group", 1, *WEEK),
+    "teacher timetable": _timetable_query("teacher", 1, *WEEK),
+    "auditory timetable": _timetable_query("auditory", 1, *WEEK),
+    "students of group": student_page(group_id=1),
+    "students of department": student_page(department_id=1),
+    "students of faculty": student_page(faculty_id=1),
+    "students of course": student_page(course_id=1),
+    "students born in range": student_page(
+        born_from=date(2000, 1, 1), born_to=date(2000, 12, 31)
+    ),
+    "students of faculty and course": student_page(faculty_id=1, course_id=1),
+    "student transcript": _transcript_query(1),
+}
+
+
+def query_plan(query) -> list[str]:
+    compiled = query.compile(engine)
+    parameters = tuple(compiled.params[name] for name in compiled.positiontup)
+    with engine.connect() as connection:
+        return [
+            row.detail
+            for row in connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {compiled}", parameters
+            )
+        ]
+
+
+@pytest.mark.parametrize("name", KEY_QUERIES)
+def test_key_queries_dont_scan_tables(name):
+    plan = query_plan(KEY_QUERIES[name])
+    assert not [step for step in plan if step.startswith("SCAN")], plan
@@ -0,0 +1,124 @@
+from threading import Event, Thread
+
+from sqlalchemy import select
+
+from ..models.education import Course, CourseGrade
+from ..models.structure import Department
+from ..models.users import Student
+from ..services import rankings
+from ..services.grade_stats import rebuild_grade_stats
+from ..services.rankings import RankingIndex
+from .test_query_counts import seed
+from .test_sql_app import TestingSessionLocal, client
+
+
+def ranks(url, **params):
+    response = client.get(url, params=params)
+    assert response.status_code == 200, response.text
+    ranking = response.json()
+    return ranking["total"], [
+        (student["rank"], student["id"], student["average"])
+        for student in ranking["students"]
+    ]
+
+
+def test_rankings_follow_grade_and_group_writes():
+    ids = seed("2018", 3)
+    db = TestingSessionLocal()
+    first, second, third = db.scalars(
+        select(Student.id)
+        .where(Student.passport_id.startswith("2018"))
+        .order_by(Student.id)
+    )
+    groups = [db.get(Student, id).group_id for id in (first, second, third)]
+    faculty_id = db.get(Department, ids["department"]).faculty_id
+    other_course = db.scalar(select(Course.id).filter_by(name="2018 course 1"))
+    db.close()
+    course = ids["course"]
+    url = f"/api/faculties/{faculty_id}/ranking"
+
+    client.post(
+        "/api/grades",
+        json={"student_id": first, "course_id": course, "score": 5},
+    )
+    client.post(
+        "/api/grades/bulk",
+        json=[
+            {"student_id": second, "course_id": course, "score": 4},
+            {"student_id": third, "course_id": course, "score": 2},
+            {"student_id": first, "course_id": other_course, "score": 3},
+        ],
+    )
+    assert ranks(url) == (
+        3,
+        [(1, first, 4.0), (1, second, 4.0), (3, third, 2.0)],
+    )
+
+    db = TestingSessionLocal()
+    grade_id = db.scalar(select(CourseGrade.id).filter_by(student_id=third))
+    db.close()
+    client.put(f"/api/grades/{grade_id}", json={"score": 5})
+    assert ranks(url, limit=1) == (3, [(1, third, 5.0)])
+    response = client.get(url, params={"student_id": second})
+    assert response.json()["student"] == {
+        "rank": 2,
+        "id": second,
+        "name": "2018 student",
+        "middle_name": "M",
+        "last_name": "L",
+        "average": 4.0,
+        "count": 1,
+    }
+
+    group_url = f"/api/groups/{groups[0]}/ranking"
+    assert ranks(group_url) == (1, [(1, first, 4.0)])
+    response = client.get(group_url, params={"student_id": third})
+    assert response.json()["student"] is None
+    client.patch(f"/api/students/{third}", json={"group_id": groups[0]})
+    assert ranks(group_url) == (2, [(1, third, 5.0), (2, first, 4.0)])
+    assert ranks(f"/api/groups/{groups[2]}/ranking") == (0, [])
+
+    department_url = f"/api/departments/{ids['department']}/ranking"
+    ranking = ranks(department_url)
+    db = TestingSessionLocal()
+    rebuild_grade_stats(db)
+    db.commit()
+    db.close()
+    assert ranks(department_url) == ranking
+
+
+def test_ranking_of_unknown_scope():
+    assert client.get("/api/groups/999999/ranking").status_code == 404
+    assert client.get("/api/faculties/999999/ranking").status_code == 404
+
+
+def test_rankings_are_served_while_rebuilt(monkeypatch):
+    ids = seed("2032", 1)
+    grade = {"student_id": ids["student"], "course_id": ids["course"]}
+    client.post("/api/grades", json=grade | {"score": 4})
+    url = f"/api/departments/{ids['department']}/ranking"
+    ranking = ranks(url)
+    db = TestingSessionLocal()
+    index = rankings._indexes[rankings._index_key(db)]
+    db.close()
+
+    reading, done = Event(), Event()
+    read = RankingIndex.read
+
+    def slow_read(session):
+        reading.set()
+        done.wait(5)
+        return read(session)
+
+    monkeypatch.setattr(RankingIndex, "read", staticmethod(slow_read))
+    index.stale = True
+    builder = Thread(target=ranks, args=(url,))
+    builder.start()
+    assert reading.wait(5)
+    # answered by the current rankings without waiting for the build
+    assert ranks(url) == ranking
+    assert index.building
+    done.set()
+    builder.join()
+    assert not index.building and not index.stale
+    assert ranks(url) == ranking
@@ -0,0 +1,186 @@
+import time as clock
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+
+from ..config import settings
+from ..models.buildings import Auditory, Building
+from ..models.education import (
+    Course,
+    CourseProgramm,
+    CourseProgrammTheme,
+    EducationPlan,
+    Lesson,
+    Schedule,
+    Semester,
+    TimeSlot,
+)
+from ..models.structure import Department, Faculty, Group
+from ..models.users import Teacher
+from ..services import scheduler
+from ..services.conflicts import LessonSlot, find_conflicts
+from ..services.scheduler import (
+    Demand,
+    Problem,
+    Solution,
+    solve,
+    write_timetable,
+)
+from .test_sql_app import TestingSessionLocal, client
+
+
+def test_solution_respects_exclusivity_and_weekly_lessons():
+    problem = Problem(
+        demands=[
+            Demand(group_id, course_id, 3)
+            for group_id in range(4)
+            for course_id in range(3)
+        ],
+        # teacher 0 has 12 of 15 slots of the week booked
+        teachers={0: [0], 1: [1, 2], 2: [2, 0]},
+        timeslots=[10, 20, 30],
+        auditories=[1, 2, 3],
+    )
+    solution = solve(problem)
+
+    assert solution.unplaced == []
+    assert Counter(
+        (lesson.group_id, lesson.course_id) for lesson in solution.placements
+    ) == {(demand.group_id, demand.course_id): 3 for demand in problem.demands}
+    slots = [
+        LessonSlot(id, lesson.weekday, lesson.timeslot_id, *resources)
+        for id, lesson in enumerate(solution.placements)
+        for resources in [(lesson.teacher_id, lesson.auditory_id)]
+    ]
+    assert find_conflicts(slots) == []
+    groups = Counter(
+        (lesson.group_id, lesson.weekday, lesson.timeslot_id)
+        for lesson in solution.placements
+    )
+    assert max(groups.values()) == 1
+
+
+def test_overbooked_lessons_are_reported():
+    problem = Problem(
+        demands=[Demand(1, 1, 4), Demand(2, 1, 4)],
+        teachers={1: [1]},
+        timeslots=[1],
+        auditories=[1, 2],
+        days=3,
+    )
+    solution = solve(problem)
+    assert len(solution.placements) == 3
+    assert sum(demand.weekly_lessons for demand in solution.unplaced) == 5
+
+
+def test_timetable_job_generates_semester_lessons():
+    db = TestingSessionLocal()
+    faculty = Faculty(name="Scheduler faculty")
+    department = Department(name="Scheduler", faculty=faculty)
+    semester = Semester(
+        start=datetime(2032, 9, 6), end=datetime(2032, 9, 19), number=1
+    )
+    courses = [
+        Course(name=f"Scheduler course {number}", faculty=faculty)
+        for number in range(2)
+    ]
+    # 4 lessons over two weeks of the semester, 2 lessons a week
+    CourseProgramm(
+        course=courses[0],
+        themes=[CourseProgrammTheme(duration=duration) for duration in (1, 3)],
+    )
+    teacher = Teacher(
+        name="T",
+        middle_name="T",
+        last_name="T",
+        birthdate=date(1970, 1, 1),
+        passport_id="6000 000001",
+        department=department,
+        courses=courses,
+    )
+    groups = [
+        Group(name=f"Scheduler group {number}", department=department)
+        for number in range(2)
+    ]
+    db.add_all(
+        [
+            teacher,
+            TimeSlot(name="scheduler 1", start=time(8), end=time(9)),
+            TimeSlot(name="scheduler 2", start=time(9), end=time(10)),
+            Auditory(room_number="1", building=Building(street="Scheduler")),
+            *[
+                EducationPlan(semester=semester, group=group, courses=courses)
+                for group in groups
+            ],
+        ]
+    )
+    db.commit()
+
+    response = client.post(f"/api/semesters/{semester.id}/timetable-jobs")
+    assert response.status_code == 202, response.text
+    job = response.json()
+    deadline = clock.monotonic() + 60
+    while job["status"] not in ("done", "failed"):
+        assert clock.monotonic() < deadline
+        clock.sleep(0.2)
+        job = client.get(f"/api/timetable-jobs/{job['id']}").json()
+
+    # one teacher and one auditory teach 8 lessons a week to both groups
+    assert job["status"] == "done", job
+    assert job["lessons"] == 16
+    assert job["unplaced"] == []
+    lessons = Counter(
+        db.query(Schedule.group_id, Lesson.course_id)
+        .join(Lesson.schedule)
+        .filter(Schedule.group_id.in_([group.id for group in groups]))
+    )
+    assert lessons == {
+        (group.id, course.id): 4 for group in groups for course in courses
+    }
+    response = client.get(f"/api/semesters/{semester.id}/conflicts")
+    assert response.json() == []
+    assert client.get("/api/timetable-jobs/unknown").status_code == 404
+    db.close()
+
+
+def test_finished_jobs_are_forgotten(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_FINISHED_JOBS", 2)
+    now = datetime.now()
+    finished = {
+        "expired": now - timedelta(seconds=settings.SCHEDULER_JOB_RETENTION),
+        "oldest": now - timedelta(seconds=3),
+        "older": now - timedelta(seconds=2),
+        "recent": now - timedelta(seconds=1),
+        "running": None,
+    }
+    monkeypatch.setattr(
+        scheduler,
+        "jobs",
+        {id: {"id": id, "finished": at} for id, at in finished.items()},
+    )
+    scheduler._prune_jobs()
+    assert set(scheduler.jobs) == {"older", "recent", "running"}
+
+
+def test_written_timetable_replaces_lessons_of_every_planned_group():
+    db = TestingSessionLocal()
+    semester = Semester(
+        start=datetime(2033, 9, 5), end=datetime(2033, 9, 9), number=1
+    )
+    department = Department(
+        name="Rewritten", faculty=Faculty(name="Rewritten faculty")
+    )
+    group = Group(name="Rewritten group", department=department)
+    schedule = Schedule(date=date(2033, 9, 6), group=group)
+    db.add_all(
+        [
+            EducationPlan(semester=semester, group=group),
+            Lesson(schedule=schedule),
+        ]
+    )
+    db.commit()
+
+    # none of the lessons of the group were placed this time
+    assert write_timetable(db, semester, Solution([], [])) == 0
+    db.commit()
+    assert db.query(Lesson).filter_by(schedule_id=schedule.id).count() == 0
+    db.close()
@@ -0,0 +1,105 @@
+from sqlalchemy import delete, update
+
+from ..models.users import Student, UnivercityVisitor
+from ..services.search import get_visitor_index
+from .test_sql_app import TestingSessionLocal, client
+
+
+def create_student(name, last_name, passport_id):
+    response = client.post(
+        "/api/students",
+        json={
+            "name": name,
+            "middle_name": "Searchovich",
+            "last_name": last_name,
+            "passport_id": passport_id,
+            "birthdate": "2001-01-01",
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def search(q, **params):
+    response = client.get("/api/visitors/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return [visitor["id"] for visitor in response.json()]
+
+
+def test_search_by_prefix_misspelling_and_passport():
+    # builds the index before the writes below
+    search("Zebulon")
+    first = create_student("Zebulon", "Quaintance", "2010 000001")
+    second = create_student("Zebulonia", "Quaintance", "2010 000002")
+
+    assert search("zebulon") == [first, second]
+    assert search("Zebul quain") == [first, second]
+    assert search("Zebulon", limit=1) == [first]
+    assert search("Quaintence") == [first, second]
+    assert search("2010 000002") == [second]
+    assert search("Zebulon", kind="teacher") == []
+
+    client.patch(f"/api/students/{first}", json={"name": "Yorick"})
+    assert search("zebulon") == [second]
+    assert search("yorick quaintance") == [first]
+
+    client.delete(f"/api/students/{second}")
+    assert search("Quaintance") == [first]
+
+
+def test_search_sees_bulk_imports():
+    search("Xanthippe")
+    response = client.post(
+        "/api/students/bulk",
+        json=[
+            {
+                "name": "Xanthippe",
+                "middle_name": "Searchovna",
+                "last_name": "Bulk",
+                "passport_id": "2011 000001",
+                "birthdate": "2001-01-01",
+            }
+        ],
+    )
+    id = response.json()["results"][0]["id"]
+
+    response = client.get("/api/visitors/search", params={"q": "xanth"})
+    assert response.json() == [
+        {
+            "id": id,
+            "kind": "student",
+            "name": "Xanthippe",
+            "middle_name": "Searchovna",
+            "last_name": "Bulk",
+            "passport_id": "2011 000001",
+        }
+    ]
+
+
+def test_core_writes_update_the_index_in_place():
+    search("Wilhelmina")
+    first = create_student("Wilhelmina", "Corewrite", "2031 000001")
+    second = create_student("Wilhelmina", "Corewrite", "2031 000002")
+    visitors = UnivercityVisitor.__table__
+    db = TestingSessionLocal()
+    index = get_visitor_index(db)
+
+    db.execute(
+        update(visitors)
+        .where(visitors.c.id == first)
+        .values(version=visitors.c.version + 1)
+    )
+    db.commit()
+    assert not index.stale
+    db.execute(
+        update(visitors).where(visitors.c.id == first).values(name="Ottoline")
+    )
+    students = Student.__table__
+    db.execute(delete(students).where(students.c.id == second))
+    db.execute(delete(visitors).where(visitors.c.id == second))
+    db.commit()
+    db.close()
+
+    assert not index.stale
+    assert search("wilhelmina") == []
+    assert search("ottoline corewrite") == [first]
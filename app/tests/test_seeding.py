@@ -0,0 +1,59 @@
+import re
+from datetime import timedelta
+from itertools import islice
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from ..database import Base
+from ..models.education import CourseGradeStats
+from ..models.users import UnivercityVisitor
+from ..services.conflicts import find_period_conflicts
+from ..services.seeding import (
+    SEMESTER_START,
+    SEMESTER_WEEKS,
+    dataset_size,
+    generate_rows,
+    seed_database,
+)
+from ..schemas.users_schemas import CreateStudentSchema
+
+
+def test_seeded_dataset_is_consistent():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        counts = seed_database(session, 500, seed=1)
+        session.commit()
+
+        size = dataset_size(500)
+        assert counts["visitors"] == 500 + size["teachers"]
+        assert counts["course_grades"] == counts["students_courses"]
+        assert counts["lessons"] > 0
+        passports = session.scalars(select(UnivercityVisitor.passport_id))
+        regex = CreateStudentSchema.__fields__["passport_id"].field_info.regex
+        assert all(re.match(regex, passport) for passport in passports)
+        assert (
+            session.scalar(select(func.sum(CourseGradeStats.count)))
+            == counts["course_grades"]
+        )
+        assert (
+            find_period_conflicts(
+                session,
+                SEMESTER_START,
+                SEMESTER_START + timedelta(weeks=SEMESTER_WEEKS),
+            )
+            == []
+        )
+
+        with pytest.raises(ValueError):
+            seed_database(session, 500)
+
+
+def test_rows_depend_on_seed_only():
+    def rows(seed):
+        return list(islice(generate_rows(300, seed), 5000))
+
+    assert rows(1) == rows(1)
+    assert rows(1) != rows(2)
@@ -0,0 +1,56 @@
+from datetime import date
+
+import pytest
+
+from ..config import settings
+from ..models.users import Student
+from .test_query_counts import seed
+from .test_sql_app import TestingSessionLocal, client
+
+
+@pytest.fixture(scope="module")
+def ids():
+    ids = seed("2004", 3)
+    db = TestingSessionLocal()
+    db.add(
+        Student(
+            name="2004 student",
+            middle_name="M",
+            last_name="L",
+            birthdate=date(2000, 1, 1),
+            passport_id="2004 100000",
+        )
+    )
+    db.commit()
+    db.close()
+    return ids
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/students?limit=2",
+        "/api/students?limit=1000",
+        "/api/teachers?limit=2",
+        "/api/teachers?limit=1000",
+        "/api/courses/{course}/students/",
+    ],
+)
+def test_fast_path_is_byte_identical(ids, url, monkeypatch):
+    url = url.format(**ids)
+    monkeypatch.setattr(settings, "FAST_SERIALIZATION", False)
+    expected = client.get(url)
+    monkeypatch.setattr(settings, "FAST_SERIALIZATION", True)
+    response = client.get(url)
+
+    assert response.status_code == expected.status_code
+    assert response.content == expected.content
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_fast_path_pages(ids, monkeypatch):
+    monkeypatch.setattr(settings, "FAST_SERIALIZATION", True)
+    page = client.get("/api/students?limit=2").json()
+    assert page["next"]
+    next_page = client.get(page["next"]).json()
+    assert next_page["items"][0]["id"] > page["items"][-1]["id"]
@@ -16,6 +16,7 @@ TestingSessionLocal = sessionmaker(
 )
 
 
+Base.metadata.drop_all(bind=engine)
 Base.metadata.create_all(bind=engine)
 
 
@@ -34,7 +35,7 @@ client = TestClient(app)
 
 def test_create_user():
     response = client.post(
-        "/students/",
+        "/api/students",
         json={
             "name": "string",
             "middle_name": "string",
@@ -43,6 +44,36 @@ def test_create_user():
             "birthdate": "2023-06-11",
         },
     )
-    assert response.status_code == 200, response.text
+    assert response.status_code == 201, response.text
     data = response.json()
     assert data["passport_id"] == "7124 391808"
+
+
+def test_students_are_paginated_by_cursor():
+    for number in range(3):
+        client.post(
+            "/api/students",
+            json={
+                "name": "Student",
+                "middle_name": "string",
+                "last_name": "string",
+                "passport_id": f"1000 00000{number}",
+                "birthdate": "2000-01-01",
+            },
+        )
+
+    ids = []
+    url = "/api/students?limit=2"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["items"]) <= 2
+        ids += [student["id"] for student in page["items"]]
+        url = page["next"]
+
+    assert ids == sorted(ids)
+    assert len(ids) == len(set(ids)) >= 3
+
+    response = client.get("/api/students?after=not-a-cursor")
+    assert response.status_code == 400
@@ -0,0 +1,86 @@
+from datetime import date
+
+import pytest
+
+from ..config import settings
+from ..models.education import Course
+from ..models.structure import Department, Faculty, Group
+from ..models.users import Student
+from .test_sql_app import TestingSessionLocal, client
+
+
+@pytest.fixture(scope="module")
+def ids():
+    db = TestingSessionLocal()
+    groups = []
+    for number in range(2):
+        faculty = Faculty(name=f"Filters faculty {number}")
+        department = Department(
+            name=f"Filters department {number}", faculty=faculty
+        )
+        groups.append(
+            Group(name=f"Filters group {number}", department=department)
+        )
+    course = Course(
+        name="Filters course", faculty=groups[0].department.faculty
+    )
+    students = [
+        Student(
+            name="Filtered",
+            middle_name="M",
+            last_name="L",
+            passport_id=f"2012 {number:06}",
+            birthdate=birthdate,
+            group=group,
+            courses=courses,
+        )
+        for number, (group, birthdate, courses) in enumerate(
+            [
+                (groups[0], date(1990, 1, 1), [course]),
+                (groups[0], date(1992, 1, 1), []),
+                (groups[1], date(1990, 6, 1), [course]),
+            ]
+        )
+    ]
+    db.add_all(students)
+    db.commit()
+    ids = {
+        "students": [student.id for student in students],
+        "group": groups[0].id,
+        "department": groups[0].department_id,
+        "faculty": groups[0].department.faculty_id,
+        "course": course.id,
+    }
+    db.close()
+    return ids
+
+
+def student_ids(**params) -> list[int]:
+    ids, url = [], "/api/students"
+    while url:
+        response = client.get(url, params=params | {"limit": 1})
+        assert response.status_code == 200, response.text
+        ids += [student["id"] for student in response.json()["items"]]
+        url, params = response.json()["next"], {}
+    return ids
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_filters_combine_with_pagination(ids, fast, monkeypatch):
+    monkeypatch.setattr(settings, "FAST_SERIALIZATION", fast)
+    first, second, third = ids["students"]
+
+    assert student_ids(group_id=ids["group"]) == [first, second]
+    assert student_ids(department_id=ids["department"]) == [first, second]
+    assert student_ids(faculty_id=ids["faculty"]) == [first, second]
+    assert student_ids(course_id=ids["course"]) == [first, third]
+    assert student_ids(course_id=ids["course"], faculty_id=ids["faculty"]) == [
+        first
+    ]
+    assert student_ids(born_from="1990-01-01", born_to="1990-12-31") == [
+        first,
+        third,
+    ]
+    assert student_ids(born_from="1991-01-01", group_id=ids["group"]) == [
+        second
+    ]
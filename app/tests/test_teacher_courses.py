@@ -0,0 +1,107 @@
+from sqlalchemy import select
+
+from ..models.education import Course
+from ..models.users import Teacher
+from .test_query_counts import count_statements, seed
+from .test_sql_app import TestingSessionLocal, client
+
+
+def ids_of(model, prefix: str) -> list[int]:
+    db = TestingSessionLocal()
+    ids = list(
+        db.scalars(
+            select(model.id)
+            .where(model.name.startswith(prefix))
+            .order_by(model.id)
+        )
+    )
+    db.close()
+    return ids
+
+
+def writes(statements: list[str]) -> list[str]:
+    """teacher_course statements which aren't reads"""
+    return [
+        statement.split()[0]
+        for statement in statements
+        if "teacher_course" in statement and not statement.startswith("SELECT")
+    ]
+
+
+def patch_courses(teacher_id: int, courses: list[int]):
+    with count_statements() as statements:
+        response = client.patch(
+            f"/api/teachers/{teacher_id}", json={"courses": courses}
+        )
+    assert response.status_code == 200, response.text
+    return response, statements
+
+
+def test_teacher_courses_are_written_by_difference():
+    ids = seed("2027", 1)
+    courses = ids_of(Course, "2027")
+    url = f"/api/teachers/{ids['teacher']}"
+    tag = client.get(url).headers["etag"]
+
+    response, statements = patch_courses(ids["teacher"], courses)
+    assert writes(statements) == []
+    assert response.headers["etag"] == tag
+
+    response, statements = patch_courses(ids["teacher"], courses[1:2])
+    assert writes(statements) == ["DELETE"]
+    # the courses are loaded for the response only
+    assert sum("courses.name" in statement for statement in statements) == 1
+    assert any(s.startswith("UPDATE visitors SET version") for s in statements)
+    assert [course["name"] for course in response.json()["courses"]] == [
+        "2027 course 1"
+    ]
+    assert response.headers["etag"] != tag
+
+    response, statements = patch_courses(ids["teacher"], courses[:2])
+    assert writes(statements) == ["INSERT"]
+    assert len(response.json()["courses"]) == 2
+
+    other = seed("2028", 1)
+    response = client.patch(url, json={"courses": [other["course"]]})
+    assert response.status_code == 400
+    assert len(client.get(url).json()["courses"]) == 2
+
+
+def test_bulk_assign_teachers():
+    ids = seed("2029", 2)
+    teachers = ids_of(Teacher, "2029")
+    db = TestingSessionLocal()
+    faculty_id = db.get(Course, ids["course"]).faculty_id
+    course = Course(name="2029 new course", faculty_id=faculty_id)
+    db.add(course)
+    db.commit()
+    url = f"/api/courses/{course.id}/teachers:bulkAssign"
+    db.close()
+
+    with count_statements() as statements:
+        response = client.post(url, json={"teacher_ids": teachers[:1]})
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "assigned": teachers[:1],
+        "already_assigned": [],
+    }
+    # one query checks all the teachers against the faculty
+    assert sum("departments" in s for s in statements) == 1
+
+    response = client.post(url, json={"teacher_ids": teachers})
+    assert response.json() == {
+        "assigned": teachers[1:],
+        "already_assigned": teachers[:1],
+    }
+    teacher = client.get(f"/api/teachers/{teachers[1]}").json()
+    assert teacher["courses"][-1]["name"] == "2029 new course"
+
+    other = seed("2030", 1)
+    response = client.post(url, json={"teacher_ids": [other["teacher"]]})
+    assert response.status_code == 400
+    assert str(other["teacher"]) in response.json()["detail"]
+    response = client.post(
+        "/api/courses/999999/teachers:bulkAssign", json={"teacher_ids": [1]}
+    )
+    assert response.status_code == 404
+    assert client.post(url, json={"teacher_ids": []}).status_code == 422
@@ -0,0 +1,81 @@
+from datetime import date, time
+
+from ..models.buildings import Auditory, Building
+from ..models.education import Course, Lesson, Schedule, TimeSlot
+from ..models.structure import Department, Faculty, Group
+from ..models.users import Teacher
+from .test_query_counts import count_statements
+from .test_sql_app import TestingSessionLocal, client
+
+
+def test_timetables_are_served_by_one_query_and_cached():
+    db = TestingSessionLocal()
+    faculty = Faculty(name="Timetable faculty")
+    department = Department(name="Timetable", faculty=faculty)
+    group = Group(name="Timetable group", department=department)
+    teacher = Teacher(
+        name="T",
+        middle_name="T",
+        last_name="T",
+        birthdate=date(1970, 1, 1),
+        passport_id="4000 000001",
+        department=department,
+    )
+    auditory = Auditory(room_number="101", building=Building(street="S"))
+    course = Course(name="Timetable course", faculty=faculty)
+    first = TimeSlot(name="first", start=time(9), end=time(10, 30))
+    second = TimeSlot(name="second", start=time(10, 40), end=time(12, 10))
+    monday = Schedule(date=date(2030, 9, 2), group=group)
+    next_monday = Schedule(date=date(2030, 9, 9), group=group)
+    lesson = dict(course=course, teacher=teacher, auditory=auditory)
+    db.add_all(
+        [
+            Lesson(schedule=monday, timeslot=second, **lesson),
+            Lesson(schedule=monday, timeslot=first, **lesson),
+            Lesson(schedule=next_monday, timeslot=first, **lesson),
+        ]
+    )
+    db.commit()
+
+    urls = [
+        f"/api/groups/{group.id}/timetable",
+        f"/api/teachers/{teacher.id}/timetable",
+        f"/api/auditories/{auditory.id}/timetable",
+    ]
+    for url in urls:
+        with count_statements() as statements:
+            response = client.get(f"{url}?date_from=2030-09-01")
+        assert response.status_code == 200, response.text
+        assert [lesson["timeslot"]["name"] for lesson in response.json()] == [
+            "first",
+            "second",
+        ]
+        assert len(statements) == 1
+
+        with count_statements() as statements:
+            response = client.get(
+                f"{url}?date_from=2030-09-02&date_to=2030-09-15"
+            )
+        assert len(response.json()) == 3
+        # the week of 2 September comes from the cache
+        assert len(statements) == 1
+
+    db.add(Lesson(schedule=next_monday, timeslot=second, **lesson))
+    db.commit()
+    for url in urls:
+        response = client.get(f"{url}?date_from=2030-09-09")
+        assert len(response.json()) == 2
+
+    course.name = "Renamed timetable course"
+    teacher.last_name = "Renamed"
+    db.commit()
+    for url in urls:
+        response = client.get(f"{url}?date_from=2030-09-09")
+        lessons = response.json()
+        assert lessons[0]["course"]["name"] == "Renamed timetable course"
+        assert lessons[0]["teacher"]["last_name"] == "Renamed"
+
+    response = client.get(f"{urls[0]}?date_from=2030-09-09&date_to=2030-09-01")
+    assert response.status_code == 400
+    assert client.get("/api/groups/100000/timetable").status_code == 404
+    db.close()
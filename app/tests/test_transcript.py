@@ -0,0 +1,133 @@
+from datetime import datetime
+
+from sqlalchemy import select
+
+from ..models.education import (
+    Course,
+    CourseGrade,
+    EducationPlan,
+    Exam,
+    ExamGrade,
+    Semester,
+)
+from ..models.users import Student
+from .test_query_counts import count_statements, seed
+from .test_sql_app import TestingSessionLocal, client
+
+
+def seed_transcript(prefix: str) -> dict:
+    ids = seed(prefix, 1)
+    db = TestingSessionLocal()
+    student = db.get(Student, ids["student"])
+    first, second, third = db.scalars(
+        select(Course)
+        .where(Course.name.startswith(f"{prefix} course"))
+        .order_by(Course.id)
+    )
+    autumn = Semester(
+        number=1, start=datetime(2025, 9, 1), end=datetime(2025, 12, 31)
+    )
+    spring = Semester(
+        number=2, start=datetime(2026, 2, 1), end=datetime(2026, 6, 30)
+    )
+    db.add(
+        EducationPlan(semester=autumn, group=student.group, courses=[first])
+    )
+    exam = Exam(course=second, start=datetime(2026, 6, 10, 10))
+    grades = [
+        CourseGrade(student=student, course=first, score=5),
+        CourseGrade(student=student, course=third, score=2),
+        ExamGrade(student=student, exam=exam, score=4),
+        ExamGrade(student=student, exam=exam, score=3),
+    ]
+    db.add_all([spring, *grades])
+    db.commit()
+    ids.update(
+        courses=[first.id, second.id, third.id],
+        semesters=[autumn.id, spring.id],
+        exam=exam.id,
+        grades=[grade.id for grade in grades],
+    )
+    db.close()
+    return ids
+
+
+def test_transcript_by_semester_from_one_query():
+    ids = seed_transcript("2015")
+    url = f"/api/students/{ids['student']}/transcript"
+    with count_statements() as statements:
+        response = client.get(url)
+    assert response.status_code == 200, response.text
+    assert len(statements) == 1
+
+    transcript = response.json()
+    autumn, spring, unplanned = transcript["semesters"]
+    assert [autumn["id"], spring["id"], unplanned["id"]] == [
+        *ids["semesters"],
+        None,
+    ]
+    assert autumn["course_grades"] == [
+        {
+            "id": ids["grades"][0],
+            "course": {"id": ids["courses"][0], "name": "2015 course 0"},
+            "score": 5,
+        }
+    ]
+    assert autumn["exam_grades"] == []
+    assert autumn["course_average"] == 5
+    assert autumn["exam_average"] is None
+
+    # the exam course is in no plan, the exam date is in the spring
+    assert [grade["score"] for grade in spring["exam_grades"]] == [4, 3]
+    assert spring["exam_grades"][0]["exam_id"] == ids["exam"]
+    assert spring["exam_grades"][0]["date"] == "2026-06-10T10:00:00"
+    assert spring["exam_average"] == 3.5
+    assert spring["average"] == 3.5
+
+    assert unplanned["course_grades"][0]["score"] == 2
+    assert transcript["average"] == 3.5
+
+    with count_statements() as statements:
+        assert client.get(url).json() == transcript
+    assert statements == []
+
+
+def test_grade_writes_invalidate_transcript():
+    ids = seed_transcript("2016")
+    url = f"/api/students/{ids['student']}/transcript"
+    assert client.get(url).json()["semesters"][0]["course_average"] == 5
+
+    response = client.put(f"/api/grades/{ids['grades'][0]}", json={"score": 1})
+    assert response.status_code == 200
+    assert client.get(url).json()["semesters"][0]["course_average"] == 1
+
+    client.post(
+        "/api/grades/bulk",
+        json=[
+            {
+                "student_id": ids["student"],
+                "course_id": ids["courses"][0],
+                "score": 4,
+            }
+        ],
+    )
+    assert client.get(url).json()["semesters"][0]["course_average"] == 4
+
+    db = TestingSessionLocal()
+    db.delete(db.get(ExamGrade, ids["grades"][2]))
+    db.commit()
+    db.close()
+    spring = client.get(url).json()["semesters"][1]
+    assert spring["exam_average"] == 3
+
+
+def test_transcript_without_grades():
+    student_id = seed("2017", 1)["student"]
+    response = client.get(f"/api/students/{student_id}/transcript")
+    assert response.json() == {
+        "student_id": student_id,
+        "semesters": [],
+        "average": None,
+    }
+    response = client.get("/api/students/999999/transcript")
+    assert response.status_code == 404
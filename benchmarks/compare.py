@@ -0,0 +1,78 @@
+"""Compare two result files of benchmarks.endpoints:
+
+    python -m benchmarks.compare before.json after.json --threshold 10
+
+Prints relative change of every metric and exits with status 1 if any
+endpoint got slower, or runs more SQL statements, beyond the threshold.
+"""
+
+import argparse
+import json
+
+# metrics and whether the bigger value is the better one
+METRICS = {
+    "p50_ms": False,
+    "p99_ms": False,
+    "throughput_rps": True,
+    "statements_per_request": False,
+    "peak_rss_mb": False,
+}
+
+
+def change(before: float, after: float) -> float:
+    if before == 0:
+        return 0.0 if after == 0 else float("inf")
+    return (after - before) / before * 100
+
+
+def compare(before: dict, after: dict, threshold: float) -> list[str]:
+    """Prints the comparison table and returns regressions."""
+    regressions = []
+    print(f"{'endpoint':32}" + "".join(f"{name:>29}" for name in METRICS))
+    for endpoint, old in before["endpoints"].items():
+        new = after["endpoints"].get(endpoint)
+        if new is None:
+            continue
+        cells = []
+        for metric, higher_is_better in METRICS.items():
+            percent = change(old[metric], new[metric])
+            worse = -percent if higher_is_better else percent
+            mark = "!" if worse > threshold else " "
+            if worse > threshold:
+                regressions.append(f"{endpoint} {metric} {percent:+.1f}%")
+            cells.append(
+                f"{old[metric]:>9} -> {new[metric]:<9}{percent:+6.1f}%{mark}"
+            )
+        print(f"{endpoint:32}" + "".join(cells))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10,
+        help="percent of change reported as regression",
+    )
+    args = parser.parse_args()
+
+    with open(args.before) as before, open(args.after) as after:
+        before, after = json.load(before), json.load(after)
+    for report in (before, after):
+        meta = report["meta"]
+        print(
+            f"{meta['commit']} {meta['tier']} on {meta['database']}, "
+            f"{meta['created']}"
+        )
+
+    regressions = compare(before, after, args.threshold)
+    if regressions:
+        print("\nregressions:\n" + "\n".join(regressions))
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Time the timetable conflict detector on a synthetic semester.
+
+Generates lessons of the given number of groups over 18 weeks, with a
+small share of lessons moved to a random teacher and auditory, and times
+the single pass of find_conflicts over them:
+
+    python -m benchmarks.conflicts --groups 1000 --lessons-per-day 4
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from app.services.conflicts import LessonSlot, find_conflicts
+
+WEEKS = 18
+
+
+def generate(groups: int, lessons_per_day: int, clash_rate: float, seed):
+    """Every group has its own auditory and teachers rotate between the
+    groups, so only the randomly rebooked lessons clash."""
+    randomizer = random.Random(seed)
+    first_day = date(2030, 9, 2)
+    slots = []
+    for day in range(WEEKS * 7):
+        if day % 7 >= 5:
+            continue
+        current = first_day + timedelta(days=day)
+        for group in range(groups):
+            for timeslot in range(lessons_per_day):
+                teacher, auditory = (group + timeslot) % groups, group
+                if randomizer.random() < clash_rate:
+                    teacher = randomizer.randrange(groups)
+                    auditory = randomizer.randrange(groups)
+                slots.append(
+                    LessonSlot(
+                        len(slots), current, timeslot, teacher, auditory
+                    )
+                )
+    return slots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--groups", type=int, default=1000)
+    parser.add_argument("--lessons-per-day", type=int, default=4)
+    parser.add_argument("--clash-rate", type=float, default=0.001)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    slots = generate(
+        arguments.groups,
+        arguments.lessons_per_day,
+        arguments.clash_rate,
+        arguments.seed,
+    )
+    timings = []
+    for _ in range(arguments.repeat):
+        started = time.perf_counter()
+        conflicts = find_conflicts(slots)
+        timings.append(time.perf_counter() - started)
+
+    print(
+        f"{len(slots)} lessons, {len(conflicts)} conflicts, "
+        f"best {min(timings):.3f}s, "
+        f"{len(slots) / min(timings):,.0f} lessons/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
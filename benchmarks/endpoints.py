@@ -0,0 +1,501 @@
+"""Benchmark the API endpoints on a seeded dataset.
+
+Seeds the dataset of the tier into the database (once, the database is
+reused by later runs), drives every endpoint in process and writes
+latency percentiles, throughput, SQL statements per request and peak RSS
+of every endpoint to a JSON file. Every endpoint is driven by a fresh
+process, so that its peak RSS doesn't include the peaks of the others:
+
+    python -m benchmarks.endpoints --tier 100k --output before.json
+    python -m benchmarks.endpoints --tier 100k --output after.json
+    python -m benchmarks.compare before.json after.json
+
+The database is SQLite file benchmark-<tier>.db unless --database-url
+points to e.g. a local Postgres database.
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, func, make_url, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import Base, get_db
+from app.main import app
+from app.models.users import UnivercityVisitor
+from app.services.seeding import (
+    LAST_NAMES,
+    NAMES,
+    SEMESTER_START,
+    dataset_size,
+    seed_database,
+)
+
+TIERS = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+# unseeded, new visitors of every run need new passports
+_passports = random.Random()
+
+
+def new_passport_id() -> str:
+    # series 9xxx are not used by the seeded visitors
+    return f"9{_passports.randrange(1000):03} {_passports.randrange(10**6):06}"
+
+
+# method, url and JSON body of a request
+Request = tuple[str, str, dict | None]
+
+# A scenario gives the request of one iteration, or a list of requests
+# whose last one is measured. The earlier ones prepare it, and a
+# callable in the list makes its request from the JSON response of the
+# previous one, e.g. to delete the student created by it.
+Step = Request | Callable[[dict], Request]
+Scenario = Callable[[random.Random], Request | list[Step]]
+
+# Endpoints without a scenario:
+# - POST /semesters/{id}/timetable-jobs and GET /timetable-jobs/{id}:
+#   the job runs the solver in a worker process after the response, see
+#   benchmarks.scheduler for the solver timings
+# - GET /_internal/pool, GET /_internal/cache and GET /metrics: process
+#   introspection for operators, not served to the API clients
+EXCLUDED_ENDPOINTS = (
+    "POST /semesters/{id}/timetable-jobs",
+    "GET /timetable-jobs/{id}",
+    "GET /_internal/pool",
+    "GET /_internal/cache",
+    "GET /metrics",
+)
+
+
+def scenarios(students: int) -> dict[str, Scenario]:
+    """Requests of every endpoint to the seeded ids."""
+    size = dataset_size(students)
+    # the seeded lessons
+    week = f"date_from={SEMESTER_START}"
+
+    def student(randomizer):
+        return randomizer.randint(1, students)
+
+    def teacher(randomizer):
+        return randomizer.randint(students + 1, students + size["teachers"])
+
+    def course(randomizer):
+        return randomizer.randint(1, size["courses"])
+
+    def group(randomizer):
+        return randomizer.randint(1, size["groups"])
+
+    def department(randomizer):
+        return randomizer.randint(1, size["departments"])
+
+    def faculty(randomizer):
+        return randomizer.randint(1, size["faculties"])
+
+    def auditory(randomizer):
+        return randomizer.randint(1, size["auditories"])
+
+    def grade(randomizer):
+        return randomizer.randint(1, students * 5)
+
+    def new_visitor(randomizer):
+        return {
+            "name": "Bench",
+            "middle_name": "Bench",
+            "last_name": "Bench",
+            "birthdate": "2000-01-01",
+            "passport_id": new_passport_id(),
+        }
+
+    def new_student(randomizer) -> Request:
+        return (
+            "POST",
+            "/api/students",
+            new_visitor(randomizer) | {"group_id": group(randomizer)},
+        )
+
+    # the seeded teachers of department 1 teach courses of faculty 1
+    def new_teacher(randomizer) -> Request:
+        return (
+            "POST",
+            "/api/teachers",
+            new_visitor(randomizer) | {"department_id": 1, "courses": [1, 2]},
+        )
+
+    return {
+        "GET /students": lambda r: ("GET", "/api/students", None),
+        # sparse fieldsets next to the full lists above
+        "GET /students?fields=id,name,last_name": lambda r: (
+            "GET",
+            "/api/students?fields=id,name,last_name",
+            None,
+        ),
+        "GET /students?include=group": lambda r: (
+            "GET",
+            "/api/students?include=group",
+            None,
+        ),
+        "GET /students/{id}": lambda r: (
+            "GET",
+            f"/api/students/{student(r)}",
+            None,
+        ),
+        "POST /students": new_student,
+        "PATCH /students/{id}": lambda r: (
+            "PATCH",
+            f"/api/students/{student(r)}",
+            {"group_id": group(r)},
+        ),
+        "PUT /students/{id}": lambda r: (
+            "PUT",
+            f"/api/students/{student(r)}",
+            new_visitor(r) | {"group_id": group(r)},
+        ),
+        "DELETE /students/{id}": lambda r: [
+            new_student(r),
+            lambda student: ("DELETE", f"/api/students/{student['id']}", None),
+        ],
+        "POST /students/bulk": lambda r: (
+            "POST",
+            "/api/students/bulk",
+            [new_visitor(r) | {"group_id": group(r)} for _ in range(100)],
+        ),
+        "POST /students:batchGet": lambda r: (
+            "POST",
+            "/api/students:batchGet",
+            {"ids": [student(r) for _ in range(100)]},
+        ),
+        "GET /teachers": lambda r: ("GET", "/api/teachers", None),
+        "GET /teachers?fields=id,name,last_name": lambda r: (
+            "GET",
+            "/api/teachers?fields=id,name,last_name",
+            None,
+        ),
+        "GET /teachers/{id}": lambda r: (
+            "GET",
+            f"/api/teachers/{teacher(r)}",
+            None,
+        ),
+        "POST /teachers": new_teacher,
+        "PATCH /teachers/{id}": lambda r: (
+            "PATCH",
+            f"/api/teachers/{teacher(r)}",
+            {"name": "Bench"},
+        ),
+        "PUT /teachers/{id}": lambda r: [
+            new_teacher(r),
+            lambda teacher: (
+                "PUT",
+                f"/api/teachers/{teacher['id']}",
+                new_visitor(r) | {"department_id": 1, "courses": [2, 3]},
+            ),
+        ],
+        "POST /teachers:batchGet": lambda r: (
+            "POST",
+            "/api/teachers:batchGet",
+            {"ids": [teacher(r) for _ in range(100)]},
+        ),
+        "GET /courses/{id}": lambda r: (
+            "GET",
+            f"/api/courses/{course(r)}",
+            None,
+        ),
+        "POST /courses": lambda r: (
+            "POST",
+            "/api/courses",
+            {"name": f"Bench {new_passport_id()}", "faculty_id": faculty(r)},
+        ),
+        "POST /courses:batchGet": lambda r: (
+            "POST",
+            "/api/courses:batchGet",
+            {"ids": [course(r) for _ in range(100)]},
+        ),
+        "POST /courses/{id}/teachers:bulkAssign": lambda r: [
+            new_teacher(r),
+            lambda teacher: (
+                "POST",
+                "/api/courses/3/teachers:bulkAssign",
+                {"teacher_ids": [teacher["id"]]},
+            ),
+        ],
+        "GET /courses/{id}/students": lambda r: (
+            "GET",
+            f"/api/courses/{course(r)}/students/",
+            None,
+        ),
+        "GET /courses/{id}/grade-stats": lambda r: (
+            "GET",
+            f"/api/courses/{course(r)}/grade-stats",
+            None,
+        ),
+        "POST /grades": lambda r: [
+            new_student(r),
+            lambda student: (
+                "POST",
+                "/api/grades",
+                {
+                    "student_id": student["id"],
+                    "course_id": course(r),
+                    "score": r.randrange(6),
+                },
+            ),
+        ],
+        "PUT /grades/{id}": lambda r: (
+            "PUT",
+            f"/api/grades/{grade(r)}",
+            {"score": r.randrange(6)},
+        ),
+        "POST /grades/bulk": lambda r: (
+            "POST",
+            "/api/grades/bulk",
+            [
+                {
+                    "student_id": student(r),
+                    "course_id": course(r),
+                    "score": r.randrange(6),
+                }
+                for _ in range(100)
+            ],
+        ),
+        "GET /courses/{id}/students/export": lambda r: (
+            "GET",
+            f"/api/courses/{course(r)}/students/export",
+            None,
+        ),
+        "GET /faculties/{id}/grades/export": lambda r: (
+            "GET",
+            f"/api/faculties/{faculty(r)}/grades/export",
+            None,
+        ),
+        "GET /students/{id}/transcript": lambda r: (
+            "GET",
+            f"/api/students/{student(r)}/transcript",
+            None,
+        ),
+        "GET /groups/{id}/ranking": lambda r: (
+            "GET",
+            f"/api/groups/{group(r)}/ranking",
+            None,
+        ),
+        "GET /departments/{id}/ranking": lambda r: (
+            "GET",
+            f"/api/departments/{department(r)}/ranking",
+            None,
+        ),
+        "GET /faculties/{id}/ranking": lambda r: (
+            "GET",
+            f"/api/faculties/{faculty(r)}/ranking?student_id={student(r)}",
+            None,
+        ),
+        "GET /groups/{id}/timetable": lambda r: (
+            "GET",
+            f"/api/groups/{group(r)}/timetable?{week}",
+            None,
+        ),
+        "GET /teachers/{id}/timetable": lambda r: (
+            "GET",
+            f"/api/teachers/{teacher(r)}/timetable?{week}",
+            None,
+        ),
+        "GET /auditories/{id}/timetable": lambda r: (
+            "GET",
+            f"/api/auditories/{auditory(r)}/timetable?{week}",
+            None,
+        ),
+        # the only seeded semester
+        "GET /semesters/{id}/conflicts": lambda r: (
+            "GET",
+            "/api/semesters/1/conflicts",
+            None,
+        ),
+        "GET /visitors/search": lambda r: (
+            "GET",
+            f"/api/visitors/search?q={r.choice(NAMES)[:3]}"
+            f"+{r.choice(LAST_NAMES)}",
+            None,
+        ),
+    }
+
+
+def _seed(database_url: str, students: int, seed: int):
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        if not session.scalar(
+            select(func.count()).select_from(UnivercityVisitor)
+        ):
+            started = time.perf_counter()
+            seed_database(session, students, seed)
+            session.commit()
+            print(
+                f"seeded {students} students "
+                f"in {time.perf_counter() - started:.0f}s"
+            )
+    engine.dispose()
+
+
+def peak_rss_mb() -> float:
+    # kilobytes on Linux, the peak over the life of the process
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_endpoint(
+    client: TestClient,
+    scenario: Scenario,
+    requests: int,
+    statements: list,
+    seed: int,
+) -> dict:
+    randomizer = random.Random(seed)
+    latencies = []
+    errors = 0
+    measured_statements = 0
+    for _ in range(requests):
+        steps = scenario(randomizer)
+        if not isinstance(steps, list):
+            steps = [steps]
+        previous = None
+        # the preparing requests are left out of all the metrics
+        for step in steps[:-1]:
+            method, url, body = step(previous) if callable(step) else step
+            previous = client.request(method, url, json=body).json()
+        step = steps[-1]
+        method, url, body = step(previous) if callable(step) else step
+
+        statements.clear()
+        request_started = time.perf_counter()
+        response = client.request(method, url, json=body)
+        latencies.append(time.perf_counter() - request_started)
+        measured_statements += len(statements)
+        if response.status_code >= 400:
+            errors += 1
+    elapsed = sum(latencies)
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(
+            latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000, 2
+        ),
+        "statements_per_request": round(measured_statements / requests, 2),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def measure_endpoint(
+    database_url: str,
+    students: int,
+    name: str,
+    requests: int,
+    warmup: int,
+    seed: int,
+) -> dict:
+    """Drives the endpoint of the scenario, run in a process of its own."""
+    engine = create_engine(database_url)
+    BenchmarkSession = sessionmaker(autocommit=False, autoflush=False)
+    BenchmarkSession.configure(bind=engine)
+
+    def get_benchmark_db():
+        with BenchmarkSession() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = get_benchmark_db
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+
+    scenario = scenarios(students)[name]
+    with TestClient(app, raise_server_exceptions=False) as client:
+        run_endpoint(client, scenario, warmup, statements, -1)
+        return run_endpoint(client, scenario, requests, statements, seed)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--tier", choices=TIERS, default="1k")
+    parser.add_argument("--database-url")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--endpoint", action="append", dest="endpoints")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args()
+
+    students = TIERS[args.tier]
+    database_url = args.database_url or f"sqlite:///./benchmark-{args.tier}.db"
+
+    # seeding runs in its own process to keep it out of the peak RSS
+    seeder = multiprocessing.get_context("spawn").Process(
+        target=_seed, args=(database_url, students, args.seed)
+    )
+    seeder.start()
+    seeder.join()
+    if seeder.exitcode:
+        raise SystemExit("Seeding failed")
+
+    results = {}
+    for name in scenarios(students):
+        if args.endpoints and name not in args.endpoints:
+            continue
+        with ProcessPoolExecutor(
+            1, mp_context=multiprocessing.get_context("spawn")
+        ) as process:
+            results[name] = process.submit(
+                measure_endpoint,
+                database_url,
+                students,
+                name,
+                args.requests,
+                args.warmup,
+                args.seed,
+            ).result()
+        print(f"{name}: {json.dumps(results[name])}")
+
+    report = {
+        "meta": {
+            "tier": args.tier,
+            "students": students,
+            "database": make_url(database_url).get_backend_name(),
+            "commit": git_commit(),
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+        },
+        "endpoints": results,
+    }
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Compare memory of the streaming roster export with the list endpoint.
+
+For every size, seeds the students into a temporary SQLite database,
+enrolls all of them into one course and reports the time to the first
+chunk, the total time and the peak of traced Python allocations of
+GET /courses/{id}/students/export against building the response of
+GET /courses/{id}/students/ from ORM objects:
+
+    python -m benchmarks.exports --students 10000 100000
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models.education import Course, students_courses
+from app.models.users import Student
+from app.routers.exports import export_course_students
+from app.routers.loaders import fetch_students
+from app.schemas.users_schemas import GetStudentSchema
+from app.services.seeding import seed_database
+
+
+def prepare(session: Session, students: int) -> int:
+    seed_database(session, students)
+    course_id = session.scalar(
+        insert(Course).values(name="Everyone").returning(Course.id)
+    )
+    session.execute(
+        insert(students_courses).from_select(
+            ["student_id", "course_id"], select(Student.id, course_id)
+        )
+    )
+    session.commit()
+    return course_id
+
+
+async def consume(response) -> tuple[float, int]:
+    started = time.perf_counter()
+    first_chunk, size = None, 0
+    async for chunk in response.body_iterator:
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - started
+        size += len(chunk)
+    return first_chunk, size
+
+
+def measure(run) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, nargs="+", default=[10000])
+    arguments = parser.parse_args()
+
+    for students in arguments.students:
+        directory = tempfile.mkdtemp()
+        engine = create_engine(
+            f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+        )
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            course_id = prepare(session, students)
+
+        with Session(engine) as session:
+            (first_chunk, size), elapsed, peak = measure(
+                lambda: asyncio.run(
+                    consume(
+                        export_course_students(course_id, "ndjson", session)
+                    )
+                )
+            )
+        print(
+            f"{students} students, export: first chunk "
+            f"{first_chunk * 1000:.1f}ms, {size:,} bytes in {elapsed:.2f}s, "
+            f"peak {peak:.1f}MB"
+        )
+
+        with Session(engine) as session:
+            _, elapsed, peak = measure(
+                lambda: jsonable_encoder(
+                    [
+                        GetStudentSchema.from_orm(student)
+                        for student in fetch_students(
+                            session.query(Student)
+                            .join(
+                                students_courses,
+                                students_courses.c.student_id == Student.id,
+                            )
+                            .filter(students_courses.c.course_id == course_id)
+                        )
+                    ]
+                )
+            )
+        print(f"{students} students, list: {elapsed:.2f}s, peak {peak:.1f}MB")
+        engine.dispose()
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
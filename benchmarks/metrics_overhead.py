@@ -0,0 +1,91 @@
+"""Measure the overhead of the request metrics on a list endpoint.
+
+Drives the endpoint of benchmarks.endpoints with METRICS_ENABLED on and
+off, every run in a fresh process against the same seeded database. The
+modes alternate over the rounds so that drift of the machine hits both,
+and the medians of the rounds are compared against the overhead target:
+
+    python -m benchmarks.metrics_overhead --tier 100k --rounds 5
+
+Exits with status 1 if the overhead exceeds the target.
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+
+from .endpoints import TIERS, _seed, measure_endpoint
+
+# the request metrics may slow the requests down by at most this percent
+OVERHEAD_TARGET = 2.0
+
+
+def measure(metrics: bool, args, database_url: str) -> dict:
+    # the settings are read by the process importing the app
+    os.environ["METRICS_ENABLED"] = str(metrics).lower()
+    with ProcessPoolExecutor(
+        1, mp_context=multiprocessing.get_context("spawn")
+    ) as process:
+        return process.submit(
+            measure_endpoint,
+            database_url,
+            TIERS[args.tier],
+            args.endpoint,
+            args.requests,
+            args.warmup,
+            args.seed,
+        ).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--tier", choices=TIERS, default="1k")
+    parser.add_argument("--database-url")
+    parser.add_argument("--endpoint", default="GET /students")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    students = TIERS[args.tier]
+    database_url = args.database_url or f"sqlite:///./benchmark-{args.tier}.db"
+    seeder = multiprocessing.get_context("spawn").Process(
+        target=_seed, args=(database_url, students, args.seed)
+    )
+    seeder.start()
+    seeder.join()
+    if seeder.exitcode:
+        raise SystemExit("Seeding failed")
+
+    runs = {True: [], False: []}
+    for round in range(args.rounds):
+        for metrics in (False, True) if round % 2 else (True, False):
+            runs[metrics].append(measure(metrics, args, database_url))
+
+    medians = {
+        metrics: {
+            name: statistics.median(run[name] for run in results)
+            for name in ("p50_ms", "p99_ms", "throughput_rps")
+        }
+        for metrics, results in runs.items()
+    }
+    off, on = medians[False], medians[True]
+    overhead = (on["p50_ms"] - off["p50_ms"]) / off["p50_ms"] * 100
+    print(f"{args.endpoint}, {args.rounds} rounds of {args.requests}")
+    for name in ("p50_ms", "p99_ms", "throughput_rps"):
+        print(f"{name:16}{off[name]:>10} off {on[name]:>10} on")
+    print(
+        f"overhead of the median latency {overhead:+.2f}% "
+        f"(target {OVERHEAD_TARGET}%)"
+    )
+    if overhead > OVERHEAD_TARGET:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Time the timetable generator on a synthetic faculty.
+
+Every group studies courses of its own speciality, every course has a
+few qualified teachers, and there are just enough auditories for the
+busiest timeslot:
+
+    python -m benchmarks.scheduler --groups 200 --courses-per-group 8
+"""
+
+import argparse
+import random
+import time
+
+from app.services.scheduler import Demand, Problem, solve
+
+SPECIALITIES = 10
+COURSES_PER_SPECIALITY = 16
+TEACHERS_PER_COURSE = 3
+TIMESLOTS = 6
+
+
+def generate(groups: int, courses_per_group: int, seed: int) -> Problem:
+    randomizer = random.Random(seed)
+    courses = SPECIALITIES * COURSES_PER_SPECIALITY
+    # every teacher is qualified for two courses
+    teachers = {
+        course: [
+            (course * TEACHERS_PER_COURSE + offset) % (courses * 3 // 2)
+            for offset in range(TEACHERS_PER_COURSE)
+        ]
+        for course in range(courses)
+    }
+    demands = []
+    for group in range(groups):
+        speciality = group % SPECIALITIES
+        for course in randomizer.sample(
+            range(COURSES_PER_SPECIALITY), courses_per_group
+        ):
+            demands.append(
+                Demand(
+                    group,
+                    speciality * COURSES_PER_SPECIALITY + course,
+                    randomizer.choice((2, 2, 3)),
+                )
+            )
+    weekly_lessons = sum(demand.weekly_lessons for demand in demands)
+    auditories = weekly_lessons // (5 * TIMESLOTS) * 11 // 10
+    return Problem(
+        demands=demands,
+        teachers=teachers,
+        timeslots=list(range(TIMESLOTS)),
+        auditories=list(range(auditories)),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--groups", type=int, default=200)
+    parser.add_argument("--courses-per-group", type=int, default=8)
+    parser.add_argument("--time-limit", type=float, default=600)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    problem = generate(
+        arguments.groups, arguments.courses_per_group, arguments.seed
+    )
+    started = time.perf_counter()
+    solution = solve(problem, arguments.time_limit)
+    elapsed = time.perf_counter() - started
+
+    unplaced = sum(demand.weekly_lessons for demand in solution.unplaced)
+    print(
+        f"{arguments.groups} groups, {len(problem.auditories)} auditories: "
+        f"{len(solution.placements)} lessons a week placed, "
+        f"{unplaced} unplaced in {elapsed:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
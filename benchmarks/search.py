@@ -0,0 +1,95 @@
+"""Time the visitor search on seeded visitors.
+
+Writes the students and teachers of the dataset of the given size into a
+temporary SQLite database (or --database-url) and reports latency
+percentiles of search_visitors for prefix, multi-word, passport,
+misspelled and kind-filtered queries. On SQLite the first search builds
+the in-memory index, its time is reported separately:
+
+    python -m benchmarks.search --students 1000000
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models.users import Student, Teacher, UnivercityVisitor
+from app.services.search import search_visitors
+from app.services.seeding import BATCH_SIZE, generate_rows
+
+QUERIES = {
+    "prefix": ("iva", None),
+    "words": ("olga sokolov", None),
+    "passport": ("0000 0123", None),
+    "misspelled": ("Smirnof Irina", None),
+    "teachers": ("petr", "teacher"),
+}
+VISITOR_TABLES = {
+    UnivercityVisitor.__table__,
+    Student.__table__,
+    Teacher.__table__,
+}
+
+
+def seed_visitors(session: Session, students: int):
+    batch, batch_table = [], None
+    for table, row in generate_rows(students):
+        if table not in VISITOR_TABLES:
+            continue
+        if table is not batch_table or len(batch) == BATCH_SIZE:
+            if batch:
+                session.execute(insert(batch_table), batch)
+            batch, batch_table = [], table
+        batch.append(row)
+    session.execute(insert(batch_table), batch)
+    session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--database-url")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    arguments = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    database_url = arguments.database_url or (
+        f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+    )
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        started = time.perf_counter()
+        seed_visitors(session, arguments.students)
+        print(f"seeded in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        search_visitors(session, "warmup", None, arguments.limit)
+        print(f"first search in {time.perf_counter() - started:.2f}s")
+
+        for name, (query, kind) in QUERIES.items():
+            latencies = []
+            for _ in range(arguments.requests):
+                started = time.perf_counter()
+                found = search_visitors(session, query, kind, arguments.limit)
+                latencies.append(time.perf_counter() - started)
+            latencies.sort()
+            print(
+                f"{name} {query!r}: {len(found)} results, "
+                f"p50 {statistics.median(latencies) * 1000:.2f}ms, "
+                f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f}ms"
+            )
+    engine.dispose()
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
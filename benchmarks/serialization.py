@@ -0,0 +1,90 @@
+"""Compare the ORM and the fast serialization paths of a list endpoint.
+
+Seeds the students into a temporary SQLite database, enrolls all of them
+into one course and times GET /courses/{id}/students/ with
+FAST_SERIALIZATION off and on:
+
+    python -m benchmarks.serialization --students 10000
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.database import Base, get_db
+from app.main import app
+from app.models.education import Course, students_courses
+from app.models.users import Student
+from app.services.seeding import seed_database
+
+
+def prepare(database_url: str, students: int) -> int:
+    """Returns id of the course of all students."""
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed_database(session, students)
+        course_id = session.scalar(
+            insert(Course).values(name="Everyone").returning(Course.id)
+        )
+        session.execute(
+            insert(students_courses).from_select(
+                ["student_id", "course_id"],
+                select(Student.id, course_id),
+            )
+        )
+        session.commit()
+    engine.dispose()
+    return course_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    arguments = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    database_url = f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+    course_id = prepare(database_url, arguments.students)
+
+    BenchmarkSession = sessionmaker(bind=create_engine(database_url))
+
+    def get_benchmark_db():
+        with BenchmarkSession() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = get_benchmark_db
+    url = f"/api/courses/{course_id}/students/"
+    timings, bodies = {}, {}
+    with TestClient(app) as client:
+        for fast in (False, True):
+            settings.FAST_SERIALIZATION = fast
+            best = None
+            for _ in range(arguments.repeat):
+                started = time.perf_counter()
+                response = client.get(url)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[fast], bodies[fast] = best, response.content
+
+    shutil.rmtree(directory)
+
+    assert bodies[False] == bodies[True], "responses differ"
+    print(
+        f"{arguments.students} students, {len(bodies[True]):,} bytes: "
+        f"orm {timings[False] * 1000:.1f}ms, "
+        f"fast {timings[True] * 1000:.1f}ms, "
+        f"{timings[False] / timings[True]:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
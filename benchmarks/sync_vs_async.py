@@ -0,0 +1,119 @@
+"""Compare the sync and async request paths under concurrent load.
+
+Starts one uvicorn worker per mode against the database configured in
+.env, fires the same requests at both and prints latency percentiles and
+throughput:
+
+    python -m benchmarks.sync_vs_async --path /api/students/1 \
+        --concurrency 500 --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def start_server(port: int, async_mode: bool) -> subprocess.Popen:
+    env = dict(os.environ, ASYNC_MODE=str(async_mode).lower())
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--workers",
+            "1",
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+
+
+def wait_ready(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/docs")
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+async def run_load(
+    base_url: str, paths: list[str], concurrency: int, total: int
+) -> dict:
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(paths[i % len(paths)])
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                path = queue.get_nowait()
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--path", action="append", dest="paths")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+    paths = args.paths or ["/api/students/1", "/api/teachers/1"]
+
+    results = {}
+    for async_mode in (False, True):
+        mode = "async" if async_mode else "sync"
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args.port, async_mode)
+        try:
+            wait_ready(base_url)
+            # warm up the pool before measuring
+            asyncio.run(run_load(base_url, paths, args.concurrency, 200))
+            results[mode] = asyncio.run(
+                run_load(base_url, paths, args.concurrency, args.requests)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
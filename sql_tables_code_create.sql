@@ -1,3 +1,5 @@
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 
 CREATE TABLE public.buildings (
 	id serial4 NOT NULL,
@@ -39,9 +41,13 @@ CREATE TABLE public.visitors (
 	last_name varchar NOT NULL,
 	birthdate date NOT NULL,
 	passport_id varchar NOT NULL,
+	"version" int4 DEFAULT 1 NOT NULL,
 	CONSTRAINT visitors_passport_id_key UNIQUE (passport_id),
 	CONSTRAINT visitors_pkey PRIMARY KEY (id)
 );
+CREATE INDEX ix_visitors_birthdate ON public.visitors USING btree (birthdate);
+CREATE INDEX ix_visitors_passport_id_id ON public.visitors USING btree (passport_id) INCLUDE (id);
+CREATE INDEX ix_visitors_search ON public.visitors USING gist (lower(last_name || ' ' || name || ' ' || middle_name || ' ' || passport_id) gist_trgm_ops);
 
 CREATE TABLE public.auditories (
 	id serial4 NOT NULL,
@@ -56,9 +62,11 @@ CREATE TABLE public.courses (
 	id serial4 NOT NULL,
 	"name" varchar NOT NULL,
 	faculty_id int4 NULL,
+	"version" int4 DEFAULT 1 NOT NULL,
 	CONSTRAINT courses_pkey PRIMARY KEY (id),
 	CONSTRAINT courses_faculty_id_fkey FOREIGN KEY (faculty_id) REFERENCES public.faculties(id)
 );
+CREATE INDEX ix_courses_faculty_id ON public.courses USING btree (faculty_id);
 
 
 CREATE TABLE public.departments (
@@ -79,6 +87,7 @@ CREATE TABLE public."groups" (
 	CONSTRAINT groups_pkey PRIMARY KEY (id),
 	CONSTRAINT groups_department_id_fkey FOREIGN KEY (department_id) REFERENCES public.departments(id)
 );
+CREATE INDEX ix_groups_department_id ON public."groups" USING btree (department_id);
 
 
 CREATE TABLE public.homeworks (
@@ -99,6 +108,7 @@ CREATE TABLE public.shedules (
 	CONSTRAINT uq_group_date UNIQUE (group_id, date),
 	CONSTRAINT shedules_group_id_fkey FOREIGN KEY (group_id) REFERENCES public."groups"(id)
 );
+CREATE INDEX ix_shedules_date ON public.shedules USING btree (date);
 
 
 
@@ -109,6 +119,7 @@ CREATE TABLE public.students (
 	CONSTRAINT students_group_id_fkey FOREIGN KEY (group_id) REFERENCES public."groups"(id),
 	CONSTRAINT students_id_fkey FOREIGN KEY (id) REFERENCES public.visitors(id)
 );
+CREATE INDEX ix_students_group_id ON public.students USING btree (group_id);
 
 
 
@@ -119,6 +130,7 @@ CREATE TABLE public.students_courses (
 	CONSTRAINT students_courses_course_id_fkey FOREIGN KEY (course_id) REFERENCES public.courses(id),
 	CONSTRAINT students_courses_student_id_fkey FOREIGN KEY (student_id) REFERENCES public.students(id)
 );
+CREATE INDEX ix_students_courses_course_student ON public.students_courses USING btree (course_id, student_id);
 
 
 
@@ -129,6 +141,7 @@ CREATE TABLE public.teachers (
 	CONSTRAINT teachers_department_id_fkey FOREIGN KEY (department_id) REFERENCES public.departments(id),
 	CONSTRAINT teachers_id_fkey FOREIGN KEY (id) REFERENCES public.visitors(id)
 );
+CREATE INDEX ix_teachers_department_id ON public.teachers USING btree (department_id);
 
 
 
@@ -137,10 +150,39 @@ CREATE TABLE public.course_grades (
 	score int4 NULL,
 	student_id int4 NULL,
 	course_id int4 NULL,
+	"version" int4 DEFAULT 1 NOT NULL,
 	CONSTRAINT course_grades_pkey PRIMARY KEY (id),
+	CONSTRAINT uq_grade_student_course UNIQUE (student_id, course_id),
 	CONSTRAINT course_grades_course_id_fkey FOREIGN KEY (course_id) REFERENCES public.courses(id),
 	CONSTRAINT course_grades_student_id_fkey FOREIGN KEY (student_id) REFERENCES public.students(id)
 );
+CREATE INDEX ix_course_grades_course_id ON public.course_grades USING btree (course_id);
+
+
+
+CREATE TABLE public.course_grade_stats (
+	course_id int4 NOT NULL,
+	count int4 NOT NULL,
+	total int4 NOT NULL,
+	score_0 int4 NOT NULL,
+	score_1 int4 NOT NULL,
+	score_2 int4 NOT NULL,
+	score_3 int4 NOT NULL,
+	score_4 int4 NOT NULL,
+	score_5 int4 NOT NULL,
+	CONSTRAINT course_grade_stats_pkey PRIMARY KEY (course_id),
+	CONSTRAINT course_grade_stats_course_id_fkey FOREIGN KEY (course_id) REFERENCES public.courses(id)
+);
+
+
+
+CREATE TABLE public.student_grade_stats (
+	student_id int4 NOT NULL,
+	count int4 NOT NULL,
+	total int4 NOT NULL,
+	CONSTRAINT student_grade_stats_pkey PRIMARY KEY (student_id),
+	CONSTRAINT student_grade_stats_student_id_fkey FOREIGN KEY (student_id) REFERENCES public.students(id) ON DELETE CASCADE
+);
 
 
 
@@ -176,6 +218,7 @@ CREATE TABLE public.education_plans (
 	CONSTRAINT education_plans_group_id_fkey FOREIGN KEY (group_id) REFERENCES public."groups"(id),
 	CONSTRAINT education_plans_semester_id_fkey FOREIGN KEY (semester_id) REFERENCES public.semesters(id)
 );
+CREATE INDEX ix_education_plans_group_id ON public.education_plans USING btree (group_id);
 
 
 CREATE TABLE public.exams (
@@ -206,6 +249,9 @@ CREATE TABLE public.lessons (
 	CONSTRAINT lessons_teacher_id_fkey FOREIGN KEY (teacher_id) REFERENCES public.teachers(id),
 	CONSTRAINT lessons_timeslot_id_fkey FOREIGN KEY (timeslot_id) REFERENCES public.timeslots(id)
 );
+CREATE INDEX ix_lessons_auditory_schedule ON public.lessons USING btree (auditory_id, schedule_id);
+CREATE INDEX ix_lessons_schedule_timeslot ON public.lessons USING btree (schedule_id, timeslot_id);
+CREATE INDEX ix_lessons_teacher_schedule ON public.lessons USING btree (teacher_id, schedule_id);
 
 
 
@@ -235,6 +281,7 @@ CREATE TABLE public.teacher_course (
 	CONSTRAINT teacher_course_course_id_fkey FOREIGN KEY (course_id) REFERENCES public.courses(id),
 	CONSTRAINT teacher_course_teacher_id_fkey FOREIGN KEY (teacher_id) REFERENCES public.teachers(id)
 );
+CREATE INDEX ix_teacher_course_course_teacher ON public.teacher_course USING btree (course_id, teacher_id);
 
 
 
@@ -246,4 +293,5 @@ CREATE TABLE public.exam_grades (
 	CONSTRAINT exam_grades_pkey PRIMARY KEY (id),
 	CONSTRAINT exam_grades_exam_id_fkey FOREIGN KEY (exam_id) REFERENCES public.exams(id),
 	CONSTRAINT exam_grades_student_id_fkey FOREIGN KEY (student_id) REFERENCES public.students(id)
-);
\ No newline at end of file
+);
+CREATE INDEX ix_exam_grades_student_id ON public.exam_grades USING btree (student_id);
\ No newline at end of file